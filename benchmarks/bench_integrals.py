@@ -0,0 +1,63 @@
+#
+# Benchmarks of the delta integral and the functions built on it.
+# dintegral and dexp_p run over the whole timescale; g_k, h_k and laplace_transform, which integrate recursively, over its last WINDOW items.
+#
+import os
+
+from common import DIRECTORY, TimescaleBenchmark, tsc
+
+def polynomial(t):
+    return t * t - 3 * t + 1
+
+def constant(t):
+    return 0.001
+
+def one(t):
+    return 1.0
+
+def half(t):
+    return 0.5
+
+class Dintegral(TimescaleBenchmark):
+    limits = {"points": 10**6, "intervals": 10**3, "mixed": 10**3}
+
+    def time_dintegral(self, size, composition, backend):
+        self.timescale.dintegral(polynomial, self.last, self.first)
+
+class Dexp(TimescaleBenchmark):
+    limits = {"points": 10**5, "intervals": 10**2, "mixed": 10**3}
+
+    def time_dexp_p(self, size, composition, backend):
+        self.timescale.dexp_p(constant, self.last, self.first)
+
+class Taylor(TimescaleBenchmark):
+    def time_g_k(self, size, composition, backend):
+        self.timescale.memo_g_k = {}
+        self.timescale.g_k(2, self.last, self.window)
+
+    def time_h_k(self, size, composition, backend):
+        self.timescale.memo_h_k = {}
+        self.timescale.h_k(2, self.last, self.window)
+
+class Laplace(TimescaleBenchmark):
+    def time_laplace_transform(self, size, composition, backend):
+        self.timescale.laplace_transform(one, half, self.window)
+
+#
+# g_k and h_k with empty memo tables, answered from a persistent cache that an earlier run filled (see timescale.persist()).
+#
+class PersistentCache(TimescaleBenchmark):
+    def setup(self, size, composition, backend):
+        TimescaleBenchmark.setup(self, size, composition, backend)
+
+        self.timescale.persist(tsc.persistent_cache(os.path.join(DIRECTORY, "tables.sqlite")))
+        self.timescale.g_k(2, self.last, self.window)
+        self.timescale.h_k(2, self.last, self.window)
+
+    def time_g_k_warm(self, size, composition, backend):
+        self.timescale.memo_g_k = {}
+        self.timescale.g_k(2, self.last, self.window)
+
+    def time_h_k_warm(self, size, composition, backend):
+        self.timescale.memo_h_k = {}
+        self.timescale.h_k(2, self.last, self.window)
@@ -0,0 +1,84 @@
+#
+# Benchmarks of the building blocks: construction, sigma, rho, mu and membership.
+# Every time_* method of the primitives answers QUERIES queries at random values of the timescale.
+#
+import contextlib
+import io
+
+import numpy as np
+
+from common import BACKENDS, COMPOSITIONS, SIZES, TimescaleBenchmark, items, make_timescale, tsc
+
+QUERIES = 1000
+
+class Construction:
+    params = [SIZES, COMPOSITIONS, BACKENDS]
+    param_names = ["size", "composition", "backend"]
+
+    def setup(self, size, composition, backend):
+        make_timescale(size, composition, backend)
+
+    def time_construction(self, size, composition, backend):
+        make_timescale(size, composition, backend)
+
+class Primitives(TimescaleBenchmark):
+    def setup(self, size, composition, backend):
+        TimescaleBenchmark.setup(self, size, composition, backend)
+
+        starts, ends = items(size, composition)
+        values = np.random.default_rng(0).integers(0, size, QUERIES)
+
+        # the start of an item, and the middle of it if it is an interval
+        self.values = [float(value) for value in (starts[values] + ends[values]) / 2]
+
+        # 0.5 is not in any of the timescales
+        self.outside = [value + 0.5 for value in self.values]
+
+    def time_sigma(self, size, composition, backend):
+        for t in self.values:
+            self.timescale.sigma(t)
+
+    def time_rho(self, size, composition, backend):
+        for t in self.values:
+            self.timescale.rho(t)
+
+    def time_mu(self, size, composition, backend):
+        for t in self.values:
+            self.timescale.mu(t)
+
+    def time_membership(self, size, composition, backend):
+        for t in self.values:
+            self.timescale.isInTimescale(t)
+
+        for t in self.outside:
+            self.timescale.isInTimescale(t)
+
+#
+# The same queries on the small timescales that most programs use (for instance the examples, which call sigma() about a million times),
+# made with the constructor from a list. Their cost is dominated by the constant overhead of one query, not by the search.
+#
+class SmallTimescales:
+    params = [[2, 25], COMPOSITIONS]
+    param_names = ["size", "composition"]
+
+    def setup(self, size, composition):
+        starts, ends = items(size, composition)
+
+        # the constructor prints the timescale
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.timescale = tsc.timescale([[a, b] if a != b else a for a, b in zip(starts.tolist(), ends.tolist())])
+
+        values = np.random.default_rng(0).integers(0, size, QUERIES)
+        self.values = [float(value) for value in (starts[values] + ends[values]) / 2]
+
+    def time_sigma(self, size, composition):
+        for t in self.values:
+            self.timescale.sigma(t)
+
+    def time_mu(self, size, composition):
+        for t in self.values:
+            self.timescale.mu(t)
+
+    def time_membership(self, size, composition):
+        for t in self.values:
+            self.timescale.isInTimescale(t)
@@ -0,0 +1,113 @@
+#
+# Benchmarks of the initial value problem solvers over the whole timescale, and of the conformable boundary value problem examples
+# (examples/conformablebvp), which are run in a temporary directory without saving their figures.
+#
+import glob
+import importlib.util
+import os
+import runpy
+import shutil
+import tempfile
+
+import numpy as np
+
+from common import COMPOSITIONS, SIZES, TimescaleBenchmark, tsc
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples", "conformablebvp")
+
+STEP_SIZE = 0.1
+
+def decay(t, y):
+    return -0.001 * y
+
+def decay_odeint(y, t):
+    return -0.001 * y
+
+def decay_system(vector, t):
+    return [-0.001 * vector[0], 0.001 * vector[0] - 0.002 * vector[1]]
+
+class ODESolvers(TimescaleBenchmark):
+    limits = {"points": 10**5, "intervals": 10**4, "mixed": 10**4}
+
+    def time_solve_ode_for_t(self, size, composition, backend):
+        self.timescale.solve_ode_for_t(1.0, self.first, self.last, decay)
+
+    def time_solve_ode_for_t_with_odeint(self, size, composition, backend):
+        self.timescale.solve_ode_for_t_with_odeint(1.0, self.first, self.last, decay_odeint, STEP_SIZE)
+
+    def time_solve_ode_system_for_t(self, size, composition, backend):
+        self.timescale.solve_ode_system_for_t([1.0, 0.0], self.first, self.last, decay_system, STEP_SIZE)
+
+class ConformableBVPExamples:
+    params = [sorted(os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(EXAMPLES, "*.py")))]
+    param_names = ["example"]
+
+    def setup(self, example):
+        import matplotlib
+
+        matplotlib.use("Agg")
+
+        import matplotlib.pyplot as plt
+
+        self.plt = plt
+        self.savefig = plt.savefig
+        self.directory = tempfile.mkdtemp(prefix="timescale-examples-")
+
+        plt.savefig = lambda *args, **kwargs: None
+
+    def teardown(self, example):
+        self.plt.savefig = self.savefig
+        self.plt.close("all")
+
+        shutil.rmtree(self.directory, True)
+
+    def time_example(self, example):
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+
+        try:
+            runpy.run_path(os.path.join(EXAMPLES, example + ".py"), run_name="__main__")
+        finally:
+            os.chdir(cwd)
+            self.plt.close("all")
+
+#
+# The solvers and dintegral with a right-hand side or integrand in Python and compiled with numba (see timescalecalculus.njit()),
+# which runs the right scattered points in compiled loops. The "numba" combinations are skipped if numba is not installed.
+#
+def decay_system_array(vector, t):
+    return np.array([-0.001 * vector[0], 0.001 * vector[0] - 0.002 * vector[1]])
+
+def polynomial(t):
+    return t * t - 3 * t + 1
+
+class CompiledKernels(TimescaleBenchmark):
+    params = [SIZES, COMPOSITIONS, ["python", "numba"]]
+    param_names = ["size", "composition", "functions"]
+    limits = {"points": 10**6, "intervals": 10**3, "mixed": 10**4}
+
+    def setup(self, size, composition, functions):
+        if functions == "numba" and importlib.util.find_spec("numba") is None:
+            raise NotImplementedError("numba is not installed")
+
+        TimescaleBenchmark.setup(self, size, composition, "float64")
+
+        compile = tsc.njit if functions == "numba" else (lambda f: f)
+
+        self.decay = compile(decay)
+        self.decay_system = compile(decay_system_array)
+        self.polynomial = compile(polynomial)
+
+        # compiles the functions and the kernels
+        self.time_solve_ode_for_t(size, composition, functions)
+        self.time_solve_ode_system_for_t(size, composition, functions)
+        self.time_dintegral(size, composition, functions)
+
+    def time_solve_ode_for_t(self, size, composition, functions):
+        self.timescale.solve_ode_for_t(1.0, self.first, self.last, self.decay)
+
+    def time_solve_ode_system_for_t(self, size, composition, functions):
+        self.timescale.solve_ode_system_for_t([1.0, 0.0], self.first, self.last, self.decay_system, STEP_SIZE)
+
+    def time_dintegral(self, size, composition, functions):
+        self.timescale.dintegral(self.polynomial, self.last, self.first)
@@ -0,0 +1,90 @@
+#
+# Time scales for the benchmarks, parameterized by
+#   size         -- the number of items (points and intervals), 10^2 to 10^6
+#   composition  -- "points" (the even integers), "intervals" ([2k, 2k + 1]) or "mixed" (alternating points and intervals)
+#   backend      -- how the index is stored: "float64" or "float32" (see timescale.from_arrays()), or "mmap" (a float64 file opened with timescale.open())
+#
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import timescalecalculus as tsc
+
+SIZES = [10**2, 10**3, 10**4, 10**5, 10**6]
+COMPOSITIONS = ["points", "intervals", "mixed"]
+BACKENDS = ["float64", "float32", "mmap"]
+
+DIRECTORY = tempfile.mkdtemp(prefix="timescale-benchmarks-")
+atexit.register(shutil.rmtree, DIRECTORY, True)
+
+#
+# returns [starts, ends] of the items of a timescale (see timescale.from_arrays())
+#
+def items(size, composition):
+    starts = np.arange(size) * 2.0
+
+    if composition == "points":
+        ends = starts
+    elif composition == "intervals":
+        ends = starts + 1
+    else:
+        ends = np.where(np.arange(size) % 2 == 1, starts + 1, starts)
+
+    return [starts, ends]
+
+def make_timescale(size, composition, backend):
+    starts, ends = items(size, composition)
+    name = composition + "-" + str(size)
+
+    if backend == "float32":
+        return tsc.timescale.from_arrays(starts, ends, name, dtype=np.float32)
+
+    timescale = tsc.timescale.from_arrays(starts, ends, name)
+
+    if backend == "mmap":
+        path = os.path.join(DIRECTORY, name + ".tsc")
+
+        if not os.path.exists(path):
+            timescale.save(path)
+
+        timescale = tsc.timescale.open(path)
+
+    return timescale
+
+#
+# skips a parameter combination (the asv convention: setup() raises NotImplementedError)
+#
+def skip_above(size, limit):
+    if size > limit:
+        raise NotImplementedError("size " + str(size) + " is above the limit " + str(limit) + " of this benchmark")
+
+#
+# Base class of the benchmarks that run on a timescale (asv conventions: params, param_names, setup() and time_* methods).
+#
+# "limits" gives the largest size that is run for each composition, since the cost of some operations grows quickly with the number of intervals.
+# setup() makes self.timescale, its first and last values self.first and self.last, and self.window, the start of the item WINDOW items
+# before the end, for the operations that are run on the last items only.
+#
+WINDOW = 3
+
+class TimescaleBenchmark:
+    params = [SIZES, COMPOSITIONS, BACKENDS]
+    param_names = ["size", "composition", "backend"]
+    limits = {"points": SIZES[-1], "intervals": SIZES[-1], "mixed": SIZES[-1]}
+
+    def setup(self, size, composition, backend):
+        skip_above(size, self.limits[composition])
+
+        self.timescale = make_timescale(size, composition, backend)
+
+        starts, ends = items(size, composition)
+
+        self.first = float(starts[0])
+        self.last = float(ends[-1])
+        self.window = float(starts[-WINDOW])
@@ -0,0 +1,107 @@
+#
+# Checks that one timescale can be used by several threads at the same time (see the notes on concurrency of the timescale class):
+#   - the index that several threads ask for at the same time is built once and the point queries give the same results as in one thread
+#   - g_k, h_k, dintegral, dexp_p and solve_ode_for_t give the same results as in one thread
+#   - every value of g_k and h_k is computed once: the threads together make as many dintegral calls for g_k and h_k as one thread
+#     (memo_table.compute() lets the other threads wait for a value that is being computed)
+#
+# Run from the root of the repository:
+#   python benchmarks/concurrency.py [number of threads]
+# The exit status is 1 if a check fails.
+#
+import concurrent.futures
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import timescalecalculus as tsc
+
+ITEMS = [0, 0.5, [1, 1.5], 2, 2.25, 2.5, [3, 3.25], 4, 4.5, 5]
+QUERIES = [0, 0.5, 1, 1.25, 1.5, 2, 2.25, 2.5, 3, 3.1, 3.25, 4, 4.5, 5]
+
+def polynomial(t):
+    return t * t - 2 * t + 1
+
+def decay(t, y):
+    return -0.5 * y
+
+#
+# the calls that are made by every thread, as [name, function of the timescale]
+#
+CALLS = [["sigma", lambda ts: [ts.sigma(t) for t in QUERIES]],
+         ["mu", lambda ts: [ts.mu(t) for t in QUERIES]],
+         ["isInTimescale", lambda ts: [ts.isInTimescale(t + 0.01) for t in QUERIES]],
+         ["g_k", lambda ts: [ts.g_k(2, 5, 0), ts.g_k(3, 1.5, 0)]],
+         ["h_k", lambda ts: [ts.h_k(2, 5, 0), ts.h_k(3, 2.5, 0.5)]],
+         ["dintegral", lambda ts: ts.dintegral(polynomial, 5, 0)],
+         ["dexp_p", lambda ts: ts.dexp_p(lambda t: 0.1, 5, 0)],
+         ["solve_ode_for_t", lambda ts: np.asarray(ts.solve_ode_for_t(1.0, 0, 5, decay)).item()]]
+
+def timescale():
+    ts = tsc.timescale(ITEMS, "concurrency check")
+    ts.ts = ITEMS  # drops the index, so that the threads build it
+
+    return ts
+
+#
+# runs every call on ts in "threads" threads at the same time and returns [{name: results of the threads}, {name: number of dintegral calls}]
+#
+def run(ts, threads):
+    calls = []
+    hook = lambda event, name: calls.append(name) if event == "enter" and name == "dintegral" else None
+    results = {}
+    counts = {}
+
+    with ts.instrument(hooks=[hook]), concurrent.futures.ThreadPoolExecutor(threads) as pool:
+        for name, call in CALLS:
+            barrier = threading.Barrier(threads)
+
+            def work(call=call, barrier=barrier):
+                barrier.wait()
+
+                return call(ts)
+
+            before = len(calls)
+
+            futures = [pool.submit(work) for thread in range(threads)]
+            results[name] = [future.result() for future in futures]
+
+            counts[name] = len(calls) - before
+
+    return [results, counts]
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    failed = False
+
+    expected, sequential_calls = run(timescale(), 1)
+
+    start = time.perf_counter()
+    results, concurrent_calls = run(timescale(), threads)
+    seconds = time.perf_counter() - start
+
+    for name, call in CALLS:
+        same = all(result == expected[name][0] for result in results[name])
+        failed = failed or not same
+
+        print("%-16s %s" % (name, "same results in all threads" if same else "DIFFERENT RESULTS"))
+
+    for name in ["g_k", "h_k"]:
+        print("%-16s %d dintegral calls in 1 thread, %d in %d threads" % (name, sequential_calls[name], concurrent_calls[name], threads))
+
+        if concurrent_calls[name] != sequential_calls[name]:
+            print("values of " + name + " were computed more than once")
+            failed = True
+
+    print("%d threads: %.2f s" % (threads, seconds))
+
+    if failed:
+        print("FAILED")
+        sys.exit(1)
+
+    print("OK")
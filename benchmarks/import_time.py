@@ -0,0 +1,50 @@
+#
+# Measures the cold start time of "import timescalecalculus" in fresh interpreters and checks it against a budget.
+#
+# Budget: the import takes at most BUDGET seconds (best of RUNS fresh interpreters, which includes importing numpy),
+# and none of the modules in HEAVY is imported by it -- they are loaded on first use (see _lazy_module in timescalecalculus.py).
+#
+# Run from the root of the repository:
+#   python benchmarks/import_time.py
+# The exit status is 1 if the budget is exceeded. "python -X importtime -c 'import timescalecalculus'" shows where the time goes.
+#
+import os
+import subprocess
+import sys
+
+BUDGET = 0.5
+RUNS = 5
+HEAVY = ["scipy", "matplotlib", "symengine", "mpmath", "jitcdde", "numba"]
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+PROGRAM = """
+import sys, time
+start = time.perf_counter()
+import timescalecalculus
+print(time.perf_counter() - start)
+print(",".join(name for name in %r if name in sys.modules))
+""" % (HEAVY,)
+
+#
+# imports the package in a new interpreter and returns [seconds, heavy modules that were imported]
+#
+def measure():
+    output = subprocess.run([sys.executable, "-c", PROGRAM], cwd=ROOT, capture_output=True, text=True, check=True).stdout.split("\n")
+
+    return [float(output[0]), [name for name in output[1].split(",") if name]]
+
+if __name__ == "__main__":
+    results = [measure() for run in range(RUNS)]
+
+    best = min(seconds for seconds, imported in results)
+    imported = sorted(set(name for seconds, imported in results for name in imported))
+
+    print("import timescalecalculus: best %.3f s, median %.3f s (budget %.3f s)" % (best, sorted(seconds for seconds, imported in results)[RUNS // 2], BUDGET))
+    print("heavy modules imported:", ", ".join(imported) if imported else "none")
+
+    if best > BUDGET or imported:
+        print("FAILED")
+        sys.exit(1)
+
+    print("OK")
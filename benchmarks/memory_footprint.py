@@ -0,0 +1,71 @@
+#
+# Measures the memory used by a timescale with one million items in its different representations:
+#   - the list ts of floats and [a, b] intervals (what the constructor is given and used to keep)
+#   - the index of the timescale in float64 and in float32 precision (see timescale.from_arrays())
+#   - a memory-mapped timescale file (see timescale.save() and timescale.open())
+#
+# Run from the root of the repository:
+#   python benchmarks/memory_footprint.py [number of items]
+#
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import timescalecalculus as tsc
+
+#
+# every third item is an interval, the others are points
+#
+def items(n):
+    starts = np.arange(n) * 1.0
+    ends = np.where(np.arange(n) % 3 == 0, starts + 0.5, starts)
+
+    return [starts, ends]
+
+#
+# runs "build" and returns its result together with the number of bytes it allocated
+#
+def allocated(build):
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return [result, size]
+
+def report(label, size, n):
+    print("%-34s %12d bytes %8.1f bytes/item" % (label, size, size / n))
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    starts, ends = items(n)
+
+    print("timescale with", n, "items (", n - n // 3 - 1, "points and", n // 3 + 1, "intervals )")
+
+    ts_list, size = allocated(lambda: [[a, b] if a != b else a for a, b in zip(starts.tolist(), ends.tolist())])
+    report("list ts", size, n)
+
+    compact, size = allocated(lambda: tsc.timescale.from_arrays(starts, ends, "float64"))
+    report("index, float64", size, n)
+    print("    memory_footprint():", compact.memory_footprint())
+
+    single, size = allocated(lambda: tsc.timescale.from_arrays(starts, ends, "float32", dtype=np.float32))
+    report("index, float32", size, n)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "timescale.tsc")
+        compact.save(path)
+
+        mapped, size = allocated(lambda: tsc.timescale.open(path))
+        report("memory-mapped file", size, n)
+        print("    memory_footprint():", mapped.memory_footprint())
+
+        del mapped
+
+    compact.ts
+    print("index, float64, after accessing ts:", compact.memory_footprint())
@@ -0,0 +1,200 @@
+#
+# Runs the benchmark suite (the bench_*.py modules of this directory) and writes the results to a JSON file, or compares two result files.
+#
+# The benchmarks follow the conventions of asv (airspeed velocity): classes with "params" and "param_names", setup()/teardown() methods that
+# get the parameters, NotImplementedError in setup() to skip a combination, and time_* methods that are timed.
+#
+# Run from the root of the repository:
+#   python benchmarks/run.py [--quick] [--bench REGEX] [--output FILE]
+#   python benchmarks/run.py --compare BASELINE.json RESULTS.json [--threshold 1.1]
+#
+# --quick runs sizes up to 10^3 with the float64 backend only. The results file records the commit, the machine and the versions of
+# python, numpy and scipy, and for every benchmark and parameter combination the best and median time of one call in seconds.
+# --compare prints the ratio RESULTS / BASELINE of every benchmark that is in both files and exits with status 1 if one of them
+# is slower than the threshold allows.
+#
+import argparse
+import contextlib
+import datetime
+import glob
+import importlib
+import itertools
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, DIRECTORY)
+
+TARGET = 0.1
+REPEAT = 5
+
+#
+# yields [name, class, method name] for every benchmark of the bench_*.py modules
+#
+def discover(pattern):
+    for path in sorted(glob.glob(os.path.join(DIRECTORY, "bench_*.py"))):
+        module = importlib.import_module(os.path.splitext(os.path.basename(path))[0])
+
+        for class_name, benchmark in sorted(vars(module).items()):
+            if not isinstance(benchmark, type) or benchmark.__module__ != module.__name__:
+                continue
+
+            for method in sorted(name for name in dir(benchmark) if name.startswith("time_")):
+                name = module.__name__ + "." + class_name + "." + method
+
+                if re.search(pattern, name):
+                    yield [name, benchmark, method]
+
+#
+# returns [best, median, number] where best and median are the times of one call of function, in seconds, over REPEAT samples
+# of "number" calls each; number is chosen so that a sample takes about TARGET seconds
+#
+def measure(function):
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+
+    number = max(1, int(TARGET / max(elapsed, 1e-9)))
+    repeat = REPEAT if elapsed < 1 else 1
+    samples = [elapsed] if repeat == 1 else []
+
+    for sample in range(repeat - len(samples)):
+        start = time.perf_counter()
+
+        for call in range(number):
+            function()
+
+        samples.append((time.perf_counter() - start) / number)
+
+    samples.sort()
+
+    return [samples[0], samples[len(samples) // 2], number]
+
+def run(benchmark, method, params, quick):
+    if quick and "size" in benchmark.param_names:
+        if params[benchmark.param_names.index("size")] > 10**3:
+            return None
+
+    if quick and "backend" in benchmark.param_names:
+        if params[benchmark.param_names.index("backend")] != "float64":
+            return None
+
+    instance = benchmark()
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            if hasattr(instance, "setup"):
+                instance.setup(*params)
+
+        except NotImplementedError:
+            return {"params": list(params), "skipped": True}
+
+        try:
+            best, median, number = measure(lambda: getattr(instance, method)(*params))
+
+        finally:
+            if hasattr(instance, "teardown"):
+                instance.teardown(*params)
+
+    return {"params": list(params), "best": best, "median": median, "number": number}
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=DIRECTORY, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    import numpy
+    import scipy
+
+    return {
+        "commit": commit,
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "machine": platform.node(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "scipy": scipy.__version__,
+    }
+
+def benchmark(arguments):
+    results = environment()
+    results["benchmarks"] = {}
+
+    for name, benchmark, method in discover(arguments.bench):
+        params = benchmark.params if hasattr(benchmark, "params") else []
+        names = benchmark.param_names if hasattr(benchmark, "param_names") else []
+        rows = []
+
+        for combination in itertools.product(*params):
+            row = run(benchmark, method, combination, arguments.quick)
+
+            if row is None:
+                continue
+
+            rows.append(row)
+
+            print(name, dict(zip(names, combination)), "skipped" if "skipped" in row else "%.6f s" % row["best"], flush=True)
+
+        results["benchmarks"][name] = {"param_names": names, "results": rows}
+
+    output = arguments.output or os.path.join("benchmark-results", str(results["commit"])[:12] + ".json")
+
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    with open(output, "w") as file:
+        json.dump(results, file, indent=1)
+
+    print("results written to", output)
+
+def timings(path):
+    with open(path) as file:
+        results = json.load(file)
+
+    return {(name, json.dumps(row["params"])): row["best"] for name, benchmark in results["benchmarks"].items() for row in benchmark["results"] if "best" in row}
+
+def compare(arguments):
+    baseline = timings(arguments.compare[0])
+    results = timings(arguments.compare[1])
+
+    slower = 0
+
+    for key in sorted(set(baseline) & set(results)):
+        ratio = results[key] / baseline[key]
+        flag = ""
+
+        if ratio > arguments.threshold:
+            flag = "  SLOWER"
+            slower = slower + 1
+
+        elif ratio < 1 / arguments.threshold:
+            flag = "  faster"
+
+        print("%-60s %-40s %12.6f %12.6f %8.2f%s" % (key[0], key[1], baseline[key], results[key], ratio, flag))
+
+    print(slower, "of", len(set(baseline) & set(results)), "benchmarks are slower than", arguments.threshold, "times the baseline")
+
+    return 1 if slower else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs the timescalecalculus benchmarks or compares two result files.")
+    parser.add_argument("--bench", default="", help="only run the benchmarks whose name (module.Class.time_method) matches this regular expression")
+    parser.add_argument("--quick", action="store_true", help="only sizes up to 10^3 and the float64 backend")
+    parser.add_argument("--output", help="the JSON file to write (default: benchmark-results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "RESULTS"), help="compare two result files instead of running the benchmarks")
+    parser.add_argument("--threshold", type=float, default=1.1, help="the ratio above which --compare reports a benchmark as slower")
+
+    arguments = parser.parse_args()
+
+    if arguments.compare:
+        sys.exit(compare(arguments))
+
+    benchmark(arguments)
@@ -0,0 +1,7 @@
+#
+# Makes timescalecalculus importable when pytest is run from the root of the repository or from this directory.
+#
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,63 @@
+#
+# Array versions of the operators (dderivative_array, dintegral_array, dexp_array) against the scalar ones.
+#
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+TIMESCALES = {"points": [0, 1, 2, 4, 7], "interval": [[0, 2]], "mixed": [0, 1, [2, 3], 5]}
+
+def square(t):
+    return t * t
+
+@pytest.fixture(params=list(TIMESCALES), ids=list(TIMESCALES))
+def ts(request):
+    return tsc.timescale(TIMESCALES[request.param])
+
+def test_dderivative_array(ts):
+    t = ts.sample_grid(0.001)
+    derivatives = ts.dderivative_array(square(t), t)
+
+    for k in np.flatnonzero(np.isin(t, ts.sample_grid()))[:-1].tolist():
+        # Exact on right scattered values, the first order difference quotient inside of intervals.
+        assert derivatives[k] == pytest.approx(ts.dderivative(square, t[k]), abs=2e-3)
+
+def test_dintegral_array(ts):
+    t = ts.sample_grid(0.001)
+    integral = ts.dintegral_array(square(t), t)
+
+    for k in np.flatnonzero(np.isin(t, ts.sample_grid())).tolist():
+        assert integral[k] == pytest.approx(ts.dintegral(square, t[k], t[0]), rel=1e-6, abs=1e-9)
+
+    # "previous" is exact for step functions.
+    nodes = ts.sample_grid()
+    steps = ts.dintegral_array(np.ones(len(nodes)), nodes, rule="previous")
+
+    assert steps == pytest.approx(nodes - nodes[0])
+
+def test_dexp_array(ts):
+    t = ts.sample_grid(0.01)
+    p = lambda t: 0.5
+    exponential = ts.dexp_array(np.full(len(t), 0.5), t)
+
+    for k in np.flatnonzero(np.isin(t, ts.sample_grid())).tolist():
+        assert exponential[k] == pytest.approx(ts.dexp_p(p, t[k], t[0]), rel=1e-9)
+
+def test_samples_are_validated(ts):
+    nodes = ts.sample_grid()
+
+    with pytest.raises(Exception, match="exactly one value"):
+        ts.dintegral_array(np.ones(len(nodes) + 1), nodes)
+
+    with pytest.raises(Exception, match="not in the timescale"):
+        ts.dintegral_array([1.0, 1.0], [nodes[0], nodes[-1] + 1])
+
+def test_dexp_p_on_points():
+    # e_p(t, s) is the product of (1 + mu*p) over the right scattered values in [s, t), starting with s itself.
+    ts = tsc.timescale([0, 1, 2, [3, 4]])
+    p = lambda t: 0.5
+
+    assert ts.dexp_p(p, 2, 0) == pytest.approx(1.5 ** 2)
+    assert ts.dexp_p(p, 4, 0) == pytest.approx(1.5 ** 3 * np.exp(0.5))
+    assert ts.dexp_p(p, 0, 2) == pytest.approx(1 / 1.5 ** 2)
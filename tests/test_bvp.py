@@ -0,0 +1,109 @@
+#
+# Boundary value problems on interval, discrete and mixed timescales (solve_bvp and solve_linear_bvp).
+#
+# x^DeltaDelta + x = 0 is written as the system y = [x, x^Delta], y^Delta = [y[1], -y[0]].
+#
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+def oscillator(y, t):
+    return np.array([y[1], -y[0]])
+
+def dirichlet(left, right):
+    return lambda y_a, y_b: [y_a[0] - left, y_b[0] - right]
+
+def test_solve_bvp_interval():
+    ts = tsc.timescale([[0, 1]])
+    solution = ts.solve_bvp(oscillator, dirichlet(0, 1), 0, 1, guess=[0, 1])
+
+    assert solution.success
+    assert solution(0.5)[0] == pytest.approx(np.sin(0.5) / np.sin(1), abs=1e-7)
+    assert solution(1)[0] == pytest.approx(1, abs=1e-9)
+
+def test_solve_bvp_discrete():
+    ts = tsc.timescale(list(range(6)))
+    solution = ts.solve_bvp(oscillator, dirichlet(0, 1), 0, 5, guess=[0, 0], nodes=2)
+
+    # y(t + 1) = M y(t) on the integers.
+    M = np.array([[1.0, 1.0], [-1.0, 1.0]])
+    y_0 = np.array([0.0, 1.0 / np.linalg.matrix_power(M, 5)[0, 1]])
+
+    assert solution.success
+
+    for t in range(6):
+        assert solution(t) == pytest.approx(np.linalg.matrix_power(M, t) @ y_0, abs=1e-9)
+
+def test_solve_bvp_mixed_warm_start():
+    ts = tsc.timescale([[0, 1], 2, [3, 4]])
+    solution = ts.solve_bvp(oscillator, dirichlet(0, 1), 0, 4, guess=[0, 1], nodes=3)
+
+    assert solution.success
+    assert solution(0)[0] == pytest.approx(0, abs=1e-9)
+    assert solution(4)[0] == pytest.approx(1, abs=1e-9)
+
+    # x^Delta is continuous across the jump from 1 to 2: x(2) = x(1) + mu(1)*x^Delta(1).
+    assert solution(2)[0] == pytest.approx(solution(1)[0] + solution(1)[1], abs=1e-7)
+
+    again = ts.solve_bvp(oscillator, dirichlet(0, 1), 0, 4, nodes=3, warm_start=solution)
+
+    assert again.iterations <= 1
+    assert again(3.5) == pytest.approx(solution(3.5), abs=1e-9)
+
+def test_solve_linear_bvp_interval():
+    ts = tsc.timescale([[0, 1]])
+    t, x = ts.solve_linear_bvp(0, 1, 0, [1, 0, 0], [1, 0, 1], stepSize=0.01)
+
+    assert x == pytest.approx(np.sin(t) / np.sin(1), abs=1e-5)
+
+def test_solve_linear_bvp_discrete():
+    ts = tsc.timescale(list(range(8)))
+    B = lambda t: 0.1 * t
+    F = lambda t: 1.0
+    t, x = ts.solve_linear_bvp(0, B, F, [1, 0, 1], [1, 0, 2])
+
+    # x(t + 2) - 2*x(t + 1) + (1 + B(t))*x(t) = F(t) on the integers, as a dense linear system.
+    n = len(t)
+    M = np.zeros((n, n))
+    rhs = np.zeros(n)
+    M[0, 0] = 1
+    rhs[0] = 1
+    M[-1, -1] = 1
+    rhs[-1] = 2
+
+    for j in range(n - 2):
+        M[j + 1, j:j + 3] = [1 + B(j), -2, 1]
+        rhs[j + 1] = F(j)
+
+    assert x == pytest.approx(np.linalg.solve(M, rhs), abs=1e-10)
+
+def test_solve_linear_bvp_mixed_matches_shooting():
+    ts = tsc.timescale([[0, 1], 2, [3, 4]])
+    t, x = ts.solve_linear_bvp(0, 1, 0, [1, 0, 0], [1, 0, 1], stepSize=0.005)
+    solution = ts.solve_bvp(oscillator, dirichlet(0, 1), 0, 4, guess=[0, 1], nodes=3)
+
+    assert x == pytest.approx([solution(value)[0] for value in t], abs=1e-3)
+
+def test_solve_linear_bvp_calls_functions_point_by_point():
+    ts = tsc.timescale([[0, 1]])
+    calls = []
+
+    def B(t):
+        calls.append(t)
+        return 1.0
+
+    t, x = ts.solve_linear_bvp(0, B, 0, [1, 0, 0], [1, 0, 1], stepSize=0.1)
+
+    assert len(calls) == len(t)
+    assert all(np.ndim(value) == 0 for value in calls)
+
+def test_solve_linear_bvp_vectorized():
+    ts = tsc.timescale([[0, 1], 2, [3, 4]])
+    expected = ts.solve_linear_bvp(0, lambda t: 1 + t, 0, [1, 0, 0], [1, 0, 1], stepSize=0.05)[1]
+
+    assert ts.solve_linear_bvp(0, lambda t: 1 + t, 0, [1, 0, 0], [1, 0, 1], stepSize=0.05, vectorized=True)[1] == pytest.approx(expected, abs=1e-12)
+
+    # A function that ignores its array argument does not return one value per grid point.
+    with pytest.raises(Exception, match="one value for every grid point"):
+        ts.solve_linear_bvp(0, lambda t: 1.0, 0, [1, 0, 0], [1, 0, 1], stepSize=0.05, vectorized=True)
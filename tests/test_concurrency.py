@@ -0,0 +1,33 @@
+#
+# Using one timescale from several threads at the same time (see benchmarks/concurrency.py for the full check).
+#
+import concurrent.futures
+import threading
+
+import mpmath
+import pytest
+
+import timescalecalculus as tsc
+
+def test_quadratures_in_threads():
+    ts = tsc.timescale([0, 0.5, [1, 1.5], 2, [3, 3.25], 4, 5])
+    expected = ts.dexp_p(lambda t: 0.1, 5, 0)
+    barrier = threading.Barrier(8)
+
+    def work():
+        barrier.wait()
+
+        return [ts.dexp_p(lambda t: 0.1, 5, 0) for _ in range(3)]
+
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        results = [future.result() for future in [pool.submit(work) for _ in range(8)]]
+
+    assert all(value == pytest.approx(expected) for values in results for value in values)
+
+def test_threads_use_the_precision_of_mpmath_mp():
+    assert tsc._mpmath_context() is mpmath.mp
+
+    with concurrent.futures.ThreadPoolExecutor(1) as pool:
+        context = pool.submit(tsc._mpmath_context).result()
+
+    assert context is not mpmath.mp and context.prec == mpmath.mp.prec
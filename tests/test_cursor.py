@@ -0,0 +1,72 @@
+#
+# Walking a timescale with timescale_cursor (timescale.cursor).
+#
+import pytest
+
+import timescalecalculus as tsc
+
+@pytest.fixture
+def ts():
+    return tsc.timescale([0, 1, [2, 3], 5])
+
+def test_forward_across_points_and_intervals(ts):
+    walk = [(c.t, c.kind, c.mu, c.nu, c.sigma, c.interval) for c in ts.cursor()]
+
+    assert walk == [(0, "point", 1, 0, 1, None),
+                    (1, "point", 1, 1, 2, None),
+                    (2, "start", 0, 1, 2, [2, 3]),
+                    (3, "end", 2, 0, 5, [2, 3]),
+                    (5, "point", 0, 2, 5, None)]
+
+    for t, kind, mu, nu, sigma, interval in walk:
+        assert mu == ts.mu(t) and nu == ts.nu(t) and sigma == ts.sigma(t)
+
+def test_inside_an_interval(ts):
+    cursor = ts.cursor(2.5)
+
+    assert (cursor.kind, cursor.mu, cursor.nu, cursor.sigma, cursor.interval) == ("inside", 0, 0, 2.5, [2, 3])
+    assert cursor.index == ts.cursor(2).index
+
+    assert cursor.forward() == 3 and cursor.kind == "end"
+    assert cursor.backward() == 2 and cursor.kind == "start"
+
+    # Moving backward from inside of an interval goes to its start.
+    assert ts.cursor(2.5).backward() == 2
+
+def test_backward_to_the_start(ts):
+    cursor = ts.cursor(5)
+    walk = [cursor.t]
+
+    while cursor.has_previous():
+        walk.append(cursor.backward())
+
+    assert walk == [5, 3, 2, 1, 0]
+
+def test_both_ends(ts):
+    first = ts.cursor()
+
+    assert not first.has_previous() and first.has_next()
+
+    with pytest.raises(Exception, match="already at the start"):
+        first.backward()
+
+    last = ts.cursor(5)
+
+    assert not last.has_next() and last.has_previous()
+
+    with pytest.raises(Exception, match="already at the end"):
+        last.forward()
+
+    # A timescale that ends with an interval: its end is the last position.
+    ending = tsc.timescale([0, [1, 2]]).cursor(1.5)
+
+    assert ending.forward() == 2 and not ending.has_next() and ending.mu == 0
+
+def test_seek(ts):
+    cursor = ts.cursor()
+
+    assert cursor.seek(3).kind == "end" and cursor.seek(1).index == 1
+
+    for t in [-1, 0.5, 4, 6]:
+        with pytest.raises(Exception, match="is not a value in the timescale"):
+            cursor.seek(t)
@@ -0,0 +1,45 @@
+#
+# The native delay differential equation solver (solve_dde_for_t_native) on y'(t) = -y(t - 1) with y(t) = 1 for t <= 0,
+# whose solution is 1 - t on [0, 1], 1 - t + (t - 1)^2/2 on [1, 2] and 1 - t + (t - 1)^2/2 - (t - 2)^3/6 on [2, 3] (method of steps).
+#
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+def exact(t):
+    y = 1 - t
+
+    if t > 1:
+        y = y + (t - 1) ** 2 / 2
+
+    if t > 2:
+        y = y - (t - 2) ** 3 / 6
+
+    return y
+
+def test_constant_delay_on_an_interval():
+    ts = tsc.timescale([[-1, 3]])
+
+    def y_prime(t, y_values):
+        return -y_values[t - 1]
+
+    t, y = ts.solve_dde_for_t_native(lambda t: 1.0, 0, 3, y_prime, stepSize=0.01, return_all_results=True)
+
+    assert t[0] == 0 and t[-1] == 3
+    assert np.ravel(y) == pytest.approx([exact(value) for value in t], abs=1e-8)
+
+    # Values between the steps come from the Hermite interpolation of the history.
+    assert ts.solve_dde_for_t_native(lambda t: 1.0, 0, 2.5, y_prime, stepSize=0.1) == pytest.approx(exact(2.5), abs=1e-6)
+
+def test_constant_delay_on_the_integers():
+    # y(t + 1) = y(t) - y(t - 1) with y(-1) = y(0) = 1 repeats with period 6: 1, 1, 0, -1, -1, 0, 1, ...
+    ts = tsc.timescale(list(range(-1, 13)))
+
+    def y_prime(t, y_values):
+        return -y_values[t - 1]
+
+    t, y = ts.solve_dde_for_t_native({-1: 1.0, 0: 1.0}, 0, 12, y_prime, return_all_results=True)
+
+    assert list(t) == list(range(13))
+    assert np.ravel(y) == pytest.approx([[1, 1, 0, -1, -1, 0][(k + 1) % 6] for k in range(13)])
@@ -0,0 +1,35 @@
+#
+# Headless export of sampled functions (export).
+#
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+def step(t):
+    return 1.0 if t < 2 else 2.0
+
+@pytest.mark.parametrize("chunk_size", [2, 100])
+def test_export_samples_point_by_point(tmp_path, chunk_size):
+    ts = tsc.timescale([0, 1, [2, 3], 4])
+    path = tmp_path / "samples.npy"
+
+    assert ts.export(step, path, stepSize=0.5, chunk_size=chunk_size) == 5
+
+    samples = np.load(path)
+
+    assert list(samples["t"]) == [0, 1, 2, 2.5, 4]
+    assert list(samples["value"]) == [1, 1, 2, 2, 2]
+    assert list(samples["interval"]) == [-1, -1, 0, 0, -1]
+
+def test_export_vectorized(tmp_path):
+    ts = tsc.timescale([0, 1, [2, 3], 4])
+    path = tmp_path / "samples.npy"
+
+    ts.export(np.exp, path, stepSize=0.5, chunk_size=2, vectorized=True)
+    samples = np.load(path)
+
+    assert np.allclose(samples["value"], np.exp(samples["t"]))
+
+    with pytest.raises(Exception, match="one value for every grid point"):
+        ts.export(lambda t: 1.0, tmp_path / "constant.npy", vectorized=True)
@@ -0,0 +1,81 @@
+#
+# Incremental construction (insert, append_point, append_interval) and the invalidation of the memoized values of g_k and h_k.
+#
+import pytest
+
+import timescalecalculus as tsc
+
+def test_insert_into_unsorted_list():
+    ts = tsc.timescale([5, 1, 4])
+
+    assert ts.ts == [1, 4, 5]
+
+    ts.insert(3)
+    ts.insert([6, 7])
+    ts.insert(0)
+
+    assert ts.ts == [0, 1, 3, 4, 5, [6, 7]]
+    assert ts.sigma(1) == 3 and ts.sigma(5) == 6
+
+def test_assigned_list_is_sorted():
+    ts = tsc.timescale([0, 1])
+    ts.ts = [[4, 5], 2, 3]
+
+    assert ts.ts == [2, 3, [4, 5]]
+    assert ts.sigma(3) == 4
+
+    ts.insert(2.5)
+
+    assert ts.ts == [2, 2.5, 3, [4, 5]]
+
+def test_insert_rejects_overlaps():
+    ts = tsc.timescale([0, [1, 2], 3])
+
+    for item in [0, 1.5, 2, [2.5, 3], [0.5, 1]]:
+        with pytest.raises(Exception, match="overlaps"):
+            ts.insert(item)
+
+    with pytest.raises(Exception, match="not greater"):
+        ts.append_point(3)
+
+def test_insert_invalidates_only_overlapping_memo_entries():
+    ts = tsc.timescale([0, 1, 2, 3, 5, 6])
+
+    for t, s in [(6, 0), (3, 0), (6, 5)]:
+        ts.g_k(2, t, s)
+        ts.h_k(2, t, s)
+
+    # 4 falls into the gap (3, 5), so only the values whose range of integration contains that gap change.
+    ts.insert(4)
+
+    for memo in (ts.memo_g_k, ts.memo_h_k):
+        assert (2, 6, 0) not in memo
+        assert (2, 3, 0) in memo and (2, 6, 5) in memo
+
+    fresh = tsc.timescale([0, 1, 2, 3, 4, 5, 6])
+
+    for t, s in [(6, 0), (3, 0), (6, 5), (5, 2)]:
+        assert ts.g_k(2, t, s) == pytest.approx(fresh.g_k(2, t, s))
+        assert ts.h_k(2, t, s) == pytest.approx(fresh.h_k(2, t, s))
+
+def test_insert_clears_transition_tables():
+    ts = tsc.timescale([0, 1, 2])
+    ts.dexp_A([[1.0]], 2, 0)
+
+    ts.append_point(3)
+
+    assert len(ts.memo_dexp_A) == 0
+    assert ts.dexp_A([[1.0]], 3, 0)[0, 0] == pytest.approx(8)
+
+def test_assigning_ts_removes_memoized_values(tmp_path):
+    ts = tsc.timescale([0, 1, 2, 3])
+    ts.persist(tsc.persistent_cache(tmp_path / "tables.sqlite"))
+
+    assert ts.dexp_A([[0.5]], 3, 0)[0, 0] == pytest.approx(1.5 ** 3)
+    assert ts.g_k(2, 3, 0) == pytest.approx(tsc.timescale([0, 1, 2, 3]).g_k(2, 3, 0))
+
+    ts.ts = [0, 2, 4, 6]
+
+    assert len(ts.memo_g_k) == len(ts.memo_h_k) == len(ts.memo_dexp_A) == 0
+    assert ts.dexp_A([[0.5]], 6, 0)[0, 0] == pytest.approx(2.0 ** 3)
+    assert ts.g_k(2, 6, 0) == pytest.approx(tsc.timescale([0, 2, 4, 6]).g_k(2, 6, 0))
@@ -0,0 +1,60 @@
+#
+# Instrumentation of timescales (timescale.instrument, instrumentation).
+#
+import threading
+
+import pytest
+
+import timescalecalculus as tsc
+
+def test_counters_are_exact_with_threads():
+    ts = tsc.timescale(list(range(20)))
+
+    def lookups():
+        for _ in range(2000):
+            ts.sigma(3)
+            ts.mu(3)
+
+    with ts.instrument(timing=True) as report:
+        threads = [threading.Thread(target=lookups) for _ in range(8)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+    assert report.counters["index.sigma"] == report.counters["index.mu"] == 8 * 2000
+
+def test_integrand_evaluations():
+    ts = tsc.timescale([0, 1, 2, 3])
+
+    with ts.instrument() as report:
+        assert ts.dintegral(lambda t: t, 3, 0) == 3
+
+    assert report.counters["integrand.evaluations"] == 3
+    assert report.counters["dintegral.calls"] == 1
+
+def test_compiled_integrands_stay_compiled():
+    numba = pytest.importorskip("numba")
+
+    f = numba.njit(lambda t: 2 * t)
+    ts = tsc.timescale([0, 1, 2, [3, 4]])
+
+    with ts.instrument() as report:
+        assert report.counted(f, "integrand.evaluations") is f
+        assert ts.dintegral(f, 4, 0) == pytest.approx(6 + 7)
+
+    # The 3 right scattered points in the compiled loop and the nodes of the quadrature on [3, 4].
+    assert report.counters["integrand.evaluations"] > 3
+    assert report.counters["quadrature.nodes"] > 0
+
+@pytest.mark.parametrize("f, calls", [(lambda t: t * t, 1), (lambda t: complex(t, 1), 2)], ids=["real", "complex"])
+def test_quadrature_nodes_are_counted_once(f, calls):
+    ts = tsc.timescale([[0, 1]])
+
+    with ts.instrument() as report:
+        ts.dintegral(f, 1, 0)
+
+    assert report.counters["quadrature.calls"] == calls
+    assert report.counters["quadrature.nodes"] == report.counters["integrand.evaluations"] > 0
@@ -0,0 +1,43 @@
+#
+# The cache of compiled JiTCDDE modules (see timescale.initializeJiTCDDE()). Needs jitcdde and a C compiler.
+#
+import os
+import shutil
+
+import pytest
+
+import timescalecalculus as tsc
+
+jitcdde = pytest.importorskip("jitcdde")
+
+pytestmark = pytest.mark.skipif(shutil.which("cc") is None and shutil.which("gcc") is None, reason="no C compiler")
+
+def solve(DDE):
+    # y'(t) = -y(t - 1) with y(t) = 1 for t <= 0 has y(1.5) = 1 - 1.5 + 0.5^2/2.
+    DDE.constant_past([1.0])
+    DDE.step_on_discontinuities()
+
+    return DDE.integrate(1.5)[0]
+
+def test_compiled_module_is_cached(tmp_path, monkeypatch):
+    monkeypatch.setenv("TIMESCALECALCULUS_CACHE", str(tmp_path))
+
+    ts = tsc.timescale([[0, 2]])
+    equations = [-jitcdde.y(0, jitcdde.t - 1)]
+
+    first = ts._cached_JiTCDDE(jitcdde, equations, 1.0, {"verbose": False})
+    modules = os.listdir(tmp_path / "jitcdde")
+
+    assert len(modules) == 1 and modules[0].startswith("jitcdde_")
+
+    second = ts._cached_JiTCDDE(jitcdde, equations, 1.0, {"verbose": False})
+
+    assert os.listdir(tmp_path / "jitcdde") == modules
+    assert os.path.samefile(second.jitced.__file__, tmp_path / "jitcdde" / modules[0])
+    assert solve(first) == pytest.approx(-0.375, abs=1e-4)
+    assert solve(second) == pytest.approx(-0.375, abs=1e-4)
+
+    # Other compile options are another module.
+    ts._cached_JiTCDDE(jitcdde, equations, 1.0, {"verbose": False, "chunk_size": 50})
+
+    assert len(os.listdir(tmp_path / "jitcdde")) == 2
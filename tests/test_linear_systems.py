@@ -0,0 +1,88 @@
+#
+# Linear systems y^Delta = A(t)*y: solve_linear_system_for_t and dexp_A.
+#
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+# Scalar formula that numpy broadcasts to a (2, 2, k) array when it is called with k values of t.
+def rotation(t):
+    return np.array([[np.cos(t), np.sin(t)], [-np.sin(t), np.cos(t)]])
+
+# The same coefficient in the (k, 2, 2) layout that vectorized=True expects.
+def rotation_stacked(t):
+    return np.moveaxis(rotation(t), -1, 0) if np.ndim(t) else rotation(t)
+
+def run_product(A, times):
+    Phi = np.eye(2)
+
+    for t in times:
+        Phi = (np.eye(2) + A(t)) @ Phi
+
+    return Phi
+
+@pytest.mark.parametrize("points", [3, 4])
+def test_run_with_as_many_points_as_dimensions(points):
+    # ts [0, 1, 2] has a run of k = 2 = d steps, which made a (d, d, k) result look like a (k, d, d) one.
+    ts = tsc.timescale(list(range(points)))
+    expected = run_product(rotation, range(points - 1))
+
+    y, Phi = ts.solve_linear_system_for_t(rotation, np.eye(2), 0, points - 1, return_transition=True)
+
+    assert Phi == pytest.approx(expected, abs=1e-12)
+    assert ts.dexp_A(rotation, points - 1, 0) == pytest.approx(expected, abs=1e-12)
+
+def test_vectorized_layout_is_checked():
+    ts = tsc.timescale([0, 1, 2])
+    expected = run_product(rotation, [0, 1])
+
+    assert ts.solve_linear_system_for_t(rotation_stacked, np.eye(2), 0, 2, vectorized=True) == pytest.approx(expected, abs=1e-12)
+    assert ts.dexp_A(rotation_stacked, 2, 0, vectorized=True) == pytest.approx(expected, abs=1e-12)
+
+    with pytest.raises(Exception, match="vectorized"):
+        ts.solve_linear_system_for_t(rotation, np.eye(2), 0, 2, vectorized=True)
+
+    with pytest.raises(Exception, match="vectorized"):
+        tsc.timescale([0, 1, 2]).dexp_A(rotation, 2, 0, vectorized=True)
+
+def test_dexp_A_matches_solver_on_mixed_timescale():
+    ts = tsc.timescale([0, 0.5, [1, 2], 3, [4, 4.5]])
+
+    for t, s in [(4.5, 0), (3, 0.5), (1.5, 0), (4.2, 1.2)]:
+        Phi = ts.solve_linear_system_for_t(rotation, np.eye(2), s, t)
+
+        assert ts.dexp_A(rotation, t, s) == pytest.approx(Phi, abs=1e-8)
+
+    assert ts.dexp_A(rotation, 0, 4.5) == pytest.approx(np.linalg.inv(ts.dexp_A(rotation, 4.5, 0)), abs=1e-8)
+
+def test_transition_tables_of_functions_need_a_key():
+    ts = tsc.timescale([0, 1, 2, 3])
+    rate = [0.5]
+    A = lambda t: np.array([[rate[0]]])
+
+    assert ts.dexp_A(A, 3, 0)[0, 0] == pytest.approx(1.5 ** 3)
+    assert len(ts.memo_dexp_A) == 0
+
+    # Without a key a changed closure is not given the table of the old one.
+    rate[0] = 1.0
+
+    assert ts.dexp_A(A, 3, 0)[0, 0] == pytest.approx(8)
+
+    # With a key that includes the parameter the table is reused, and a new parameter gets a new table.
+    assert ts.dexp_A(A, 3, 0, key=("rate", rate[0]))[0, 0] == pytest.approx(8)
+    assert ts.dexp_A(A, 2, 1, key=("rate", rate[0]))[0, 0] == pytest.approx(2)
+
+    rate[0] = 0.5
+
+    assert ts.dexp_A(A, 3, 0, key=("rate", rate[0]))[0, 0] == pytest.approx(1.5 ** 3)
+    assert len(ts.memo_dexp_A) == 2
+
+def test_number_of_transition_tables_is_bounded():
+    ts = tsc.timescale([0, 1, 2])
+
+    for n in range(tsc._TRANSITION_TABLE_LIMIT + 5):
+        assert ts.dexp_A([[n]], 2, 0)[0, 0] == pytest.approx((1 + n) ** 2)
+
+    assert len(ts.memo_dexp_A) == tsc._TRANSITION_TABLE_LIMIT
+    assert ("constant", (1, 1), np.array([[0.0]]).tobytes()) not in ts.memo_dexp_A
@@ -0,0 +1,41 @@
+#
+# The compiled loops over right scattered points (_euler_kernel, _euler_system_kernel, _weighted_sum_kernel) against the Python path.
+#
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+numba = pytest.importorskip("numba")
+
+# Runs of fewer than 16 points are not given to the compiled kernels, so the timescale starts with a run of 40 points.
+TIMESCALE = [0.05 * k for k in range(40)] + [[2.5, 3], 3.5, 4]
+
+def decay(t, y):
+    return -0.5 * y + t
+
+def oscillator(y, t):
+    return np.array([y[1], -y[0]])
+
+def integrand(t):
+    return t * t - 2 * t
+
+def test_solve_ode_for_t():
+    ts = tsc.timescale(TIMESCALE)
+    expected = np.asarray(ts.solve_ode_for_t(1.0, 0, 4, decay)).item()
+
+    assert np.asarray(ts.solve_ode_for_t(1.0, 0, 4, tsc.njit(decay))).item() == pytest.approx(expected, rel=1e-9)
+    assert tsc._euler_kernel in tsc._jit_kernels
+
+def test_solve_ode_system_for_t():
+    ts = tsc.timescale(TIMESCALE)
+    expected = ts.solve_ode_system_for_t([1.0, 0.0], 0, 4, oscillator)
+
+    assert ts.solve_ode_system_for_t([1.0, 0.0], 0, 4, tsc.njit(oscillator)) == pytest.approx(expected, rel=1e-9)
+    assert tsc._euler_system_kernel in tsc._jit_kernels
+
+def test_dintegral():
+    ts = tsc.timescale(TIMESCALE)
+
+    assert ts.dintegral(tsc.njit(integrand), 4, 0) == pytest.approx(ts.dintegral(integrand, 4, 0), rel=1e-12)
+    assert tsc._weighted_sum_kernel in tsc._jit_kernels
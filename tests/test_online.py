@@ -0,0 +1,66 @@
+#
+# Online delta integrals (sliding_dintegral and exponential_dintegral).
+#
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+def identity(t):
+    return t
+
+def test_sliding_window_on_points():
+    ts = tsc.timescale(list(range(10)))
+    window = tsc.sliding_dintegral(ts, 3)
+
+    for t in range(10):
+        value = window.update(t, identity(t))
+
+        assert value == pytest.approx(sum(range(max(0, t - 3), t)))
+
+def test_window_boundary_inside_an_interval():
+    # The lower limit t - window = 3.5 lies inside of the sampling step [3, 4] of the interval [0, 10].
+    ts = tsc.timescale([[0, 10]])
+    window = tsc.sliding_dintegral(ts, 2.5)
+
+    for t in np.arange(0, 7.0):
+        value = window.update(t, identity(t))
+
+    # f is linear, so the trapezoidal rule is exact: the integral of t from 3.5 to 6.
+    assert value == pytest.approx((6 ** 2 - 3.5 ** 2) / 2)
+
+    # A window shorter than one sampling step.
+    short = tsc.sliding_dintegral(ts, 0.25)
+
+    for t in [0, 1, 2]:
+        value = short.update(t, identity(t))
+
+    assert value == pytest.approx((2 ** 2 - 1.75 ** 2) / 2)
+
+def test_window_on_mixed_timescale_matches_dintegral():
+    ts = tsc.timescale([0, 1, 2, [3, 5], 6, 7])
+    samples = [0, 1, 2, 3, 3.5, 4, 4.5, 5, 6, 7]
+    window = tsc.sliding_dintegral(ts, 4)
+    f = lambda t: t * t
+
+    for t in samples:
+        value = window.update(t, f(t))
+
+        if t - 4 in (0, 1, 2, 3):
+            # Only the trapezoidal rule on [3, 5] differs from the exact integral.
+            assert value == pytest.approx(ts.dintegral(f, t, t - 4), abs=0.1)
+
+    # t - window = 3: the interval [3, 5] contributes completely, then mu*f on 5 and 6.
+    assert value == pytest.approx(sum((b - a) * (f(a) + f(b)) / 2 for a, b in zip([3, 3.5, 4, 4.5], [3.5, 4, 4.5, 5])) + f(5) + f(6))
+
+def test_exponential_dintegral_on_points():
+    ts = tsc.timescale(list(range(6)))
+    online = tsc.exponential_dintegral(ts, -0.5)
+    y = 0
+
+    for t in range(6):
+        value = online.update(t, 1.0)
+
+        assert value == pytest.approx(y)
+
+        y = 0.5 * y + 1.0
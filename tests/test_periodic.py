@@ -0,0 +1,82 @@
+#
+# periodic_timescale against the regular timescale of the same periods (materialize()).
+#
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+PATTERN = [0, [0.5, 1], 1.5]
+PERIOD = 2
+
+@pytest.fixture
+def periodic():
+    return tsc.periodic_timescale(PATTERN, PERIOD)
+
+@pytest.fixture
+def materialized(periodic):
+    return periodic.materialize(0, 4)
+
+def values(first_period, last_period):
+    return [x + k * PERIOD for k in range(first_period, last_period + 1) for x in [0, 0.5, 0.75, 1, 1.5]]
+
+def test_point_queries(periodic, materialized):
+    # The last value of the materialized timescale has no successor there, so the last period is left out.
+    for t in values(0, 3):
+        assert periodic.isInTimescale(t) == materialized.isInTimescale(t)
+        assert periodic.sigma(t) == pytest.approx(materialized.sigma(t))
+        assert periodic.mu(t) == pytest.approx(materialized.mu(t))
+
+    for t in [0.25, 1.25, 3.9]:
+        assert not periodic.isInTimescale(t)
+        assert not materialized.isInTimescale(t)
+
+def test_negative_periods(periodic):
+    assert periodic.isInTimescale(-2 + 0.75)
+    assert periodic.sigma(-2 + 1.5) == pytest.approx(0)
+    assert periodic.mu(-2) == pytest.approx(0.5)
+
+@pytest.mark.parametrize("A", [np.array([[0.0, 1.0], [-1.0, -0.1]]), lambda t: np.array([[0.0, 1.0], [-1.0, -0.1 * np.cos(np.pi * t)]])], ids=["constant", "periodic"])
+def test_dexp_A_parity(periodic, materialized, A):
+    for t, s in [(9.5, 0), (8, 0.5), (7.5, 1.5), (1, 0.75)]:
+        assert periodic.dexp_A(A, t, s) == pytest.approx(materialized.dexp_A(A, t, s), rel=1e-6, abs=1e-8)
+
+    y = periodic.solve_linear_system_for_t(A, [1.0, 0.0], 0, 9.5)
+
+    assert y == pytest.approx(materialized.solve_linear_system_for_t(A, np.array([1.0, 0.0]), 0, 9.5), rel=1e-6, abs=1e-8)
+
+def test_monodromy_is_one_period(periodic, materialized):
+    A = np.array([[0.0, 1.0], [-1.0, 0.0]])
+
+    assert periodic.monodromy(A) == pytest.approx(materialized.dexp_A(A, 2, 0), abs=1e-10)
+
+def test_monodromy_of_functions_is_cached_by_key(periodic, materialized):
+    A = lambda t: np.array([[0.0, 1.0], [-1.0, -0.1 * np.cos(np.pi * t)]])
+
+    periodic.dexp_A(A, 9.5, 0)
+
+    assert periodic.memo_monodromy == {}
+
+    assert periodic.dexp_A(A, 9.5, 0, key="damped") == pytest.approx(materialized.dexp_A(A, 9.5, 0), rel=1e-6, abs=1e-8)
+    assert list(periodic.memo_monodromy) == [("function", "damped")]
+
+def test_values_far_from_zero():
+    ts = tsc.periodic_timescale([0, 0.5], 1)
+
+    assert ts.isInTimescale(1e9 + 0.5) and ts.sigma(1e9) == 1e9 + 0.5
+    assert not ts.isInTimescale(1e9 + 0.3)
+    assert ts._reduce(1e9 + 0.3) == [1e9, pytest.approx(0.3, abs=1e-6)]
+
+    # Rounding of a period that is not a binary fraction is still absorbed.
+    hundredths = tsc.periodic_timescale([0], 0.01)
+
+    assert hundredths.isInTimescale(123456 * 0.01) and not hundredths.isInTimescale(123456 * 0.01 + 0.003)
+
+def test_unsorted_pattern():
+    ts = tsc.periodic_timescale([[0.5, 0.75], 0.25, 0], 1)
+
+    assert ts.pattern == [0, 0.25, [0.5, 0.75]]
+    assert ts.sigma(0) == 0.25 and ts.sigma(0.75) == 1 and ts.mu(0.6) == 0
+
+    with pytest.raises(Exception, match="must lie in"):
+        tsc.periodic_timescale([[0.5, 1.5], 0], 1)
@@ -0,0 +1,97 @@
+#
+# Persistent cache of g_k, h_k and dexp_A (persistent_cache, timescale.persist).
+#
+import sqlite3
+import time
+
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+def used(cache, key):
+    with sqlite3.connect(cache.path) as connection:
+        return connection.execute("SELECT used FROM entries WHERE key = ?", (key,)).fetchone()[0]
+
+def test_get_and_put(tmp_path):
+    cache = tsc.persistent_cache(tmp_path / "tables.sqlite")
+
+    assert cache.get("a") is tsc._MISSING
+
+    cache.put("a", np.arange(3.0))
+
+    assert np.array_equal(cache.get("a"), np.arange(3.0))
+    assert cache.entries() == 1 and cache.size() > 0
+
+def test_hits_update_the_time_of_use_at_most_once_per_resolution(tmp_path):
+    cache = tsc.persistent_cache(tmp_path / "tables.sqlite")
+    cache.put("a", 1)
+
+    connection = cache._connection()
+    changes = connection.total_changes
+
+    for _ in range(100):
+        assert cache.get("a") == 1
+
+    # Recent entries are only read.
+    assert connection.total_changes == changes
+
+    connection.execute("UPDATE entries SET used = ? WHERE key = 'a'", (time.time() - 2 * cache._USED_RESOLUTION,))
+    changes = connection.total_changes
+
+    assert cache.get("a") == 1
+    assert cache.get("a") == 1
+
+    assert connection.total_changes == changes + 1
+    assert used(cache, "a") > time.time() - cache._USED_RESOLUTION
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = tsc.persistent_cache(tmp_path / "tables.sqlite", max_bytes=3000)
+    connection = cache._connection()
+
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, bytes(800))
+        connection.execute("UPDATE entries SET used = ? WHERE key = ?", (time.time() - 1000 + i, key))
+
+    # "a" is used, so "b" is the least recently used entry when "d" exceeds the limit.
+    cache.get("a")
+    cache.put("d", bytes(800))
+
+    assert cache.get("b") is tsc._MISSING
+    assert cache.get("a") is not tsc._MISSING and cache.get("d") is not tsc._MISSING
+    assert cache.size() <= 3000
+
+def test_persisted_g_k(tmp_path):
+    cache = tsc.persistent_cache(tmp_path / "tables.sqlite")
+
+    ts = tsc.timescale([0, 1, 2, 3])
+    ts.persist(cache)
+    value = ts.g_k(2, 3, 0)
+
+    other = tsc.timescale([0, 1, 2, 3])
+    other.persist(cache)
+
+    with other.instrument() as report:
+        assert other.g_k(2, 3, 0) == value
+
+    assert report.counters["persistent_cache.hits"] == 1
+
+def test_only_the_requested_value_is_stored(tmp_path):
+    cache = tsc.persistent_cache(tmp_path / "tables.sqlite")
+
+    ts = tsc.timescale([0, [1, 2], 3])
+    ts.persist(cache)
+    value = ts.g_k(2, 3, 0)
+
+    assert cache.entries() == 1
+
+    # ints, floats and numpy floats of the same value share the key.
+    other = tsc.timescale([0, [1, 2], 3])
+    other.persist(cache)
+
+    with other.instrument() as report:
+        assert other.g_k(2, 3.0, np.float64(0)) == value
+        assert other.h_k(1, 3, 0) == 3
+
+    assert report.counters["persistent_cache.hits"] == 1 and report.counters["persistent_cache.misses"] == 1
+    assert cache.entries() == 2
@@ -0,0 +1,37 @@
+#
+# Sampling of functions for plot() and scatter().
+#
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+def step(t):
+    return 1.0 if t < 2 else 2.0
+
+def test_functions_are_sampled_point_by_point():
+    ts = tsc.timescale([0, 1, [2, 3]])
+    calls = []
+
+    def constant(t):
+        calls.append(t)
+        return 5.0
+
+    xDiscrete, yDiscrete, xInterval, yInterval, intervals = ts._plot_samples(constant, 0.25)
+
+    assert len(calls) == len(xDiscrete) + len(xInterval) == 6
+    assert np.all(yDiscrete == 5.0) and np.all(yInterval == 5.0)
+
+    xDiscrete, yDiscrete, xInterval, yInterval, intervals = ts._plot_samples(step, 0.25)
+
+    assert list(yDiscrete) == [1.0, 1.0] and np.all(yInterval == 2.0)
+
+def test_vectorized_sampling():
+    ts = tsc.timescale([0, 1, [2, 3]])
+
+    xDiscrete, yDiscrete, xInterval, yInterval, intervals = ts._plot_samples(np.sin, 0.25, vectorized=True)
+
+    assert np.allclose(yDiscrete, np.sin(xDiscrete)) and np.allclose(yInterval, np.sin(xInterval))
+
+    with pytest.raises(Exception, match="one value for every grid point"):
+        ts._plot_samples(lambda t: 5.0, 0.25, vectorized=True)
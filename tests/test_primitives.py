@@ -0,0 +1,70 @@
+#
+# sigma, rho, mu and isInTimescale against a direct implementation on the list of items, for small timescales (which search a copy
+# of the index as Python lists), large ones (which search the index arrays), float32 indexes and timescales that were extended.
+#
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+def reference(items, t):
+    values = sorted(x for item in items for x in (item if isinstance(item, list) else [item]))
+    inside = any(item[0] <= t < item[1] for item in items if isinstance(item, list))
+    member = inside or any((t in item) if isinstance(item, list) else t == item for item in items)
+    later = [x for x in values if x > t]
+    earlier = [x for x in values if x < t]
+    ending = any(t == item[1] for item in items if isinstance(item, list))
+    starting = any(t == item[0] for item in items if isinstance(item, list))
+
+    sigma = t if inside or not later else later[0]
+    rho = t if (member and not starting and (ending or any(item[0] < t <= item[1] for item in items if isinstance(item, list)))) or not earlier else earlier[-1]
+
+    return member, sigma, rho, sigma - t
+
+def check(ts, items, queries):
+    for t in queries:
+        member, sigma, rho, mu = reference(items, t)
+
+        assert ts.isInTimescale(t) == member, t
+
+        if member:
+            assert ts.sigma(t) == sigma, t
+            assert ts.rho(t) == rho, t
+            assert ts.mu(t) == mu, t
+
+ITEMS = [0, 0.5, [1, 2], 3, [4, 4.5], 7]
+QUERIES = [0, 0.25, 0.5, 1, 1.5, 2, 2.5, 3, 4, 4.2, 4.5, 7, 8, -1]
+
+def test_small_timescale():
+    check(tsc.timescale(list(ITEMS)), ITEMS, QUERIES)
+    check(tsc.timescale([5]), [5], [5, 4, 6])
+
+def test_unsorted_list():
+    check(tsc.timescale([7, [1, 2], 0.5, 3, 0, [4, 4.5]]), ITEMS, QUERIES)
+
+def test_large_timescale_uses_the_arrays():
+    n = tsc._SCALAR_INDEX_LIMIT
+    starts = np.arange(n) * 2.0
+    ends = np.where(np.arange(n) % 2 == 1, starts + 1, starts)
+    ts = tsc.timescale.from_arrays(starts, ends)
+
+    assert ts.node_count() > tsc._SCALAR_INDEX_LIMIT
+    assert type(ts._scalar_index()[0]) is not list
+
+    # The last items are a point, an interval, a point and an interval; the first of them only serves as the predecessor of the others.
+    items = [[a, b] if a != b else a for a, b in zip(starts[-4:].tolist(), ends[-4:].tolist())]
+    check(ts, items, [items[1][0], items[1][0] + 0.5, items[1][1], items[1][1] + 0.5, items[2], items[3][0], items[3][1], items[3][1] + 1])
+
+def test_float32_index():
+    ts = tsc.timescale.from_arrays([0, 0.5, 1, 3], [0, 0.5, 2, 3], dtype=np.float32)
+
+    check(ts, [0, 0.5, [1, 2], 3], [0, 0.5, 1, 1.5, 2, 3, 2.5])
+
+def test_queries_after_insert():
+    ts = tsc.timescale([0, [1, 2], 3])
+    ts.sigma(0)
+
+    ts.insert(0.5)
+    ts.append_interval(4, 5)
+
+    check(ts, [0, 0.5, [1, 2], 3, [4, 5]], [0, 0.5, 1, 2, 3, 4, 4.5, 5, 2.5])
@@ -0,0 +1,109 @@
+#
+# Round trips of timescales through files (save, open) and pickle (content_hash, ==, hash).
+#
+import copy
+import pickle
+
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_and_open(tmp_path, mmap):
+    ts = tsc.timescale([0, 1, [2, 3.5], 4, [5, 6]], "mixed")
+    ts.metadata["unit"] = "s"
+    path = tmp_path / "mixed.ts"
+
+    ts.save(path, metadata={"source": "test"})
+    opened = tsc.timescale.open(path, mmap=mmap)
+
+    assert isinstance(opened._nodes, np.memmap) == mmap
+    assert opened.name == "mixed"
+    assert opened.metadata == {"unit": "s", "source": "test"}
+    assert opened.ts == ts.ts
+    assert opened == ts and opened.content_hash() == ts.content_hash()
+
+    for t in [0, 1, 2, 2.7, 3.5, 4, 5.5, 6]:
+        assert opened.sigma(t) == ts.sigma(t)
+        assert opened.mu(t) == ts.mu(t)
+
+    assert opened.dintegral(lambda t: t, 6, 0) == pytest.approx(ts.dintegral(lambda t: t, 6, 0))
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_and_open_single_precision(tmp_path, mmap):
+    ts = tsc.timescale.from_arrays([0, 0.1, 1], [0, 0.5, 2], name="single", dtype=np.float32)
+    path = tmp_path / "single.ts"
+
+    ts.save(path)
+    opened = tsc.timescale.open(path, mmap=mmap)
+
+    assert opened._nodes.dtype == np.float32
+    assert opened == ts
+    assert opened != tsc.timescale.from_arrays([0, 0.1, 1], [0, 0.5, 2])
+    assert opened.sigma(np.float32(0)) == np.float32(0.1)
+
+def test_opened_timescale_can_be_extended(tmp_path):
+    path = tmp_path / "points.ts"
+    tsc.timescale([0, 1, 2]).save(path)
+
+    opened = tsc.timescale.open(path)
+    opened.insert(3)
+
+    assert opened.ts == [0, 1, 2, 3]
+    assert tsc.timescale.open(path).ts == [0, 1, 2]
+
+def test_open_rejects_other_files(tmp_path):
+    path = tmp_path / "other.ts"
+    path.write_bytes(b"not a timescale file at all, but long enough")
+
+    with pytest.raises(Exception, match="not a timescale file"):
+        tsc.timescale.open(path)
+
+@pytest.mark.parametrize("copy_timescale", [lambda ts: pickle.loads(pickle.dumps(ts)), copy.deepcopy], ids=["pickle", "deepcopy"])
+def test_pickle_round_trip(tmp_path, copy_timescale):
+    ts = tsc.timescale([0, 1, [2, 3], 5], "pickled")
+    ts.metadata["unit"] = "s"
+    ts.persist(tsc.persistent_cache(tmp_path / "tables.sqlite"))
+    g = ts.g_k(2, 5, 0)
+
+    restored = copy_timescale(ts)
+
+    assert restored == ts and hash(restored) == hash(ts)
+    assert restored.content_hash() == ts.content_hash()
+    assert restored.name == "pickled" and restored.metadata == {"unit": "s"}
+    assert restored.ts == ts.ts
+    assert restored._persistent.path == ts._persistent.path
+
+    # The memo tables are transferred and can still be used by several threads.
+    assert isinstance(restored.memo_g_k, tsc.memo_table)
+    assert restored.memo_g_k == ts.memo_g_k
+    assert restored.g_k(2, 5, 0) == g
+
+    # The copy is independent of the original.
+    restored.insert(7)
+
+    assert ts.ts == [0, 1, [2, 3], 5]
+    assert restored != ts
+
+def test_pickled_memory_mapped_timescale(tmp_path):
+    path = tmp_path / "mapped.ts"
+    tsc.timescale([0, [1, 2], 4]).save(path)
+
+    opened = tsc.timescale.open(path)
+    restored = pickle.loads(pickle.dumps(opened))
+
+    assert not isinstance(restored._nodes, np.memmap)
+    assert restored == opened and restored.sigma(2) == 4
+
+def test_equality_and_hash():
+    a = tsc.timescale([0, 1, [2, 3]])
+    b = tsc.timescale.from_arrays([0, 1, 2], [0, 1, 3], name="other")
+
+    assert a == b and hash(a) == hash(b) and len({a, b}) == 1
+    assert a != tsc.timescale([0, 1, [2, 4]])
+    assert a != tsc.timescale([0, 1, 2, 3])
+    assert a != tsc.timescale.from_arrays([0, 1, 2], [0, 1, 3], dtype=np.float32)
+
+    # -0.0 == 0.0
+    assert tsc.timescale.from_arrays([-0.0, 1], [-0.0, 1]).content_hash() == tsc.timescale([0, 1]).content_hash()
@@ -0,0 +1,51 @@
+#
+# Sharing timescales with worker processes (timescale.share, shared_timescale).
+#
+import multiprocessing
+
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+def _worker(handle, t):
+    ts = handle.attach()
+    table = handle.table("integral")
+
+    return ts.name, ts.sigma(t), ts.mu(t), ts.isInTimescale(t), float(table[-1]), table.flags.writeable
+
+@pytest.mark.parametrize("method", ["fork", "spawn"])
+def test_workers_attach_to_shared_timescale(method):
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip("the start method " + method + " is not available")
+
+    ts = tsc.timescale([0, 1, [2, 3], 5, 8], "shared")
+    t = np.array([0, 1, 2, 2.5, 3, 5, 8])
+    integral = ts.dintegral_array(t, t)
+
+    with ts.share({"integral": integral}) as handle:
+        with multiprocessing.get_context(method).Pool(2) as pool:
+            results = pool.starmap(_worker, [(handle, t) for t in [0, 1, 2.5, 3, 5, 8]])
+
+    for t, (name, sigma, mu, member, total, writeable) in zip([0, 1, 2.5, 3, 5, 8], results):
+        assert name == "shared"
+        assert sigma == ts.sigma(t) and mu == ts.mu(t) and member
+        assert total == pytest.approx(integral[-1])
+        assert not writeable
+
+def test_attached_timescale_in_the_same_process():
+    ts = tsc.timescale([0, [1, 2], 4])
+
+    with ts.share() as handle:
+        attached = handle.attach()
+
+        assert attached == ts and attached.ts == ts.ts
+
+        # Extending copies the index into private memory, the shared index is not changed.
+        attached.insert(6)
+
+        assert attached.ts == [0, [1, 2], 4, 6]
+        assert handle.attach().ts == [0, [1, 2], 4]
+
+        with pytest.raises(Exception, match="there is no shared table"):
+            handle.table("missing")
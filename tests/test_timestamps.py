@@ -0,0 +1,62 @@
+#
+# Timescales from event timestamps (from_timestamps).
+#
+import numpy as np
+import pytest
+
+import timescalecalculus as tsc
+
+TIMESTAMPS = [0, 0.1, 0.2, 5, 10, 10.25, 10.5, 20]
+EXPECTED = [[0, 0.2], 5, [10, 10.5], 20]
+
+@pytest.mark.parametrize("chunk_size", range(1, len(TIMESTAMPS) + 2))
+def test_gap_clustering_across_chunk_boundaries(chunk_size):
+    ts = tsc.from_timestamps(np.array(TIMESTAMPS), 1, chunk_size=chunk_size)
+
+    assert ts.ts == EXPECTED
+
+def test_gap_is_exclusive():
+    # A difference of exactly gap starts a new run; equal timestamps stay in one run and form a point.
+    assert tsc.from_timestamps([0, 1, 1.5, 3, 3, 3], 1).ts == [0, [1, 1.5], 3]
+
+def test_csv(tmp_path):
+    path = tmp_path / "events.csv"
+    path.write_text("id;time\n" + "".join("event" + str(i) + ";" + str(t) + "\n" for i, t in enumerate(TIMESTAMPS)) + "\n")
+
+    ts = tsc.from_timestamps(str(path), 1, chunk_size=3, column=1, delimiter=";", skip_header=1, name="events")
+
+    assert ts.ts == EXPECTED and ts.name == "events"
+
+def test_npy(tmp_path):
+    path = tmp_path / "events.npy"
+    np.save(path, np.array(TIMESTAMPS))
+
+    assert tsc.from_timestamps(str(path), 1, chunk_size=3).ts == EXPECTED
+
+@pytest.mark.parametrize("dtype", ["<f8", "<f4"])
+def test_raw(tmp_path, dtype):
+    path = tmp_path / "events.bin"
+    np.array(TIMESTAMPS, dtype=dtype).tofile(path)
+
+    ts = tsc.from_timestamps(str(path), 1, chunk_size=3, dtype=dtype)
+
+    assert ts == tsc.from_timestamps(np.array(TIMESTAMPS, dtype=dtype), 1)
+    assert len(ts.ts) == len(EXPECTED)
+
+def test_node_dtype():
+    ts = tsc.from_timestamps(TIMESTAMPS, 1, node_dtype=np.float32)
+
+    assert ts._nodes.dtype == np.float32 and ts.isInTimescale(np.float32(10.25))
+
+def test_invalid_input(tmp_path):
+    with pytest.raises(Exception, match="not sorted"):
+        tsc.from_timestamps([0, 2, 1], 1, chunk_size=2)
+
+    with pytest.raises(Exception, match="no timestamps"):
+        tsc.from_timestamps([], 1)
+
+    with pytest.raises(Exception, match="gap must be positive"):
+        tsc.from_timestamps([0, 1], 0)
+
+    with pytest.raises(Exception, match="unknown format"):
+        tsc.from_timestamps(str(tmp_path / "events.csv"), 1, format="xml")
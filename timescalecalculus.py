@@ -1,12 +1,67 @@
 import operator
+import bisect
+import collections
+import functools
+import hashlib
+import importlib
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import struct
+import sys
+import sysconfig
+import tempfile
+import threading
+import time
+import zipfile
 from functools import reduce # Added this because in python 3.* they changed the location of the reduce() method to the functools module
-from scipy import integrate
-from scipy.misc import derivative
 import numpy as np
-import matplotlib.pyplot as plt
-import symengine
 #import jitcdde
-import mpmath
+
+#
+#
+# Proxy for a module that is only imported when one of its attributes is used for the first time.
+# scipy, matplotlib (which may start a GUI backend), symengine and mpmath take most of the time of importing this package,
+# and many programs only need some of them (see benchmarks/import_time.py).
+#
+class _lazy_module:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if attribute in ("_name", "_module"):
+            raise AttributeError(attribute)
+
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+
+        # Later uses of the attribute find it on the proxy and do not call __getattr__ again.
+        value = getattr(self._module, attribute)
+        setattr(self, attribute, value)
+
+        return value
+
+    def __repr__(self):
+        return "<lazily imported module " + repr(self._name) + ">"
+
+integrate = _lazy_module("scipy.integrate")
+linalg = _lazy_module("scipy.linalg")
+misc = _lazy_module("scipy.misc")
+plt = _lazy_module("matplotlib.pyplot")
+symengine = _lazy_module("symengine")
+mpmath = _lazy_module("mpmath")
+shared_memory = _lazy_module("multiprocessing.shared_memory")
+
+#
+#
+# Kinds of the nodes of the index of a timescale (see timescale._index()).
+#
+_POINT = 0
+_INTERVAL_START = 1
+_INTERVAL_END = 2
 
 #
 #
@@ -16,26 +71,604 @@ import mpmath
 def product(factors):
         return reduce(operator.mul, factors, 1)
 
+#
+#
+# Returns (and creates if needed) a subdirectory of the local cache directory of this package.
+# The cache directory is taken from the TIMESCALECALCULUS_CACHE environment variable and defaults to ~/.cache/timescalecalculus.
+#
+def _cache_directory(*subdirectories):
+    root = os.environ.get("TIMESCALECALCULUS_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "timescalecalculus"))
+    directory = os.path.join(root, *subdirectories)
+
+    os.makedirs(directory, exist_ok=True)
+
+    return directory
+
+#
+#
+# Forward difference approximation of the Jacobian matrix of a vector valued function at x.
+# Used by the boundary value problem solver when no analytic Jacobian is provided.
+#
+def _jacobian(function, x):
+    x = np.asarray(x, dtype=float)
+    f_x = np.asarray(function(x), dtype=float)
+    J = np.empty((len(f_x), len(x)))
+
+    for j in range(len(x)):
+        h = np.sqrt(np.finfo(float).eps) * max(1.0, abs(x[j]))
+        x_h = x.copy()
+        x_h[j] = x_h[j] + h
+        J[:, j] = (np.asarray(function(x_h), dtype=float) - f_x) / h
+
+    return J
+
+#
+#
+# Evaluates a coefficient on an array of timescale values t.
+# The coefficient can be None (zero), a number, an array with one value per entry of t, or a function.
+# Functions are called point by point, or once with the whole array if "vectorized" is True (which is fast for numpy-aware functions);
+# such a call must return one value per entry of t.
+#
+def _evaluate_on_grid(f, t, vectorized=False):
+    if f is None:
+        return np.zeros(len(t))
+
+    if not callable(f):
+        values = np.asarray(f, dtype=float)
+
+        if values.ndim != 0 and values.shape != t.shape:
+            raise Exception("The coefficient array must contain one value for every grid point (" + str(len(t)) + " values).")
+
+        return np.broadcast_to(values, t.shape)
+
+    if vectorized:
+        values = np.asarray(f(t), dtype=float)
+
+        if values.shape != t.shape:
+            raise Exception("A vectorized function must return one value for every grid point (" + str(len(t)) + " values), not an array of shape " + str(values.shape) + ".")
+
+        return values
+
+    return np.array([f(x) for x in t], dtype=float)
+
+#
+#
+# Screen-aware decimation for plot() and scatter().
+#
+# _plot_resolution() returns the size [columns, rows] in pixels of the current matplotlib figure.
+#
+# _line_decimation(x, y, columns) returns the indices of the samples (x sorted) that are kept when a line is drawn into "columns" pixel columns:
+# the first, last, smallest and largest sample of every column (M4 aggregation), which draws the same pixels as the full line.
+#
+# _marker_decimation(x, y, columns, rows) returns the indices of the samples that are kept when markers are drawn into a
+# columns x rows pixel grid: the first sample in every occupied pixel.
+#
+#
+def _plot_resolution():
+    figure = plt.gcf()
+
+    return [max(1, int(figure.get_figwidth() * figure.dpi)), max(1, int(figure.get_figheight() * figure.dpi))]
+
+def _pixel_bins(values, bins):
+    finite = values[np.isfinite(values)]
+
+    if len(finite) == 0 or finite.max() == finite.min():
+        return np.zeros(len(values), dtype=np.int64)
+
+    scaled = np.nan_to_num((values - finite.min()) / (finite.max() - finite.min()) * bins, nan=bins, posinf=bins, neginf=0)
+
+    return np.minimum(scaled, bins - 1).astype(np.int64)
+
+def _line_decimation(x, y, columns):
+    if len(x) <= 4 * columns:
+        return np.arange(len(x))
+
+    column = _pixel_bins(x, columns)
+    order = np.lexsort((y, column))
+
+    first = np.flatnonzero(np.r_[True, column[1:] != column[:-1]])
+    last = np.r_[first[1:] - 1, len(x) - 1]
+
+    return np.unique(np.concatenate([first, last, order[first], order[last]]))
+
+def _marker_decimation(x, y, columns, rows):
+    if len(x) <= columns:
+        return np.arange(len(x))
+
+    pixel = _pixel_bins(x, columns) * (rows + 1) + _pixel_bins(y, rows)
+
+    return np.sort(np.unique(pixel, return_index=True)[1])
+
+#
+#
+# Evaluates a matrix valued coefficient A at every entry of the array "times" and returns a (len(times), d, d) array.
+# A can be a constant d x d matrix or a function. Functions are called point by point, or once with the whole array if "vectorized" is True.
+# The layout of a vectorized result cannot be told from its shape alone (a (d, d, k) array from numpy broadcasting has the same shape if k == d),
+# so its first matrix is compared with A(times[0]).
+#
+def _evaluate_matrices(A, times, d, vectorized=False):
+    if not callable(A):
+        return np.broadcast_to(np.asarray(A, dtype=float), (len(times), d, d))
+
+    if vectorized:
+        values = np.asarray(A(times), dtype=float)
+
+        if values.shape != (len(times), d, d) or not np.allclose(values[0], np.asarray(A(times[0]), dtype=float), rtol=1e-12, atol=1e-12):
+            raise Exception("A vectorized function A(t) must return a (k, d, d) array whose k-th matrix is A(t[k]) when it is called with an array of k values of t.")
+
+        return values
+
+    return np.array([A(t) for t in times], dtype=float).reshape(len(times), d, d)
+
+#
+#
+# Returns the ordered matrix product M[k-1] @ ... @ M[1] @ M[0] of a (k, d, d) array.
+# Neighbouring matrices are multiplied pairwise with one batched matmul per level, so only log2(k) numpy calls are needed.
+#
+def _ordered_product(M):
+    d = M.shape[1]
+
+    if len(M) == 0:
+        return np.eye(d)
+
+    while len(M) > 1:
+        if len(M) % 2 == 1:
+            M = np.concatenate((M, np.eye(d)[None]))
+
+        M = M[1::2] @ M[0::2]
+
+    return M[0]
+
+#
+#
+# Returns the ordered product of the leaves i, i+1, ..., j-1 of a segment tree built by timescale._transition_table(),
+# i.e. leaf[j-1] @ ... @ leaf[i]. Only about 2*log2(size) matrix multiplications are needed.
+#
+def _tree_product(tree, size, i, j):
+    d = tree.shape[1]
+    left = np.eye(d)
+    right = np.eye(d)
+
+    i = i + size
+    j = j + size
+
+    while i < j:
+        if i % 2 == 1:
+            left = tree[i] @ left
+            i = i + 1
+
+        if j % 2 == 1:
+            j = j - 1
+            right = right @ tree[j]
+
+        i = i // 2
+        j = j // 2
+
+    return right @ left
+
+#
+#
+# Kernels for runs of right scattered points, which are compiled with numba when the function they call is compiled with numba
+# (see njit() and _jit_kernel()). Otherwise the solvers and dintegral use their Python and NumPy code.
+#
+# _euler_kernel: Euler steps y = y + f(t[k], y) * mu[k] for a scalar ODE y' = f(t, y) (see solve_ode_for_t())
+# _euler_system_kernel: the same steps y = y + f(y, t[k]) * mu[k] for a system y' = f(y, t) whose right-hand side returns an array (see solve_ode_system_for_t())
+# _weighted_sum_kernel: the sum of mu[k] * f(x[k]) (see dintegral())
+#
+#
+def _euler_kernel(f, t, mu, y):
+    for k in range(len(mu)):
+        y = y + f(t[k], y) * mu[k]
+
+    return y
+
+def _euler_system_kernel(f, t, mu, y):
+    for k in range(len(mu)):
+        y = y + f(y, t[k]) * mu[k]
+
+    return y
+
+def _weighted_sum_kernel(f, x, mu):
+    total = 0.0
+
+    for k in range(len(x)):
+        total = total + mu[k] * f(x[k])
+
+    return total
+
+_jit_kernels = {}
+
+#
+# returns the kernel compiled with numba (compiled once, on first use)
+#
+def _jit_kernel(kernel):
+    if kernel not in _jit_kernels:
+        _jit_kernels[kernel] = importlib.import_module("numba").njit(kernel)
+
+    return _jit_kernels[kernel]
+
+_mpmath_contexts = threading.local()
+
+#
+# Returns the mpmath context for the quadratures of the calling thread (see timescale.integrate_complex()).
+# mpmath.quad raises the working precision of its context while it runs, so threads that used the global context mpmath.mp at the
+# same time could compute their quadrature nodes with the precision another thread had just restored. The main thread uses mpmath.mp,
+# every other thread its own context, which starts with the precision of mpmath.mp.
+#
+def _mpmath_context():
+    if threading.current_thread() is threading.main_thread():
+        return mpmath.mp
+
+    context = getattr(_mpmath_contexts, "context", None)
+
+    if context is None:
+        context = _mpmath_contexts.context = mpmath.MPContext()
+        context.prec = mpmath.mp.prec
+
+    return context
+
+#
+# whether f was compiled with numba.njit (without importing numba)
+#
+def _is_jitted(f):
+    return type(f).__module__.startswith("numba.") and hasattr(f, "py_func")
+
+#
+#
+# Compiles f with numba.njit if numba is installed and returns f unchanged otherwise, so that right-hand sides and integrands can be
+# written once for both cases. The solvers and dintegral run the right scattered points of a timescale in compiled loops when the
+# function they are given is compiled with numba. The right-hand side of a system (see solve_ode_system_for_t()) must then return a NumPy array.
+#
+#
+def njit(f):
+    try:
+        numba = importlib.import_module("numba")
+
+    except ImportError:
+        return f
+
+    return numba.njit(f)
+
+#
+#
+# Utility function used by sliding_dintegral and exponential_dintegral.
+# Validates that the sample at t follows the sample at t_previous and returns the delta integral of f from t_previous to t
+# (mu*f on a right scattered value and the trapezoidal rule inside an interval).
+#
+#
+def _online_step(timescale, t_previous, f_previous, t, f_t, caller):
+    mu = timescale.mu(t_previous)
+
+    if mu != 0:
+        if t != t_previous + mu and t != timescale.sigma(t_previous):
+            raise Exception(caller + ": the sample after t = " + str(t_previous) + " must be at sigma(t) = " + str(timescale.sigma(t_previous)) + ", not at " + str(t) + ".")
+
+        return mu * f_previous
+
+    if timescale.isDiscretePoint(t_previous):
+        raise Exception(caller + ": t = " + str(t_previous) + " is the largest value of the timescale, so the timescale has to be extended before the next sample is added.")
+
+    if t <= t_previous or t > timescale.getCorrespondingInterval(t_previous)[1]:
+        raise Exception(caller + ": the sample after t = " + str(t_previous) + " must be at a larger value of the same interval, not at " + str(t) + ".")
+
+    return (t - t_previous) * (f_previous + f_t) / 2
+
+#
+#
+# Reads timestamps in chunks of at most chunk_size values and yields them as float64 arrays (used by from_timestamps()).
+# "source" is an array (or any sequence) of timestamps or the path of a file in one of the following formats:
+#   "npy"  -- a numpy .npy file, which is memory-mapped
+#   "csv"  -- a text file with one record per line; the timestamps are taken from the given column
+#   "raw"  -- a binary file of values of the numpy dtype "dtype" (little endian float64 by default)
+# If no format is given it is derived from the file extension (.npy, .csv/.txt, anything else is read as raw).
+#
+def _timestamp_chunks(source, format, chunk_size, column, delimiter, skip_header, dtype):
+    if not isinstance(source, (str, os.PathLike)):
+        values = np.asarray(source)
+
+        for start in range(0, len(values), chunk_size):
+            yield np.asarray(values[start:start + chunk_size], dtype=float)
+
+        return
+
+    if format is None:
+        extension = os.path.splitext(str(source))[1].lower()
+        format = {".npy": "npy", ".csv": "csv", ".txt": "csv"}.get(extension, "raw")
+
+    if format == "npy":
+        values = np.load(source, mmap_mode="r")
+
+        for start in range(0, len(values), chunk_size):
+            yield np.asarray(values[start:start + chunk_size], dtype=float)
+
+    elif format == "raw":
+        values = np.memmap(source, dtype=dtype, mode="r")
+
+        for start in range(0, len(values), chunk_size):
+            yield np.asarray(values[start:start + chunk_size], dtype=float)
+
+    elif format == "csv":
+        with open(source) as file:
+            for _ in range(skip_header):
+                next(file, None)
+
+            chunk = []
+
+            for line in file:
+                line = line.strip()
+
+                if line:
+                    chunk.append(float(line.split(delimiter)[column]))
+
+                if len(chunk) == chunk_size:
+                    yield np.array(chunk)
+                    chunk = []
+
+            if chunk:
+                yield np.array(chunk)
+
+    else:
+        raise Exception("from_timestamps(): unknown format " + str(format) + " (use \"npy\", \"csv\" or \"raw\").")
+
+#
+#
+# Approximate number of bytes occupied by an object and everything it contains (used by timescale.memory_footprint()).
+# Lists, tuples and dictionaries are followed recursively (sys.getsizeof() already includes the data of numpy arrays that own it).
+#
+def _deep_size(obj):
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        size = size + sum(_deep_size(key) + _deep_size(value) for key, value in obj.items())
+
+    elif isinstance(obj, (list, tuple)):
+        size = size + sum(_deep_size(item) for item in obj)
+
+    return size
+
+#
+#
+# int(np.searchsorted(nodes, t, side)) for a scalar t, where nodes is an index array or its copy as a list (see timescale._scalar_index()).
+# bisect is used instead: np.searchsorted() has a large constant cost per call (more than bisect needs for 10^6 nodes), and it converts a
+# float32 index to float64 on every call, which is O(n). bisect compares the nodes with t exactly.
+#
+def _search(nodes, t, side):
+    if side == "left":
+        return bisect.bisect_left(nodes, t)
+
+    return bisect.bisect_right(nodes, t)
+
+#
+#
+# Decorator for the methods of timescale that are reported by timescale.instrument(): while the timescale is instrumented the calls
+# are counted and, on request, timed, and the hooks of the instrumentation are called around them. Otherwise it only checks one attribute.
+#
+#
+def _instrumented(name):
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            report = self._instrumentation
+
+            if report is None:
+                return method(self, *args, **kwargs)
+
+            start = report.enter(name)
+
+            try:
+                return method(self, *args, **kwargs)
+
+            finally:
+                report.exit(name, start)
+
+        return wrapper
+
+    return decorator
+
+#
+#
+# Memoization table of g_k, h_k and dexp_A (see timescale.memo_g_k): a dictionary that several threads can read and write.
+#
+# compute(key, function) returns the value for key and calls function() to compute it if the table does not contain it.
+# If another thread is already computing the value for the same key, it waits for that result instead of computing it again;
+# if that computation raises an exception, the waiting threads compute the value themselves. A computation must not need its own key
+# (the values of g_k and h_k for k only depend on those for k - 1, so this cannot deadlock).
+#
+#
+class memo_table(dict):
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+
+        self._lock = threading.Lock()
+        self._computing = {}
+
+    def compute(self, key, function):
+        while True:
+            value = self.get(key, _MISSING)
+
+            if value is not _MISSING:
+                return value
+
+            with self._lock:
+                value = self.get(key, _MISSING)
+
+                if value is not _MISSING:
+                    return value
+
+                computing = self._computing.get(key)
+
+                if computing is None:
+                    computing = self._computing[key] = [threading.Event(), threading.get_ident()]
+                    break
+
+            if computing[1] == threading.get_ident():
+                raise Exception("memo_table.compute(): the value for the key " + repr(key) + " is needed to compute itself.")
+
+            computing[0].wait()
+
+        try:
+            value = function()
+            self[key] = value
+
+            return value
+
+        finally:
+            with self._lock:
+                del self._computing[key]
+
+            computing[0].set()
+
+    def copy(self):
+        return memo_table(self)
+
+    def __reduce__(self):
+        return (memo_table, (dict(self),))
+
+_MISSING = object()
+
+#
+#
+# Returns the starting value of a point t or an interval [a, b] of a timescale (the key by which the list ts is sorted).
+#
+def _item_start(item):
+    return item[0] if isinstance(item, list) else item
+
+# Serializes building the index of timescales (see timescale._index()).
+_index_lock = threading.Lock()
+
+# Whether the calling thread is computing a value for the persistent cache (see timescale._persisted()).
+_persisting = threading.local()
+
+# The number of transition tables of dexp_A that a timescale keeps (see timescale.dexp_A()).
+_TRANSITION_TABLE_LIMIT = 16
+
+# Timescales with at most this many nodes keep a copy of their index as Python lists for the scalar queries (see timescale._scalar_index()).
+_SCALAR_INDEX_LIMIT = 65536
+
+#
+#
+# Layout of the files written by timescale.save(): the header and the offsets of the node and kind arrays, which are aligned to 64 bytes.
+#
+_FILE_HEADER = struct.Struct("<8sIB3xQII")
+_FILE_MAGIC = b"TIMESCAL"
+_FILE_VERSION = 1
+
+def _file_offsets(header_length, count, itemsize):
+    nodes_offset = -(-header_length // 64) * 64
+    kinds_offset = -(-(nodes_offset + count * itemsize) // 64) * 64
+
+    return [nodes_offset, kinds_offset]
+
+#
+#
+# Writes rows to "path" in one of the formats of timescale.export(): "csv", "npy", "npz", "parquet" or "arrow" (the last two need pyarrow).
+# The format is taken from the extension of path if it is None.
+# "names" and "dtypes" describe the columns, "rows" is the total number of rows and "chunks" yields lists with one array per column,
+# which are written one chunk at a time, so only one chunk is in memory.
+# .npy and .npz files contain one structured array (named "samples" in a .npz file) with a field for every column.
+#
+#
+def _export_rows(path, format, names, dtypes, rows, chunks, caller):
+    if format is None:
+        format = os.path.splitext(path)[1][1:].lower()
+
+    dtype = np.dtype([(name, column_dtype) for name, column_dtype in zip(names, dtypes)])
+
+    if format == "csv":
+        formats = ["%d" if np.dtype(column_dtype).kind in "iu" else "%.17g" for column_dtype in dtypes]
+
+        with open(path, "w") as file:
+            file.write(",".join(names) + "\n")
+
+            for chunk in chunks:
+                np.savetxt(file, np.column_stack(chunk), fmt=formats, delimiter=",")
+
+    elif format == "npy" or format == "npz":
+        def write(file):
+            np.lib.format.write_array_header_2_0(file, {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (rows,)})
+
+            for chunk in chunks:
+                records = np.empty(len(chunk[0]), dtype=dtype)
+
+                for name, column in zip(names, chunk):
+                    records[name] = column
+
+                file.write(records.tobytes())
+
+        if format == "npy":
+            with open(path, "wb") as file:
+                write(file)
+
+        else:
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+                with archive.open("samples.npy", "w", force_zip64=True) as file:
+                    write(file)
+
+    elif format == "parquet" or format == "arrow":
+        try:
+            pyarrow = importlib.import_module("pyarrow")
+            writers = importlib.import_module("pyarrow.parquet" if format == "parquet" else "pyarrow.ipc")
+
+        except ImportError:
+            raise Exception(caller + "(): Writing " + format + " files requires pyarrow.")
+
+        schema = pyarrow.schema([(name, pyarrow.from_numpy_dtype(np.dtype(column_dtype))) for name, column_dtype in zip(names, dtypes)])
+        writer = writers.ParquetWriter(path, schema) if format == "parquet" else writers.new_file(path, schema)
+
+        try:
+            for chunk in chunks:
+                writer.write_table(pyarrow.table([pyarrow.array(np.asarray(column, dtype=column_dtype)) for column, column_dtype in zip(chunk, dtypes)], schema=schema))
+
+        finally:
+            writer.close()
+
+    else:
+        raise Exception(caller + "(): Unknown format \"" + str(format) + "\" (use \"csv\", \"npy\", \"npz\", \"parquet\" or \"arrow\").")
+
+    return rows
+
+#
+#
+# Rebuilds a timescale that was pickled (see timescale.__reduce__()) from its index arrays without validating it.
+#
+#
+def _restore_timescale(nodes, kinds, name, metadata, memo_g_k, memo_h_k, persistent, digest):
+    result = timescale.__new__(timescale)
+    result._initialize(None, name)
+    result.metadata = metadata
+    result.memo_g_k = memo_g_k
+    result.memo_h_k = memo_h_k
+    result._persistent = persistent
+    result._digest = digest
+    result._kinds = kinds
+    result._nodes = nodes
+
+    return result
+
 #
 #
 # Time scale class
 #
+# The values of a timescale are stored in its index: one float64 (or float32, see from_arrays()) per point and interval endpoint and
+# one uint8 for the kind of each of these nodes, i.e. 9 (or 5) bytes per point and 18 (or 10) bytes per interval. The list ts takes
+# about 32 bytes per point and 130 bytes per interval in addition and is only generated when it is needed, and the instances use __slots__.
+# memory_footprint() reports the actual sizes and benchmarks/memory_footprint.py compares the representations.
+#
+# Concurrency: the methods that do not change the timescale can be called by several threads on the same instance at the same time --
+# sigma, rho, mu, nu, the other point queries and the index-space functions, dintegral and the other integrals, g_k and h_k,
+# dexp_p, dexp_A, laplace_transform, the *_array functions, the solvers (each thread with its own JiTCDDE object) and export. The memoization tables are memo_table objects,
+# so every value of g_k, h_k and dexp_A is computed once even if several threads ask for it at the same time.
+# The following need exclusive access to the instance: append_point, append_interval, insert, assigning ts or the memo tables, persist,
+# and instrument (an instrumentation counts the calls of all threads). plot and scatter use the global state of matplotlib.pyplot
+# and must only be called from one thread. A timescale_cursor must not be shared between threads; every thread can create its own.
+# benchmarks/concurrency.py checks this with a thread pool.
+#
 #
 class timescale:
-    def __init__(self,ts,name='none'):
-        self.ts = ts
-        self.name = name
+    __slots__ = ("_ts", "name", "metadata", "_memo_g_k", "_memo_h_k", "_memo_dexp_A", "_nodes", "_kinds", "_node_buffer", "_kind_buffer", "_plt", "_shared", "_instrumentation", "_persistent", "_digest", "_lookup", "__weakref__")
 
-        # The following two dictionary data members are used for the memoization of the g_k and h_k functions of this class.
-        self.memo_g_k = {}
-        self.memo_h_k = {}
-                
-        # The following data member allows users to access the functions of the matplotlib.pyplot interface.
-        # This means that a user has more control over the plotting functionality of this class.
-        # For instance, the xlabel and ylabel functions of the pyplot interface can be set via this data member.
-        # Then, whenever the plot() or scatter() functions of this class are called and displayed (via plt.show()), the xlabel and ylabel will display whatever the user set them to.
-        # See this resource for a list of available functionality: https://matplotlib.org/api/_as_gen/matplotlib.pyplot.html
-        self.plt = plt
+    def __init__(self,ts,name='none'):
+        self._initialize(ts, name)
 
         #
         # The following code validates the user-specified timescale to ensure that there are no overlaps such as:
@@ -78,72 +711,302 @@ class timescale:
                         if listItem >= listItemToCompare[0] and listItem <= listItemToCompare[1]:
                             raise Exception("Invalid timescale declaration: you cannot declare a point that is included in an interval (you cannot declare a value more than once).")
 
+        # The items may be given in any order; the timescale keeps them sorted (see the ts property).
+        self._ts = sorted(ts, key=_item_start)
+
         print("Timescale successfully constructed:")
         print("Timescale:", self.ts)
         print("Timescale name:", self.name)
 
     #
     #
-    # forward jump
+    # Utility function used by the constructor and by from_arrays().
+    # Sets up the data members of a new timescale.
     #
     #
-    def sigma(self,t):
-        tIndex = 0
-        tNext = None
-        iterations = 0
-
-        for x in self.ts:
-            if (not isinstance(x, list) and t == x) or (isinstance(x, list) and t >= x[0] and t <= x[1]):
-                tIndex = iterations
-                break
+    def _initialize(self, ts, name):
+        # The list of points and intervals is generated from the index of the timescale when it is not given (see the ts property).
+        self._ts = ts
+        self.name = name
 
-            iterations = iterations + 1
+        # Additional information about the timescale, which is stored by save() and restored by open().
+        self.metadata = {}
 
-        if (tIndex + 1) == len(self.ts):
-            return t
+        # The following two dictionary data members are used for the memoization of the g_k and h_k functions of this class (see memo_table).
+        # Their keys are the tuples (k, t, s).
+        self.memo_g_k = memo_table()
+        self.memo_h_k = memo_table()
 
-        elif isinstance(self.ts[tIndex], list):
-            if (t != self.ts[tIndex][1]):
-                return t
+        # The following dictionary caches the transition matrix tables that are used by the dexp_A function of this class (one table per constant matrix A or key of a function A).
+        self.memo_dexp_A = memo_table()
 
-            else:
-                if (isinstance(self.ts[tIndex + 1], list)):
-                    return self.ts[tIndex + 1][0]
+        # The following two data members hold the index of the timescale (see _index()). They are built on first use.
+        self._nodes = None
+        self._kinds = None
 
-                else:
-                    return self.ts[tIndex + 1]
+        # The index as it is searched by sigma, mu, isInTimescale and the other scalar queries (see _scalar_index()). Built on first use.
+        self._lookup = None
 
-        else:
-            tNext = self.ts[tIndex + 1]
+        # Once the timescale is extended (see insert()), the index arrays above are views of the following two buffers, which grow by doubling.
+        self._node_buffer = None
+        self._kind_buffer = None
+                
+        # A different pyplot-like object for the plt property (see below), or None for matplotlib.pyplot itself.
+        self._plt = None
 
-            if isinstance(tNext, list):
-                return tNext[0]
+        # The shared_timescale whose shared memory holds the index, if the timescale was attached to one (see share()).
+        self._shared = None
+        self._instrumentation = None
 
-            else:
-                return tNext
+        # The persistent_cache of the tables of the timescale (see persist()) and its content hash (see content_hash()).
+        self._persistent = None
+        self._digest = None
 
     #
     #
-    # backwards jump
+    # Creates a timescale from the arrays of the starting values and the ending values of its items, sorted in increasing order:
+    # item k is the point starts[k] if starts[k] == ends[k] and the interval [starts[k], ends[k]] otherwise.
+    # Only neighbouring items are compared (with vectorized numpy comparisons) and the index of the timescale is built directly,
+    # so a timescale with millions of items is created in O(n) time. Unlike the constructor this prints nothing.
     #
+    # With dtype=np.float32 the values are rounded to single precision and the index takes 5 instead of 9 bytes per node.
+    # All functions of the timescale then work with the rounded values (for instance, sigma() returns them and isInTimescale() compares with them).
     #
-    def rho(self,t):
-        if t==min(self.ts):
-            return t
-        else:
-            return max([x for x in self.ts if x<t])
-
+    #
+    @classmethod
+    def from_arrays(cls, starts, ends, name='none', dtype=np.float64):
+        starts = np.asarray(starts, dtype=dtype)
+        ends = np.asarray(ends, dtype=dtype)
+
+        if starts.ndim != 1 or starts.shape != ends.shape or len(starts) == 0:
+            raise Exception("from_arrays(): starts and ends must be one dimensional arrays of the same (nonzero) length.")
+
+        if np.any(ends < starts):
+            raise Exception("Invalid timescale declaration: you cannot have an interval in which the ending value is smaller than the starting value.")
+
+        if np.any(starts[1:] <= ends[:-1]):
+            raise Exception("Invalid timescale declaration: the items must be sorted and must not overlap.")
+
+        intervals = ends > starts
+        sizes = 1 + intervals
+        offsets = np.cumsum(sizes) - sizes
+
+        nodes = np.empty(int(sizes.sum()), dtype=dtype)
+        kinds = np.full(len(nodes), _POINT, dtype=np.uint8)
+
+        nodes[offsets] = starts
+        nodes[offsets[intervals] + 1] = ends[intervals]
+        kinds[offsets[intervals]] = _INTERVAL_START
+        kinds[offsets[intervals] + 1] = _INTERVAL_END
+
+        result = cls.__new__(cls)
+        result._initialize(None, name)
+        result._nodes = nodes
+        result._kinds = kinds
+
+        return result
+
+    #
+    #
+    # Returns an instrumentation that counts what the methods of this timescale do while it is active, for instance:
+    #
+    #   with ts.instrument(timing=True) as report:
+    #       ts.laplace_transform(f, z, s)
+    #
+    #   print(report)
+    #
+    # See the instrumentation class for the counters, the timings, the hooks for external profilers and the profiler argument.
+    # Without instrumentation the methods of the timescale only check whether it is active.
+    #
+    #
+    def instrument(self, timing=False, hooks=None, profiler=None):
+        return instrumentation(self, timing, hooks, profiler)
+
+    #
+    #
+    # Publishes the index of the timescale, and the arrays in the dictionary "tables" (for instance a cumulative integral from dintegral_array()
+    # or an exponential table from dexp_array()), in shared memory and returns a shared_timescale handle.
+    # The handle is small to pickle, so it can be sent to the workers of a multiprocessing pool, which get the timescale with handle.attach()
+    # and the tables with handle.table(key) in O(1) time, without copying or validating anything.
+    #
+    #
+    def share(self, tables=None):
+        return shared_timescale(self, tables)
+
+    #
+    #
+    # Stores the values of g_k and h_k and the transition tables of dexp_A (for constant matrices A) of this timescale in a persistent_cache,
+    # so that they are computed once for all runs and processes that use a timescale with the same values, for instance:
+    #
+    #   ts.persist()
+    #   ts.g_k(3, t, s)    # computed and stored in the first run, read from the cache in later runs
+    #
+    # "cache" is a persistent_cache, True for the default cache in the cache directory (see _cache_directory()) or None to stop using a cache.
+    # Returns the cache. The memo tables are still used in front of the cache, so every value is read from it at most once.
+    # Only the values that are asked for directly are stored, not the ones they are computed from: g_k(3, t, s) stores one entry,
+    # not the values of g_k(2, ...) and g_k(1, ...) at the points and quadrature nodes that its integral needs.
+    #
+    #
+    def persist(self, cache=True):
+        if cache is True:
+            cache = persistent_cache()
+
+        self._persistent = cache
+
+        return cache
+
+    #
+    #
+    # Saves the timescale to a file in the following binary format, which open() can memory-map:
+    #   header    -- struct "<8sIB3xQII": magic b"TIMESCAL", format version, bytes per node value (8 or 4), number of nodes,
+    #                length of the name, length of the metadata
+    #   name      -- UTF-8
+    #   metadata  -- the dictionary self.metadata (updated with "metadata" if given) as UTF-8 encoded JSON
+    #   nodes     -- little endian floats, starting at a multiple of 64 bytes
+    #   kinds     -- one uint8 per node (0 = point, 1 = start of an interval, 2 = end of an interval), starting at a multiple of 64 bytes
+    # The file is written to a temporary file first and then moved into place.
+    #
+    #
+    def save(self, path, metadata=None):
+        nodes, kinds = self._index()
+
+        if metadata is not None:
+            self.metadata.update(metadata)
+
+        nodes = nodes.astype(nodes.dtype.newbyteorder("<"), copy=False)
+        name = str(self.name).encode("utf-8")
+        description = json.dumps(self.metadata).encode("utf-8")
+
+        header = _FILE_HEADER.pack(_FILE_MAGIC, _FILE_VERSION, nodes.dtype.itemsize, len(nodes), len(name), len(description))
+        nodes_offset, kinds_offset = _file_offsets(len(header) + len(name) + len(description), len(nodes), nodes.dtype.itemsize)
+
+        temporary_path = str(path) + ".tmp" + str(os.getpid())
+
+        with open(temporary_path, "wb") as file:
+            file.write(header + name + description)
+            file.write(bytes(nodes_offset - file.tell()))
+            file.write(nodes.tobytes())
+            file.write(bytes(kinds_offset - file.tell()))
+            file.write(kinds.astype(np.uint8, copy=False).tobytes())
+
+        os.replace(temporary_path, path)
+
+    #
+    #
+    # Opens a timescale that was saved with save().
+    # With mmap=True the nodes and kinds are memory-mapped read-only instead of being read, so opening takes O(1) time regardless of the size
+    # and processes that open the same file share its pages. Everything that works on the index of the timescale uses the mapped arrays directly;
+    # the list ts is only generated if it is accessed. Extending the timescale (see insert()) copies the index into memory first.
+    #
+    #
+    @classmethod
+    def open(cls, path, mmap=True):
+        with open(path, "rb") as file:
+            header = file.read(_FILE_HEADER.size)
+
+            if len(header) < _FILE_HEADER.size:
+                raise Exception("open(): " + str(path) + " is not a timescale file.")
+
+            magic, version, itemsize, count, name_length, description_length = _FILE_HEADER.unpack(header)
+
+            if magic != _FILE_MAGIC:
+                raise Exception("open(): " + str(path) + " is not a timescale file.")
+
+            if version > _FILE_VERSION:
+                raise Exception("open(): " + str(path) + " was written by a newer version (format version " + str(version) + ").")
+
+            name = file.read(name_length).decode("utf-8")
+            description = json.loads(file.read(description_length).decode("utf-8"))
+
+        dtype = np.dtype("<f" + str(itemsize))
+        nodes_offset, kinds_offset = _file_offsets(_FILE_HEADER.size + name_length + description_length, count, itemsize)
+
+        if mmap:
+            nodes = np.memmap(path, dtype=dtype, mode="r", offset=nodes_offset, shape=(count,))
+            kinds = np.memmap(path, dtype=np.uint8, mode="r", offset=kinds_offset, shape=(count,))
+
+        else:
+            nodes = np.fromfile(path, dtype=dtype, count=count, offset=nodes_offset)
+            kinds = np.fromfile(path, dtype=np.uint8, count=count, offset=kinds_offset)
+
+        result = cls.__new__(cls)
+        result._initialize(None, name)
+        result.metadata = description
+        result._nodes = nodes
+        result._kinds = kinds
+
+        return result
+
+    #
+    #
+    # forward jump
+    #
+    #
+    def sigma(self,t):
+        if self._instrumentation is not None:
+            self._instrumentation.count("index.sigma")
+
+        nodes, kinds = self._lookup or self._scalar_index()
+        i = bisect.bisect_right(nodes, t) - 1
+
+        if i < 0 or (nodes[i] != t and kinds[i] != _INTERVAL_START):
+            # t is not in the timescale. Like before, t is then treated as if it was part of the first entry of the timescale.
+            if kinds[0] == _POINT and len(nodes) > 1:
+                return float(nodes[1])
+
+            return t
+
+        if kinds[i] != _INTERVAL_START and i + 1 < len(nodes):
+            return float(nodes[i + 1])
+
+        return t
+
+    #
+    #
+    # backwards jump
+    #
+    #
+    def rho(self,t):
+        if self._instrumentation is not None:
+            self._instrumentation.count("index.rho")
+
+        nodes, kinds = self._lookup or self._scalar_index()
+        i = bisect.bisect_left(nodes, t)
+
+        if i < len(nodes) and nodes[i] == t and kinds[i] == _INTERVAL_END:
+            return t
+
+        if i < len(nodes) and nodes[i] != t and i > 0 and kinds[i - 1] == _INTERVAL_START:
+            return t
+
+        if i == 0:
+            return t
+
+        return float(nodes[i - 1])
+
     #
     #
     # graininess
     #
     #
-    def mu(self,t):    
-        for x in self.ts:
-            if isinstance(x, list) and t >= x[0] and t < x[1]:
-                return 0
+    def mu(self,t):
+        if self._instrumentation is not None:
+            self._instrumentation.count("index.mu")
+
+        nodes, kinds = self._lookup or self._scalar_index()
+        i = bisect.bisect_right(nodes, t) - 1
+
+        if i >= 0 and kinds[i] == _INTERVAL_START:
+            return 0
+
+        # A value that is not in the timescale is handled by sigma().
+        if i < 0 or nodes[i] != t:
+            return self.sigma(t)-t
 
-        return self.sigma(t)-t
+        if i + 1 < len(nodes):
+            return float(nodes[i + 1])-t
+
+        return 0
 
     #
     #
@@ -155,237 +1018,725 @@ class timescale:
 
     #
     #
-    # delta derivative
+    # Index-space versions of the functions above.
     #
+    # Every point of the timescale and both endpoints of every interval are nodes of the timescale, and the nodes are numbered
+    # 0, 1, ..., node_count() - 1 in increasing order (an interval [a, b] therefore occupies two consecutive indices).
+    # Working with these indices instead of float values of t avoids searching the timescale and comparing floats:
+    # the neighbours of node i are found in O(1) with integer arithmetic and per node data can be kept in arrays.
     #
-    def dderivative(self,f,t):
-        if self.sigma(t) == t:
-            return derivative(f, t, dx=(1.0/2**16))
+    # index_of(t, error) returns the index of the node closest to t (within "error") and raises an exception if there is none.
+    # The other functions accept an index or an integer array of indices, in which case an array is returned.
+    #
+    #
+    def node_count(self):
+        return len(self._index()[0])
 
-        else:
-            return (f(self.sigma(t))-f(t))/self.mu(t)
+    def index_of(self, t, error=0):
+        nodes, kinds = self._index()
+        t_values = np.asarray(t, dtype=float)
+
+        i = np.searchsorted(nodes, t_values)
+        left = np.maximum(i - 1, 0)
+        right = np.minimum(i, len(nodes) - 1)
+        i = np.where(np.abs(nodes[left] - t_values) <= np.abs(nodes[right] - t_values), left, right)
+
+        if np.any(np.abs(nodes[i] - t_values) > error):
+            raise Exception("index_of(): t = " + str(t) + " is not a point of the timescale or an endpoint of one of its intervals.")
+
+        return int(i) if t_values.ndim == 0 else i
+
+    def t_at(self, i):
+        nodes = self._index()[0]
+
+        return float(nodes[i]) if np.ndim(i) == 0 else nodes[i]
+
+    def sigma_index(self, i):
+        nodes, kinds = self._index()
+
+        if np.ndim(i) == 0:
+            return i + 1 if kinds[i] != _INTERVAL_START and i + 1 < len(nodes) else i
+
+        i = np.asarray(i)
+
+        return np.where((kinds[i] != _INTERVAL_START) & (i + 1 < len(nodes)), i + 1, i)
+
+    def rho_index(self, i):
+        kinds = self._index()[1]
+
+        if np.ndim(i) == 0:
+            return i - 1 if kinds[i] != _INTERVAL_END and i > 0 else i
+
+        i = np.asarray(i)
+
+        return np.where((kinds[i] != _INTERVAL_END) & (i > 0), i - 1, i)
+
+    def mu_at(self, i):
+        return self.t_at(self.sigma_index(i)) - self.t_at(i)
+
+    def nu_at(self, i):
+        return self.t_at(i) - self.t_at(self.rho_index(i))
 
     #
     #
-    # nabla derivative
+    # Returns a timescale_cursor positioned at t (or at the smallest value of the timescale if t is None).
     #
     #
-    def nderivative(self,f,t):
-        return (f(t)-f(self.rho(t)))/self.nu(t)
+    def cursor(self, t=None):
+        return timescale_cursor(self, t)
 
     #
     #
-    # delta integral
+    # Delta integral of f from node i to node j (i <= j), i.e. dintegral(f, t_at(j), t_at(i)) without any searching.
+    # f is called once for every right scattered node in between and integrated (see integrate_complex()) over every interval in between.
     #
     #
-    def dintegral(self, f, t, s, throwExceptions = True):
-        # The following code checks that t and s are elements of the timescale
+    def dintegral_between(self, f, i, j):
+        nodes, kinds = self._index()
 
-        tIsAnElement = False
-        sIsAnElement = False
+        if i > j:
+            raise Exception("dintegral_between(): i cannot be greater than j.")
 
-        for x in self.ts:
-            if not isinstance(x, list) and x == t:
-                tIsAnElement = True
+        k = np.arange(i, j)
+        starts = k[kinds[k] == _INTERVAL_START]
+        scattered = k[kinds[k] != _INTERVAL_START]
 
-            if not isinstance(x, list) and x == s:
-                sIsAnElement = True
+        graininess = (nodes[scattered + 1] - nodes[scattered]).tolist()
 
-            if isinstance(x, list) and  (t >= x[0] and t <= x[1]):
-                tIsAnElement = True
+        sumOfIntegratedPoints = sum([mu * f(x) for mu, x in zip(graininess, nodes[scattered].tolist())])
 
-            if isinstance(x, list) and  (s >= x[0] and s <= x[1]):
-                sIsAnElement = True
+        sumOfIntegratedIntervals = sum([self.integrate_complex(f, a, b) for a, b in zip(nodes[starts].tolist(), nodes[starts + 1].tolist())])
 
-            if tIsAnElement and sIsAnElement:
-                break
+        return sum([sumOfIntegratedPoints, sumOfIntegratedIntervals])
 
-        errorOccurred = False
-        message = ""
+    #
+    #
+    # Array versions of the delta derivative, the delta integral and the delta exponential for functions that are given by their values.
+    #
+    # "values" holds f(t[k]) for every entry of the sample t of the timescale. t defaults to the nodes of the timescale (see node_count()),
+    # so an array with one value per node can be used directly; sample_grid(stepSize) returns a finer sample with at most stepSize between
+    # two values inside an interval. A sample has to be increasing and contain every node between its first and its last value.
+    #
+    # On right scattered values everything is exact. Inside the intervals f is interpolated according to "rule":
+    #   "linear"   -- f is linear between two values (trapezoidal rule)
+    #   "previous" -- f is constant between two values and equal to the left one
+    #
+    # dderivative_array returns f^Delta(t[k]) for every k (the right-hand difference quotient inside intervals, nan at the end of the sample).
+    # dintegral_array returns the cumulative integral F with F[k] = dintegral(f, t[k], t[0]).
+    # dexp_array returns e_p(t[k], t[0]) for every k, where "values" holds the values of p.
+    #
+    #
+    def sample_grid(self, stepSize=None):
+        nodes = self._index()[0]
 
-        if not tIsAnElement and not sIsAnElement:
-            message = "The bounds of the dintegral function, t = " + str(t) + " and s = " + str(s) + ", are not elements of the timescale."
-            errorOccurred = True
+        if stepSize is None:
+            return nodes.copy()
 
-        elif not tIsAnElement:
-            message = "The upper bound of dintegral function, t = " + str(t) + ", is not an element of timescale."
-            errorOccurred = True
+        return self._grid(float(nodes[0]), float(nodes[-1]), stepSize)[0]
 
-        elif not sIsAnElement:
-            message = "The lower bound of dintegral function, s = " + str(s) + ", is not an element of timescale."
-            errorOccurred = True
+    def dderivative_array(self, values, t=None):
+        t, values, dense = self._sample(values, t, "dderivative_array")
 
-        if errorOccurred:
-            if throwExceptions:
-                raise Exception(message)
-            
-            else:
-                print("Warning: " + message)
+        result = np.full(len(t), np.nan, dtype=np.result_type(values, float))
+        result[:-1] = np.diff(values) / np.diff(t)
 
-        # Validation code ends
-        
-        points = []
-        intervals = []
+        if len(t) > 1 and dense[-1]:
+            # The last value of the sample is only reached from the left inside an interval.
+            result[-1] = result[-2]
 
-        for x in self.ts:
-            if not isinstance(x, list) and s <= x and t > x:
-                points.append(x)
+        return result
 
-            elif isinstance(x, list) and s <= x[0] and t > x[1]:
-                points.append(x[1])
-                intervals.append(x)
+    def dintegral_array(self, values, t=None, rule="linear"):
+        t, values, dense = self._sample(values, t, "dintegral_array")
 
-            elif isinstance(x, list) and s <= x[0] and t == x[1]:
-                intervals.append(x)
+        steps = np.diff(t) * values[:-1]
 
-            elif isinstance(x, list) and (s >= x[0] and s <= x[1]) and (t > x[1]):
-                points.append(x[1])
-                intervals.append([s, x[1]])
+        if rule == "linear":
+            steps = np.where(dense, np.diff(t) * (values[:-1] + values[1:]) / 2, steps)
 
-            elif isinstance(x, list) and (s >= x[0] and s <= x[1]) and (t == x[1]):
-                intervals.append([s, x[1]])
+        elif rule != "previous":
+            raise Exception("dintegral_array(): unknown rule " + str(rule) + " (use \"linear\" or \"previous\").")
 
-            elif isinstance(x, list) and (s >= x[0] and s < x[1]) and (t < x[1]):
-                intervals.append([s, t])
+        return np.concatenate(([0], np.cumsum(steps)))
 
-            elif isinstance(x, list) and (s < x[0]) and (t >= x[0] and t < x[1]):
-                intervals.append([x[0], t])
+    def dexp_array(self, values, t=None, rule="linear"):
+        t, values, dense = self._sample(values, t, "dexp_array")
 
-        # print(points)
-        # print(intervals)
+        if rule == "linear":
+            exponents = np.diff(t) * (values[:-1] + values[1:]) / 2
 
-        sumOfIntegratedPoints = sum([self.mu(x)*f(x) for x in points])
+        elif rule == "previous":
+            exponents = np.diff(t) * values[:-1]
 
-        sumOfIntegratedIntervals = sum([self.integrate_complex(f, x[0], x[1]) for x in intervals])
+        else:
+            raise Exception("dexp_array(): unknown rule " + str(rule) + " (use \"linear\" or \"previous\").")
 
-        return sum([sumOfIntegratedPoints, sumOfIntegratedIntervals])
+        factors = np.where(dense, np.exp(exponents), 1 + np.diff(t) * values[:-1])
+
+        return np.concatenate(([1], np.cumprod(factors)))
 
     #
     #
-    # Utility function to integrate potentially infinite timescale sections of points and intervals.
+    # Utility function used by the array versions of the operators.
+    # Validates the sample t (default: the nodes of the timescale) and the values on it and returns [t, values, dense],
+    # where dense[k] is True if t[k] and t[k+1] lie in the same interval and False if t[k+1] = sigma(t[k]).
     #
     #
-    def compute_potentially_infinite_timescale(self, f, ts_generator_function, ts_generator_arguments):    
-        print("ts_generator_arguments =", ts_generator_arguments)
-        print()
-                
-        # The following argument "ts_gen_arg_mpf" has "mpf" on the end because the mpmath package passes "mpf" objects to this function as part of the nsum() function's design.
-        # These objects are converted to floats via the line: ts_gen_arg = float(mpmath.nstr(ts_gen_arg_mpf, n=15)).
-        # This conversion enables us to integrate/solve as usual for the generated points/intervals.
-        def wrapper_function(ts_gen_arg_mpf):
-            ts_gen_arg = float(mpmath.nstr(ts_gen_arg_mpf, n=15))
-            ts_item = ts_generator_function(ts_gen_arg)
-            next_ts_item = ts_generator_function(ts_gen_arg + 1)
-            self.validate_generated_timescale_value_pair(ts_item, next_ts_item, ts_generator_function)
-                       
-            print("wrapper_function: ts_gen_arg =", ts_gen_arg)
-            print("wrapper_function: ts_generator_arguments =", ts_generator_arguments)
-            print("wrapper_function: ts_item =", ts_item)
-            print("wrapper_function: next_ts_item =", next_ts_item)
-            
-            if isinstance(ts_item, list):
-                print("wrapper_function: integrating over interval")
-                
-                interval_result = self.integrate_complex(f, ts_item[0], ts_item[1])
-                
-                step_after_interval = 0.0                
-                
-                if ts_generator_arguments[1] > ts_gen_arg:                
-                    if isinstance(next_ts_item, list):
-                        next_ts_item = next_ts_item[0]
-                        
-                    step_after_interval = (next_ts_item - ts_item[1]) * f(ts_item[1])
-                
-                print("interval_result =", interval_result)
-                print("step_after_interval =", step_after_interval)
-                
-                print("*****wrapper_function: RETURNING interval_result + step_after_interval =", interval_result + step_after_interval)
-                print()
-                
-                return interval_result + step_after_interval
-            
-            else:
-                print("wrapper_function: calculating discrete value")
-                
-                discrete_result = 0.0
-                
-                if ts_generator_arguments[1] > ts_gen_arg:                    
-                    if isinstance(next_ts_item, list):
-                        next_ts_item = next_ts_item[0]
-                    
-                    discrete_result = (next_ts_item - ts_item) * f(ts_item)
-                
-                print("*****wrapper_function: RETURNING discrete result value =", discrete_result)
-                print()
-                
-                return discrete_result
-        
-        result = mpmath.nsum(wrapper_function, ts_generator_arguments)
-        
-        print("----RESULT----")
-        print()
-        
-        return result
+    def _sample(self, values, t, caller):
+        nodes, kinds = self._index()
+
+        t = nodes if t is None else np.asarray(t, dtype=float)
+        values = np.asarray(values)
+
+        if values.shape != t.shape or t.ndim != 1:
+            raise Exception(caller + "(): there must be exactly one value for each of the " + str(len(t)) + " values of the sample.")
+
+        i = np.searchsorted(nodes, t, side="right") - 1
+
+        if np.any(i < 0) or np.any((nodes[np.maximum(i, 0)] != t) & (kinds[np.maximum(i, 0)] != _INTERVAL_START)):
+            raise Exception(caller + "(): the sample contains values that are not in the timescale.")
+
+        i = i[:-1]
+        dense = kinds[i] == _INTERVAL_START
+        successors = nodes[np.minimum(i + 1, len(nodes) - 1)]
+
+        if np.any(np.diff(t) <= 0) or np.any(np.where(dense, t[1:] > successors, t[1:] != successors)):
+            raise Exception(caller + "(): the sample must be increasing and contain every point and interval endpoint between its first and last value.")
+
+        return [t, values, dense]
 
     #
     #
-    # Utility function to integrate a generated timescale section of points and intervals for t. 
-    # Arguments:
-    #   f: The function with which to solve the timescale for a particular target value = t.
+    # Utility function that returns the index of the timescale as the arrays (nodes, kinds).
+    # nodes is the sorted float64 array of all points and interval endpoints and kinds[i] is _POINT, _INTERVAL_START or _INTERVAL_END.
+    # The index is built from self.ts on first use, once even if several threads use the timescale.
     #
-    #   t_0: The timescale value from which to begin solving.
     #
-    #   t_target: The timescale value for which to solve.
+    def _index(self):
+        if self._nodes is None:
+            with _index_lock:
+                if self._nodes is None:
+                    self._build_index()
+
+        return self._nodes, self._kinds
+
+    def _build_index(self):
+        nodes = []
+        kinds = []
+
+        for x in self._ts:
+            if isinstance(x, list):
+                nodes.extend((x[0], x[1]))
+                kinds.extend((_INTERVAL_START, _INTERVAL_END))
+
+            else:
+                nodes.append(x)
+                kinds.append(_POINT)
+
+        nodes = np.array(nodes, dtype=float)
+        kinds = np.array(kinds, dtype=np.uint8)
+
+        # Intervals do not overlap (see the constructor), so sorting keeps the two endpoints of every interval next to each other.
+        if np.any(nodes[1:] < nodes[:-1]):
+            order = np.argsort(nodes, kind="stable")
+            nodes = nodes[order]
+            kinds = kinds[order]
+
+        # _index() only checks self._nodes, so the kinds are assigned first.
+        self._node_buffer = None
+        self._kind_buffer = None
+        self._lookup = None
+        self._kinds = kinds
+        self._nodes = nodes
+
     #
-    #   ts_generator_function: The function that, when it is fed values where, for any value n, ts_generator_arguments[0] <= n <= ts_generator_arguments[1] is True AND (n_(m+1) - n_m) = 1.
-    #                          In other words: the difference between two consecutive n-values is always 1.
     #
-    #   ts_generator_arguments: A list of two numbers of the form [start, end] where start is the first value fed to the ts_generator_function and end is the last value fed to that same function.
-    #                           As mentioned before, the different between any two consecutive numbers between start and end is always 1 -- this is purely a method for generating the timescale.
-    #                           As an example: if ts_generator_arguments = [1, 4], then ts_generator_function will be fed the following values in the listed order: 1, 2, 3, 4.
-    #                           That ts_generator_function will then return, for each value fed to it, a particular timescale section. 
-    #                           compute_potentially_infinite_timescale_for_t() will then solve over these sections.
+    # Utility function that returns the index of the timescale as it is searched by the scalar queries (sigma, rho, mu, isInTimescale, ...).
+    # A single np.searchsorted() call costs microseconds, which dominates queries on the small timescales that most programs use, so
+    # timescales with at most _SCALAR_INDEX_LIMIT nodes keep copies of nodes and kinds as Python lists, which are searched with bisect.
+    # Larger timescales return the arrays of _index() themselves and do not pay for the copies.
+    # The most frequent queries read self._lookup directly and only call this function while it is None.
     #
-    #   signif_count: How many previously calcuated values (that are obtained from solving integrals or discrete points) to check the "significance" of -- see "signif_threshold" for more information.
     #
-    #   signif_threshold: The value that a particular calculated value (from solving an integral or discrete point) must be below to be considered "insignificant".
-    #                     If m=signif_count previously calculated values are all below this signif_threshold, then the compute_potentially_infinite_timescale_for_t() function will
-    #                     return the current result sum with a warning message.
+    def _scalar_index(self):
+        lookup = self._lookup
+
+        if lookup is None:
+            nodes, kinds = self._index()
+            lookup = (nodes.tolist(), kinds.tolist()) if len(nodes) <= _SCALAR_INDEX_LIMIT else (nodes, kinds)
+            self._lookup = lookup
+
+        return lookup
+
     #
-    #   increasing_always_signif: If this boolean is True: when insignificant_prior_results() detects that result values seem to be increasing (when they were decreasing before),
-    #                             it will not consider them to be insignificant even if all are below the signif_threshold.
     #
+    # Identity of the values of the timescale.
     #
-    def compute_potentially_infinite_timescale_for_t(self, f, t_target, t_0, ts_generator_function, ts_generator_arguments, signif_count = 10, signif_threshold = 0.0000001, increasing_always_signif = True):    
+    # content_hash() returns the SHA-256 hash of the index of the timescale (the node values as little endian floats and their kinds) as a
+    # hexadecimal string. It is stable across processes, runs and machines, and it keys the persistent cache (see persist()).
+    # It is computed once, in O(n) time, and again after the timescale changes (see insert() and the ts property).
+    #
+    # Two timescales are equal (==) if they have the same points and intervals with the same precision (see from_arrays()), however they
+    # were created; the name and metadata are not compared. hash() is derived from content_hash(), so a timescale can be a dictionary key
+    # or a set member, but it must not be extended while it is one.
+    #
+    #
+    def content_hash(self):
+        if self._digest is None:
+            nodes, kinds = self._index()
+            nodes = nodes.astype(nodes.dtype.newbyteorder("<"), copy=False)
+
+            # -0.0 == 0.0, so both hash the same.
+            if np.any(np.signbit(nodes) & (nodes == 0)):
+                nodes = nodes + 0.0
+
+            digest = hashlib.sha256(nodes.dtype.str.encode("ascii"))
+            digest.update(np.ascontiguousarray(nodes).data)
+            digest.update(np.ascontiguousarray(kinds, dtype=np.uint8).data)
+
+            self._digest = digest.hexdigest()
+
+        return self._digest
+
+    def __eq__(self, other):
+        if not isinstance(other, timescale):
+            return NotImplemented
+
+        if self is other:
+            return True
+
+        if self._digest is not None and other._digest is not None:
+            return self._digest == other._digest
+
+        nodes, kinds = self._index()
+        other_nodes, other_kinds = other._index()
+
+        return nodes.dtype == other_nodes.dtype and np.array_equal(nodes, other_nodes) and np.array_equal(kinds, other_kinds)
+
+    def __hash__(self):
+        return int(self.content_hash()[:16], 16)
+
+    #
+    #
+    # Pickling (and copy.deepcopy) of a timescale transfers its index arrays, name, metadata, content hash, persistent cache and the
+    # memo tables of g_k and h_k, and _restore_timescale() rebuilds it without validating it again and without rebuilding its index.
+    # The list ts is not transferred; it is generated from the index when it is accessed. The transition tables of dexp_A (large arrays
+    # that can be recomputed or read from the persistent cache), the instrumentation and the plt object are not transferred either.
+    #
+    #
+    def __reduce__(self):
+        nodes, kinds = self._index()
+
+        return (_restore_timescale, (np.asarray(nodes), np.asarray(kinds), self.name, self.metadata, dict(self.memo_g_k), dict(self.memo_h_k), self._persistent, self._digest))
+
+    #
+    #
+    # Utility function used by g_k(), h_k() and dexp_A().
+    # Returns the value of "operator" for "parameters" (a string) from the persistent cache of the timescale (see persist()), or calls
+    # compute() and stores its result there if the cache does not contain it. Without a cache this only calls compute(), and so do
+    # the calls that are made while compute() runs: only the outermost value of a computation is read from and written to the cache.
+    #
+    #
+    def _persisted(self, operator, parameters, compute):
+        cache = self._persistent
+
+        if cache is None or getattr(_persisting, "active", False):
+            return compute()
+
+        key = self.content_hash() + ":" + operator + ":" + parameters
+        value = cache.get(key)
+
+        if self._instrumentation is not None:
+            self._instrumentation.count("persistent_cache.misses" if value is _MISSING else "persistent_cache.hits")
+
+        if value is _MISSING:
+            _persisting.active = True
+
+            try:
+                value = compute()
+
+            finally:
+                _persisting.active = False
+
+            cache.put(key, value)
+
+        return value
+
+    #
+    #
+    # Utility function used by g_k() and h_k().
+    # Returns the parameters of their entries in the persistent cache. The values are written as floats, so that the same values
+    # give the same key whether they are ints, floats or mpmath numbers.
+    #
+    #
+    def _persisted_parameters(self, k, t, s):
+        return str(int(k)) + ":" + repr(float(t)) + ":" + repr(float(s))
+
+    #
+    #
+    # The timescale as a list of points and intervals [a, b], as it is given to the constructor but sorted by the starting values of the items.
+    # A timescale that was created from arrays (see from_arrays() and open()) generates the list from its index when it is first accessed.
+    # Assigning a new list replaces the timescale (without validating it, but sorting a copy of it) and removes all memoized values.
+    # The keys of the persistent cache contain the content hash (see content_hash()), so the values of the old timescale are not found there either.
+    #
+    #
+    @property
+    def ts(self):
+        if self._ts is None:
+            nodes, kinds = self._index()
+            values = nodes.tolist()
+            intervals = (kinds == _INTERVAL_START).tolist()
+
+            self._ts = [[values[i], values[i + 1]] if intervals[i] else values[i] for i in np.flatnonzero(kinds != _INTERVAL_END).tolist()]
+
+        return self._ts
+
+    @ts.setter
+    def ts(self, ts):
+        self._ts = sorted(ts, key=_item_start)
+        self._nodes = None
+        self._kinds = None
+        self._node_buffer = None
+        self._kind_buffer = None
+        self._lookup = None
+        self._digest = None
+
+        self.memo_g_k.clear()
+        self.memo_h_k.clear()
+        self.memo_dexp_A.clear()
+
+    #
+    #
+    # The following property allows users to access the functions of the matplotlib.pyplot interface.
+    # This means that a user has more control over the plotting functionality of this class.
+    # For instance, the xlabel and ylabel functions of the pyplot interface can be set via this property.
+    # Then, whenever the plot() or scatter() functions of this class are called and displayed (via plt.show()), the xlabel and ylabel will display whatever the user set them to.
+    # See this resource for a list of available functionality: https://matplotlib.org/api/_as_gen/matplotlib.pyplot.html
+    # The timescale does not keep a reference to the module itself.
+    #
+    #
+    @property
+    def plt(self):
+        return plt if self._plt is None else self._plt
+
+    @plt.setter
+    def plt(self, value):
+        self._plt = value
+
+    #
+    #
+    # The memoization tables. Dictionaries that are assigned to them are converted to memo_table objects.
+    #
+    #
+    @property
+    def memo_g_k(self):
+        return self._memo_g_k
+
+    @memo_g_k.setter
+    def memo_g_k(self, value):
+        self._memo_g_k = value if isinstance(value, memo_table) else memo_table(value)
+
+    @property
+    def memo_h_k(self):
+        return self._memo_h_k
+
+    @memo_h_k.setter
+    def memo_h_k(self, value):
+        self._memo_h_k = value if isinstance(value, memo_table) else memo_table(value)
+
+    @property
+    def memo_dexp_A(self):
+        return self._memo_dexp_A
+
+    @memo_dexp_A.setter
+    def memo_dexp_A(self, value):
+        self._memo_dexp_A = value if isinstance(value, memo_table) else memo_table(value)
+
+    #
+    #
+    # Returns the number of bytes that this timescale occupies in memory as a dictionary with the entries
+    #   "index"    -- the node and kind arrays (0 if they are memory-mapped, see open())
+    #   "mapped"   -- the size of the memory-mapped node and kind arrays
+    #   "spare"    -- unused capacity of the buffers that the index grows into (see insert())
+    #   "lookup"   -- the copy of the index as Python lists that small timescales keep for the scalar queries (see _scalar_index())
+    #   "ts"       -- the list ts with its floats and intervals (0 if it has not been generated)
+    #   "memo"     -- the memoization tables memo_g_k, memo_h_k and memo_dexp_A
+    #   "object"   -- the instance itself
+    #   "total"    -- the sum of all entries except "mapped"
+    #
+    #
+    def memory_footprint(self):
+        nodes, kinds = self._index()
+
+        mapped = isinstance(nodes, np.memmap)
+        index = nodes.nbytes + kinds.nbytes
+
+        footprint = {
+            "index": 0 if mapped else index,
+            "mapped": index if mapped else 0,
+            "spare": 0 if self._node_buffer is None else self._node_buffer.nbytes + self._kind_buffer.nbytes - index,
+            "lookup": _deep_size(self._lookup[0]) + _deep_size(self._lookup[1]) if self._lookup is not None and type(self._lookup[0]) is list else 0,
+            "ts": 0 if self._ts is None else _deep_size(self._ts),
+            "memo": _deep_size(self.memo_g_k) + _deep_size(self.memo_h_k) + _deep_size(self.memo_dexp_A),
+            "object": sys.getsizeof(self)
+        }
+
+        footprint["total"] = sum(footprint.values()) - footprint["mapped"]
+
+        return footprint
+
+    #
+    #
+    # Incremental construction of the timescale.
+    #
+    # append_point(t) and append_interval(a, b) add a point or an interval after the largest value of the timescale in O(1) amortized time.
+    # insert(item) adds a point t or an interval [a, b] anywhere, which costs O(n) for moving the later entries.
+    # The new item is validated against its neighbours only (the constructor compares every pair of items), self.ts is updated in place
+    # and the index of the timescale is updated instead of being rebuilt.
+    #
+    # Only the entries of memo_g_k and memo_h_k whose range of integration overlaps the gap the new item was put into are removed;
+    # all other memoized values stay valid. The transition tables of dexp_A span the whole timescale and are always removed.
+    #
+    #
+    def append_point(self, t):
+        nodes = self._index()[0]
+
+        if len(nodes) > 0 and t <= nodes[-1]:
+            raise Exception("append_point(): t = " + str(t) + " is not greater than the largest value of the timescale.")
+
+        self.insert(t)
+
+    def append_interval(self, a, b):
+        nodes = self._index()[0]
+
+        if len(nodes) > 0 and a <= nodes[-1]:
+            raise Exception("append_interval(): a = " + str(a) + " is not greater than the largest value of the timescale.")
+
+        self.insert([a, b])
+
+    def insert(self, item):
+        nodes, kinds = self._index()
+
+        if isinstance(item, list):
+            if len(item) != 2:
+                raise Exception("insert(): an interval must have exactly one starting value and one ending value.")
+
+            if item[0] >= item[1]:
+                raise Exception("insert(): the starting value of an interval must be smaller than its ending value.")
+
+            new_nodes = [item[0], item[1]]
+            new_kinds = [_INTERVAL_START, _INTERVAL_END]
+
+        else:
+            new_nodes = [item]
+            new_kinds = [_POINT]
+
+        position = _search(nodes, new_nodes[0], "left")
+
+        if (position < len(nodes) and nodes[position] <= new_nodes[-1]) or (position > 0 and kinds[position - 1] == _INTERVAL_START):
+            raise Exception("insert(): " + str(item) + " overlaps with a value that is already in the timescale.")
+
+        predecessor = nodes[position - 1] if position > 0 else -np.inf
+        successor = nodes[position] if position < len(nodes) else np.inf
+
+        # Every interval before the new item occupies two nodes but only one entry of ts.
+        ts_position = position - int(np.count_nonzero(kinds[:position] == _INTERVAL_END))
+
+        # The list is only updated if it exists; otherwise it is generated from the updated index when it is needed.
+        if self._ts is not None:
+            if ts_position == len(self._ts):
+                self._ts.append(item)
+
+            else:
+                self._ts.insert(ts_position, item)
+
+        self._insert_nodes(position, new_nodes, new_kinds)
+        self._invalidate(predecessor, successor)
+
+    #
+    #
+    # Utility function used by insert().
+    # Inserts new nodes into the index at the given position. The index arrays are kept as views of buffers with spare capacity,
+    # so appending at the end does not copy the index.
+    #
+    #
+    def _insert_nodes(self, position, new_nodes, new_kinds):
+        size = len(self._nodes)
+        count = len(new_nodes)
+
+        if self._node_buffer is None or len(self._node_buffer) < size + count:
+            capacity = max(16, 2 * (size + count))
+
+            node_buffer = np.empty(capacity, dtype=self._nodes.dtype)
+            kind_buffer = np.empty(capacity, dtype=np.uint8)
+
+            node_buffer[:size] = self._nodes
+            kind_buffer[:size] = self._kinds
+
+            self._node_buffer = node_buffer
+            self._kind_buffer = kind_buffer
+
+        self._node_buffer[position + count:size + count] = self._node_buffer[position:size]
+        self._kind_buffer[position + count:size + count] = self._kind_buffer[position:size]
+
+        self._node_buffer[position:position + count] = new_nodes
+        self._kind_buffer[position:position + count] = new_kinds
+
+        self._nodes = self._node_buffer[:size + count]
+        self._kinds = self._kind_buffer[:size + count]
+        self._lookup = None
+        self._digest = None
+
+    #
+    #
+    # Utility function used by insert().
+    # Removes the memoized values that may have changed because a new item was put between the nodes "predecessor" and "successor".
+    # A value of g_k(k, t, s) or h_k(k, t, s) only depends on the timescale between s and t, so it stays valid unless that range overlaps the gap.
+    #
+    #
+    def _invalidate(self, predecessor, successor):
+        for memo in (self.memo_g_k, self.memo_h_k):
+            for key in list(memo):
+                k, t, s = key
+                lower, upper = sorted((t, s))
+
+                if lower < successor and upper > predecessor:
+                    del memo[key]
+
+        self.memo_dexp_A.clear()
+
+    #
+    #
+    # delta derivative
+    #
+    #
+    def dderivative(self,f,t):
+        if self.sigma(t) == t:
+            return misc.derivative(f, t, dx=(1.0/2**16))
+
+        else:
+            return (f(self.sigma(t))-f(t))/self.mu(t)
+
+    #
+    #
+    # nabla derivative
+    #
+    #
+    def nderivative(self,f,t):
+        return (f(t)-f(self.rho(t)))/self.nu(t)
+
+    #
+    #
+    # delta integral
+    #
+    #
+    @_instrumented("dintegral")
+    def dintegral(self, f, t, s, throwExceptions = True):
+        # The following code checks that t and s are elements of the timescale
+
+        tIsAnElement = self.isInTimescale(t)
+        sIsAnElement = self.isInTimescale(s)
+
+        errorOccurred = False
+        message = ""
+
+        if not tIsAnElement and not sIsAnElement:
+            message = "The bounds of the dintegral function, t = " + str(t) + " and s = " + str(s) + ", are not elements of the timescale."
+            errorOccurred = True
+
+        elif not tIsAnElement:
+            message = "The upper bound of dintegral function, t = " + str(t) + ", is not an element of timescale."
+            errorOccurred = True
+
+        elif not sIsAnElement:
+            message = "The lower bound of dintegral function, s = " + str(s) + ", is not an element of timescale."
+            errorOccurred = True
+
+        if errorOccurred:
+            if throwExceptions:
+                raise Exception(message)
+            
+            else:
+                print("Warning: " + message)
+
+        # Validation code ends
+
+        if self._instrumentation is not None:
+            f = self._instrumentation.counted(f, "integrand.evaluations")
+
+        # The right scattered points in [s, t) and the parts of the intervals between s and t are found with binary searches in the index of the timescale.
+        nodes, kinds = self._index()
+
+        first = _search(nodes, s, "left")
+        last = _search(nodes, t, "left")
+
+        k = np.arange(first, max(first, last))
+        scattered = k[kinds[k] != _INTERVAL_START]
+
+        points = nodes[scattered]
+        graininess = np.where(scattered + 1 < len(nodes), nodes[np.minimum(scattered + 1, len(nodes) - 1)] - nodes[scattered], 0)
+
+        intervals = []
+
+        # The interval that contains s (if there is one) ...
+        if first > 0 and kinds[first - 1] == _INTERVAL_START:
+            first = first - 1
+
+        if s > t:
+            # ... is the only one that contributes if s > t.
+            if first < len(nodes) and kinds[first] == _INTERVAL_START and nodes[first] <= s < nodes[first + 1] and t < nodes[first + 1]:
+                intervals.append([s, t])
+
+        else:
+            # ... and the intervals that start between s and t.
+            k = np.arange(first, min(_search(nodes, t, "right"), len(nodes)))
+
+            for i in k[kinds[k] == _INTERVAL_START].tolist():
+                intervals.append([max(float(nodes[i]), s), min(float(nodes[i + 1]), t)])
+
+        if _is_jitted(f):
+            # The points are summed in a compiled loop, the quadrature evaluates f at mpmath numbers and uses the Python function.
+            sumOfIntegratedPoints = _jit_kernel(_weighted_sum_kernel)(f, points.astype(float), graininess.astype(float))
+            f = f.py_func
+
+            if self._instrumentation is not None:
+                self._instrumentation.count("integrand.evaluations", len(points))
+                f = self._instrumentation.counted(f, "integrand.evaluations")
+
+        else:
+            sumOfIntegratedPoints = sum([mu*f(x) for mu, x in zip(graininess.tolist(), points.tolist())])
+
+        sumOfIntegratedIntervals = sum([self.integrate_complex(f, x[0], x[1]) for x in intervals])
+
+        return sum([sumOfIntegratedPoints, sumOfIntegratedIntervals])
+
+    #
+    #
+    # Utility function to integrate potentially infinite timescale sections of points and intervals.
+    #
+    #
+    def compute_potentially_infinite_timescale(self, f, ts_generator_function, ts_generator_arguments):    
         print("ts_generator_arguments =", ts_generator_arguments)
         print()
-        
-        def wrapper_function(ts_gen_arg):
+                
+        # The following argument "ts_gen_arg_mpf" has "mpf" on the end because the mpmath package passes "mpf" objects to this function as part of the nsum() function's design.
+        # These objects are converted to floats via the line: ts_gen_arg = float(mpmath.nstr(ts_gen_arg_mpf, n=15)).
+        # This conversion enables us to integrate/solve as usual for the generated points/intervals.
+        def wrapper_function(ts_gen_arg_mpf):
+            ts_gen_arg = float(mpmath.nstr(ts_gen_arg_mpf, n=15))
             ts_item = ts_generator_function(ts_gen_arg)
             next_ts_item = ts_generator_function(ts_gen_arg + 1)
             self.validate_generated_timescale_value_pair(ts_item, next_ts_item, ts_generator_function)
                        
             print("wrapper_function: ts_gen_arg =", ts_gen_arg)
             print("wrapper_function: ts_generator_arguments =", ts_generator_arguments)
-            print("wrapper_function: t_target =", t_target)
             print("wrapper_function: ts_item =", ts_item)
             print("wrapper_function: next_ts_item =", next_ts_item)
-                       
+            
             if isinstance(ts_item, list):
                 print("wrapper_function: integrating over interval")
                 
-                if ts_item[0] > t_target:
-                    raise Exception("ts_item[0] = " + str(ts_item[0]) + " was greater than t_target = " + str(t_target) + " -- the timescale does not contain t_target")
-                
-                if t_target > ts_item[1]:
-                    interval_result = self.integrate_complex(f, ts_item[0], ts_item[1])
-                
-                else:
-                    interval_result = self.integrate_complex(f, ts_item[0], t_target)
-
-                    print("*****wrapper_function: t_target <= ts_item[1] -> RETURNING interval_result =", interval_result)
-                    
-                    return {"result" : interval_result, "found_t_target" : True}
+                interval_result = self.integrate_complex(f, ts_item[0], ts_item[1])
                 
                 step_after_interval = 0.0                
                 
@@ -401,18 +1752,11 @@ class timescale:
                 print("*****wrapper_function: RETURNING interval_result + step_after_interval =", interval_result + step_after_interval)
                 print()
                 
-                if t_target == next_ts_item:
-                    return {"result" : interval_result + step_after_interval, "found_t_target" : True}
-                    
-                else:
-                    return {"result" : interval_result + step_after_interval, "found_t_target" : False}
+                return interval_result + step_after_interval
             
             else:
                 print("wrapper_function: calculating discrete value")
                 
-                if ts_item > t_target:
-                    raise Exception("ts_item = " + str(ts_item) + " was greater than t_target = " + str(t_target) + " -- the timescale does not contain t_target")
-                
                 discrete_result = 0.0
                 
                 if ts_generator_arguments[1] > ts_gen_arg:                    
@@ -424,15 +1768,10 @@ class timescale:
                 print("*****wrapper_function: RETURNING discrete result value =", discrete_result)
                 print()
                 
-                if t_target == ts_item:
-                    return {"result" : discrete_result, "found_t_target" : True}
-                    
-                else:
-                    return {"result" : discrete_result, "found_t_target" : False}
+                return discrete_result
         
-        result = self.special_sum_function(f, t_target, t_0, wrapper_function, ts_generator_function, ts_generator_arguments, prior_results_significance_count = signif_count, significance_limit = signif_threshold, increasing_always_signif = increasing_always_signif)
+        result = mpmath.nsum(wrapper_function, ts_generator_arguments)
         
-        print()
         print("----RESULT----")
         print()
         
@@ -440,21 +1779,132 @@ class timescale:
 
     #
     #
-    # This function is used by the compute_potentially_infinite_timescale_for_t() function of this class.
-    # It is responsible for summing the results obtained from solving discrete points and intervals in a generated timescale.
-    # It is a "special" function because, in addition to summing, it also checks -- via the insignificant_prior_results() function -- the values of the previous n=prior_results_significance_count calculated values.
-    # Calculated values that are below the significance_limit are considered "insignificant" -- if all n previously
-    # calculated values are "insignificant", the special_sum_function() return the current result along with a warning message.
-    # The reasoning behind having a significance_limit is so that an overflow is less likely to occur -- if result values are allowed to indefinitely become smaller, then it is likely that the precision limit on the float
-    # data type is reached which results in an overflow error.
-    # See the description of the insignificant_prior_results() function for more information.
+    # Utility function to integrate a generated timescale section of points and intervals for t. 
+    # Arguments:
+    #   f: The function with which to solve the timescale for a particular target value = t.
     #
+    #   t_0: The timescale value from which to begin solving.
     #
-    def special_sum_function(self, f, t_target, t_0, wrapper_function, ts_generator_function, ts_generator_arguments, prior_results_significance_count, significance_limit, increasing_always_signif):
-        result = 0.0
-        iteration = 0
-        ts_generator_arg = ts_generator_arguments[0]
-        iterations_limit = ts_generator_arguments[1] - ts_generator_arguments[0]
+    #   t_target: The timescale value for which to solve.
+    #
+    #   ts_generator_function: The function that, when it is fed values where, for any value n, ts_generator_arguments[0] <= n <= ts_generator_arguments[1] is True AND (n_(m+1) - n_m) = 1.
+    #                          In other words: the difference between two consecutive n-values is always 1.
+    #
+    #   ts_generator_arguments: A list of two numbers of the form [start, end] where start is the first value fed to the ts_generator_function and end is the last value fed to that same function.
+    #                           As mentioned before, the different between any two consecutive numbers between start and end is always 1 -- this is purely a method for generating the timescale.
+    #                           As an example: if ts_generator_arguments = [1, 4], then ts_generator_function will be fed the following values in the listed order: 1, 2, 3, 4.
+    #                           That ts_generator_function will then return, for each value fed to it, a particular timescale section. 
+    #                           compute_potentially_infinite_timescale_for_t() will then solve over these sections.
+    #
+    #   signif_count: How many previously calcuated values (that are obtained from solving integrals or discrete points) to check the "significance" of -- see "signif_threshold" for more information.
+    #
+    #   signif_threshold: The value that a particular calculated value (from solving an integral or discrete point) must be below to be considered "insignificant".
+    #                     If m=signif_count previously calculated values are all below this signif_threshold, then the compute_potentially_infinite_timescale_for_t() function will
+    #                     return the current result sum with a warning message.
+    #
+    #   increasing_always_signif: If this boolean is True: when insignificant_prior_results() detects that result values seem to be increasing (when they were decreasing before),
+    #                             it will not consider them to be insignificant even if all are below the signif_threshold.
+    #
+    #
+    def compute_potentially_infinite_timescale_for_t(self, f, t_target, t_0, ts_generator_function, ts_generator_arguments, signif_count = 10, signif_threshold = 0.0000001, increasing_always_signif = True):    
+        print("ts_generator_arguments =", ts_generator_arguments)
+        print()
+        
+        def wrapper_function(ts_gen_arg):
+            ts_item = ts_generator_function(ts_gen_arg)
+            next_ts_item = ts_generator_function(ts_gen_arg + 1)
+            self.validate_generated_timescale_value_pair(ts_item, next_ts_item, ts_generator_function)
+                       
+            print("wrapper_function: ts_gen_arg =", ts_gen_arg)
+            print("wrapper_function: ts_generator_arguments =", ts_generator_arguments)
+            print("wrapper_function: t_target =", t_target)
+            print("wrapper_function: ts_item =", ts_item)
+            print("wrapper_function: next_ts_item =", next_ts_item)
+                       
+            if isinstance(ts_item, list):
+                print("wrapper_function: integrating over interval")
+                
+                if ts_item[0] > t_target:
+                    raise Exception("ts_item[0] = " + str(ts_item[0]) + " was greater than t_target = " + str(t_target) + " -- the timescale does not contain t_target")
+                
+                if t_target > ts_item[1]:
+                    interval_result = self.integrate_complex(f, ts_item[0], ts_item[1])
+                
+                else:
+                    interval_result = self.integrate_complex(f, ts_item[0], t_target)
+
+                    print("*****wrapper_function: t_target <= ts_item[1] -> RETURNING interval_result =", interval_result)
+                    
+                    return {"result" : interval_result, "found_t_target" : True}
+                
+                step_after_interval = 0.0                
+                
+                if ts_generator_arguments[1] > ts_gen_arg:                
+                    if isinstance(next_ts_item, list):
+                        next_ts_item = next_ts_item[0]
+                        
+                    step_after_interval = (next_ts_item - ts_item[1]) * f(ts_item[1])
+                
+                print("interval_result =", interval_result)
+                print("step_after_interval =", step_after_interval)
+                
+                print("*****wrapper_function: RETURNING interval_result + step_after_interval =", interval_result + step_after_interval)
+                print()
+                
+                if t_target == next_ts_item:
+                    return {"result" : interval_result + step_after_interval, "found_t_target" : True}
+                    
+                else:
+                    return {"result" : interval_result + step_after_interval, "found_t_target" : False}
+            
+            else:
+                print("wrapper_function: calculating discrete value")
+                
+                if ts_item > t_target:
+                    raise Exception("ts_item = " + str(ts_item) + " was greater than t_target = " + str(t_target) + " -- the timescale does not contain t_target")
+                
+                discrete_result = 0.0
+                
+                if ts_generator_arguments[1] > ts_gen_arg:                    
+                    if isinstance(next_ts_item, list):
+                        next_ts_item = next_ts_item[0]
+                    
+                    discrete_result = (next_ts_item - ts_item) * f(ts_item)
+                
+                print("*****wrapper_function: RETURNING discrete result value =", discrete_result)
+                print()
+                
+                if t_target == ts_item:
+                    return {"result" : discrete_result, "found_t_target" : True}
+                    
+                else:
+                    return {"result" : discrete_result, "found_t_target" : False}
+        
+        result = self.special_sum_function(f, t_target, t_0, wrapper_function, ts_generator_function, ts_generator_arguments, prior_results_significance_count = signif_count, significance_limit = signif_threshold, increasing_always_signif = increasing_always_signif)
+        
+        print()
+        print("----RESULT----")
+        print()
+        
+        return result
+
+    #
+    #
+    # This function is used by the compute_potentially_infinite_timescale_for_t() function of this class.
+    # It is responsible for summing the results obtained from solving discrete points and intervals in a generated timescale.
+    # It is a "special" function because, in addition to summing, it also checks -- via the insignificant_prior_results() function -- the values of the previous n=prior_results_significance_count calculated values.
+    # Calculated values that are below the significance_limit are considered "insignificant" -- if all n previously
+    # calculated values are "insignificant", the special_sum_function() return the current result along with a warning message.
+    # The reasoning behind having a significance_limit is so that an overflow is less likely to occur -- if result values are allowed to indefinitely become smaller, then it is likely that the precision limit on the float
+    # data type is reached which results in an overflow error.
+    # See the description of the insignificant_prior_results() function for more information.
+    #
+    #
+    def special_sum_function(self, f, t_target, t_0, wrapper_function, ts_generator_function, ts_generator_arguments, prior_results_significance_count, significance_limit, increasing_always_signif):
+        result = 0.0
+        iteration = 0
+        ts_generator_arg = ts_generator_arguments[0]
+        iterations_limit = ts_generator_arguments[1] - ts_generator_arguments[0]
         found_t_target = False
 
         print("iterations_limit =", iterations_limit)
@@ -754,17 +2204,42 @@ class timescale:
     #
     #
     # Utility function to integrate potentially complex functions.
+    # The real and the imaginary part are integrated separately. f is evaluated once per quadrature node: the values from the
+    # quadrature of the real part are reused for the imaginary part, which is only integrated if f was not real at every node.
     #
     #
+    @_instrumented("integrate_complex")
     def integrate_complex(self, f, s, t, **kwargs):
+        values = {}
+        imaginary = [False]
+
+        def evaluate(t):
+            value = values.get(t, _MISSING)
+
+            if value is _MISSING:
+                value = values[t] = f(t)
+
+                if self._instrumentation is not None:
+                    self._instrumentation.count("quadrature.nodes")
+
+                if np.imag(value) != 0:
+                    imaginary[0] = True
+
+            return value
+
         def real_component(t):
-            return np.real(f(t))
+            return np.real(evaluate(t))
             
         def imaginary_component(t):
-            return np.imag(f(t))
-        
-        real_result = float(mpmath.nstr(mpmath.quad(real_component, [s, t], **kwargs), n=15))
-        imaginary_result = float(mpmath.nstr(mpmath.quad(imaginary_component, [s, t], **kwargs), n=15))
+            return np.imag(evaluate(t))
+
+        context = _mpmath_context()
+
+        real_result = float(context.nstr(context.quad(real_component, [s, t], **kwargs), n=15))
+        imaginary_result = float(context.nstr(context.quad(imaginary_component, [s, t], **kwargs), n=15)) if imaginary[0] else 0.0
+
+        if self._instrumentation is not None:
+            self._instrumentation.count("quadrature.calls", 2 if imaginary[0] else 1)
         
         if imaginary_result == 0:
             return real_result
@@ -777,25 +2252,22 @@ class timescale:
     # Generalized g_k polynomial from page 38 with memoization.
     #
     #
+    @_instrumented("g_k")
     def g_k(self, k, t, s):
         if (k < 0):
             raise Exception("g_k(): k should never be less than 0!")
 
         elif (k != 0):
-            currentKey = str(k) + ":" + str(t) + ":" + str(s)
-
-            if currentKey in self.memo_g_k:
-                return self.memo_g_k[currentKey]
-
-            else:
-                def g(x):
-                   return self.g_k(k - 1, self.sigma(x), s)
+            currentKey = (k, t, s)
 
-                integralResult = self.dintegral(g, t, s, throwExceptions = False)
+            if self._instrumentation is not None:
+                self._instrumentation.count("memo_g_k.hits" if currentKey in self.memo_g_k else "memo_g_k.misses")
 
-                self.memo_g_k[currentKey] = integralResult
+            def g(x):
+                return self.g_k(k - 1, self.sigma(x), s)
 
-                return integralResult
+            # If another thread is computing the same value, compute() waits for its result.
+            return self.memo_g_k.compute(currentKey, lambda: self._persisted("g_k", self._persisted_parameters(k, t, s), lambda: self.dintegral(g, t, s, throwExceptions = False)))
 
         elif (k == 0):
             return 1
@@ -805,27 +2277,22 @@ class timescale:
     # Generalized h_k polynomial from page 38 with memoization.
     #
     #
+    @_instrumented("h_k")
     def h_k(self, k, t, s):
         if (k < 0):
             raise Exception("h_k(): k should never be less than 0!")
 
         elif (k != 0):
-            currentKey = str(k) + ":" + str(t) + ":" + str(s)
-
-            if currentKey in self.memo_h_k:
-                return self.memo_h_k[currentKey]
+            currentKey = (k, t, s)
 
-            else:
-                def h(x):
-                    return self.h_k(k - 1, x, s)
-                
-                # print("h_k: t =", t)
-                
-                integralResult = self.dintegral(h, t, s, throwExceptions = False)
+            if self._instrumentation is not None:
+                self._instrumentation.count("memo_h_k.hits" if currentKey in self.memo_h_k else "memo_h_k.misses")
 
-                self.memo_h_k[currentKey] = integralResult
+            def h(x):
+                return self.h_k(k - 1, x, s)
 
-                return integralResult
+            # If another thread is computing the same value, compute() waits for its result.
+            return self.memo_h_k.compute(currentKey, lambda: self._persisted("h_k", self._persisted_parameters(k, t, s), lambda: self.dintegral(h, t, s, throwExceptions = False)))
 
         elif (k == 0):
             return 1
@@ -844,20 +2311,126 @@ class timescale:
 
     #
     #
-    # Delta exponential based on definition 2.30
+    # Delta exponential based on definition 2.30: e_p(t, s) = exp(delta integral of cyl(tau, p(tau)) from s to t), and e_p(t, s) = 1/e_p(s, t) for t < s.
     #
     #
+    @_instrumented("dexp_p")
     def dexp_p(self, p, t, s):
+        if t < s:
+            return 1 / self.dexp_p(p, s, t)
+
         def f(t):
-            if(t>s):
-                return self.cyl(t, p(t))
-            elif(t==s):
-                return 1.0
-            else:
-                return self.dexp_p(p, s, t)
-               
+            return self.cyl(t, p(t))
+
         return np.exp(self.dintegral(f, t, s))
 
+    #
+    #
+    # Matrix valued delta exponential e_A(t, s), i.e. the transition matrix of the linear system y^Delta = A(t)*y from s to t.
+    # On right scattered points it is the product of the matrices (I + mu*A) and on intervals it is obtained from scipy.linalg.expm
+    # (constant A) or from the integrated transition matrix (see solve_linear_system_for_t()).
+    #
+    # The first call for a given A computes the transition matrix of every step of the timescale and stores their products in a
+    # segment tree in the memo_dexp_A data member. Afterwards e_A(t, s) for any pair of values only needs about 2*log2(n) cached
+    # matrix multiplications, plus an expm/integration for the parts of the intervals that contain t or s.
+    #
+    # "A" is either a constant d x d matrix or a function A(t) that returns a d x d matrix. The table of a constant matrix is cached under
+    # its values. The table of a function is only cached if "key" is given: a hashable value that identifies the function together with
+    # everything it depends on (for instance the tuple of the parameters of a closure), so that a changed function is not given the table of
+    # the old one. Without a key the table is built for this call only. At most _TRANSITION_TABLE_LIMIT tables are kept; the oldest ones are removed.
+    # "vectorized" lets the function be called with arrays, as for solve_linear_system_for_t(). For t < s the inverse matrix e_A(s, t)^(-1) is returned.
+    #
+    #
+    def dexp_A(self, A, t, s, vectorized=False, key=None):
+        if not self.isInTimescale(t) or not self.isInTimescale(s):
+            raise Exception("dexp_A: t = " + str(t) + " and s = " + str(s) + " must be values in the timescale.")
+
+        if t < s:
+            return np.linalg.inv(self.dexp_A(A, s, t, vectorized, key))
+
+        table = self._transition_table(A, vectorized, key)
+        boundaries = table["boundaries"]
+        d = table["d"]
+
+        i = np.searchsorted(boundaries, s, side="left")
+        j = np.searchsorted(boundaries, t, side="right") - 1
+
+        # s and t lie inside of the same interval segment.
+        if i > j:
+            return self._interval_transition(A, s, t, d)
+
+        head = np.eye(d) if boundaries[i] == s else self._interval_transition(A, s, boundaries[i], d)
+        tail = np.eye(d) if boundaries[j] == t else self._interval_transition(A, boundaries[j], t, d)
+
+        return tail @ _tree_product(table["tree"], table["size"], i, j) @ head
+
+    #
+    #
+    # Utility function used by dexp_A().
+    # Builds (once per A, see dexp_A() for the cache) the segment tree of the transition matrices of all steps of the timescale.
+    # The leaves are the transition matrices of the steps between consecutive boundaries, and every inner node holds the ordered product of its two children.
+    #
+    #
+    def _transition_table(self, A, vectorized=False, key=None):
+        if callable(A):
+            d = np.asarray(A(self._first()), dtype=float).shape[0]
+
+            if key is None:
+                return self._build_transition_table(A, d, vectorized)
+
+            return self._remember_table(("function", key), lambda: self._build_transition_table(A, d, vectorized))
+
+        A = np.asarray(A, dtype=float)
+        d = A.shape[0]
+
+        # Only the tables of constant matrices are persisted (see persist()); a function A has no identity that outlives the process.
+        parameters = "x".join(str(n) for n in A.shape) + ":" + hashlib.sha256(A.astype("<f8", copy=False).tobytes()).hexdigest()
+
+        return self._remember_table(("constant", A.shape, A.tobytes()), lambda: self._persisted("dexp_A", parameters, lambda: self._build_transition_table(A, d, vectorized)))
+
+    #
+    # Returns the table for key from memo_dexp_A, building it if needed, and removes the oldest tables beyond _TRANSITION_TABLE_LIMIT.
+    #
+    def _remember_table(self, key, build):
+        table = self.memo_dexp_A.compute(key, build)
+
+        while len(self.memo_dexp_A) > _TRANSITION_TABLE_LIMIT:
+            self.memo_dexp_A.pop(next(iter(self.memo_dexp_A), None), None)
+
+        return table
+
+    def _build_transition_table(self, A, d, vectorized=False):
+        segments = self._segments(self._first(), self._last(), "dexp_A")
+        leaves = np.empty((len(segments), d, d))
+
+        points = [k for k, segment in enumerate(segments) if segment[0] == "point"]
+
+        if points:
+            times = np.array([segments[k][1] for k in points], dtype=float)
+            mus = np.array([segments[k][2] for k in points], dtype=float) - times
+            leaves[points] = np.eye(d) + mus[:, None, None] * _evaluate_matrices(A, times, d, vectorized)
+
+        for k, (kind, a, b) in enumerate(segments):
+            if kind == "interval":
+                leaves[k] = self._interval_transition(A, a, b, d)
+
+        size = 1
+
+        while size < len(segments):
+            size = size * 2
+
+        tree = np.empty((2 * size, d, d))
+        tree[size:] = np.eye(d)
+        tree[size:size + len(segments)] = leaves
+
+        level = size
+
+        while level > 1:
+            tree[level // 2:level] = tree[level + 1:2 * level:2] @ tree[level:2 * level:2]
+            level = level // 2
+
+        return {"boundaries": np.array([self._first()] + [segment[2] for segment in segments], dtype=float), "tree": tree, "size": size, "d": d}
+
     #
     #
     # forward circle minus
@@ -907,11 +2480,12 @@ class timescale:
     # The Laplace transform function.
     #
     #
+    @_instrumented("laplace_transform")
     def laplace_transform(self, f, z, s):
         def g(t):
             return f(t) * self.dexp_p(lambda t: self.mucircleminus(z, t), self.sigma(t), s)
 
-        return self.dintegral(g, max(self.ts), s)
+        return self.dintegral(g, self._last(), s)
 
     #
     #
@@ -948,6 +2522,7 @@ class timescale:
     # Currently, t_target > t_0 is a requirement -- solving for a t_target < t_0 is not supported.
     #
     #
+    @_instrumented("solve_ode_for_t")
     def solve_ode_for_t(self, y_0, t_0, t_target, y_prime): # Note: y(t_0) = y_0
         # print("solve_ode_for_t arguments:")
         # print("y_0 =", y_0)
@@ -958,40 +2533,8 @@ class timescale:
         # The following is more validation code -- this is very similar to the validation code in the dIntegral function.
         #----------------------------------------------------------------------------#
         
-        t_in_ts = False
-        t_0_in_ts = False
-        discretePoint = False
-        
-        for x in self.ts:
-            if not isinstance(x, list) and t_target == x:
-                t_in_ts = True
-                
-            if not isinstance(x, list) and t_0 == x: 
-                discretePoint = True
-                t_0_in_ts = True
-            
-            if isinstance(x, list) and t_target <= x[1] and t_target >= x[0]:
-                t_in_ts = True
-            
-            if isinstance(x, list) and t_0 < x[1] and t_0 >= x[0]:
-                discretePoint = False
-                t_0_in_ts = True
-                
-            if isinstance(x, list) and t_0 == x[1]:
-                discretePoint = True
-                t_0_in_ts = True
-            
-            if t_in_ts and t_0_in_ts:                
-                break
-        
-        if t_in_ts and not t_0_in_ts:
-            raise Exception("solve_ode_for_t: t_0 is not a value in the timescale.")
-        
-        if not t_in_ts and t_0_in_ts:
-            raise Exception("solve_ode_for_t: t_target is not a value in the timescale.")
-        
-        if not t_in_ts and not t_0_in_ts:
-            raise Exception("solve_ode_for_t: t_0 and t_target are not values in the timescale.")
+        cursor = self._solver_cursor(t_0, t_target, "solve_ode_for_t")
+        discretePoint = cursor.kind == "point" or cursor.kind == "end"
         
         if t_0 == t_target:
             return y_0
@@ -1004,23 +2547,37 @@ class timescale:
         t_current = t_0
         y_current = y_0
         
-        ODE = integrate.ode(y_prime)
+        # The intervals are integrated with the Python version of a right-hand side that is compiled with numba (see njit()).
+        ODE = integrate.ode(y_prime.py_func if _is_jitted(y_prime) else y_prime)
         
         while self.isInTimescale(t_current): # Technically safer than "while True:"
             if discretePoint:                
+                if self._instrumentation is not None:
+                    self._instrumentation.count("solve_ode_for_t.steps.point")
+
+                if _is_jitted(y_prime):
+                    y_current = self._discrete_run(cursor, t_target, y_prime, y_current if isinstance(y_current, np.ndarray) else float(y_current), _euler_kernel, "solve_ode_for_t")
+                    t_current = cursor.t
+
+                    if t_target == t_current:
+                        return y_current
+
+                    discretePoint = False
+                    continue
+
                 # print("Solving right scattered point where:")
                 # print("t_current =", t_current)
                 # print("y_current =", y_current)
                 # print("t_target =", t_target)
                 # print("y_prime(t_current, y_current) =", y_prime(t_current, y_current))
-                # print("self.mu(t_current) =", self.mu(t_current))
+                # print("cursor.mu =", cursor.mu)
                 # print()            
   
-                y_sigma_of_t_current = y_current + y_prime(t_current, y_current) * self.mu(t_current)
+                y_sigma_of_t_current = y_current + y_prime(t_current, y_current) * cursor.mu
                 
-                t_next = self.sigma(t_current)
+                t_next = cursor.forward()
                 
-                # print("t_next = self.sigma(t_current) =", t_next)
+                # print("t_next = cursor.forward() =", t_next)
                 # print()                
                 # print("Result:")
                 # print("y_sigma_of_t_current =", y_sigma_of_t_current)
@@ -1030,7 +2587,7 @@ class timescale:
                     # print("t_target == t_next -> returning y_sigma_of_t_current\n")
                     return y_sigma_of_t_current
                 
-                if self.isDiscretePoint(t_next):
+                if cursor.kind == "point":
                     discretePoint = True
                     # print("[NEXT IS DISCRETE POINT]")
                     
@@ -1042,6 +2599,9 @@ class timescale:
                 y_current = y_sigma_of_t_current                
                                 
             else:
+                if self._instrumentation is not None:
+                    self._instrumentation.count("solve_ode_for_t.steps.interval")
+
                 # print("Solving right dense point where:")                    
                 # print("t_current =", t_current)
                 # print("y_current =", y_current)
@@ -1050,11 +2610,11 @@ class timescale:
                                       
                 ODE.set_initial_value(y_current, t_current)
                 
-                if self.isDiscretePoint(t_current):
+                if cursor.kind == "point":
                     raise Exception("t_current is NOT in a list/interval! Something went wrong!")
                 
                 else:
-                    interval_of_t_current = self.getCorrespondingInterval(t_current)
+                    interval_of_t_current = cursor.interval
                     
                     # print("Integration conditions:")
                     # print("t_current =", t_current)
@@ -1080,7 +2640,7 @@ class timescale:
                         # print("ODE_integration_result =", ODE_integration_result)
                         # print()
                         
-                        t_current = interval_of_t_current[1]
+                        t_current = cursor.forward()
                         y_current = ODE_integration_result
                         
                         # print("[NEXT IS DISCRETE POINT]")
@@ -1103,6 +2663,7 @@ class timescale:
     # If y_prime(t, y) is provided, nonsensical results will be returned since the wrong values will be plugged into y and t.
     #
     #
+    @_instrumented("solve_ode_for_t_with_odeint")
     def solve_ode_for_t_with_odeint(self, y_0, t_0, t_target, y_prime, stepSize = 0.0001): # Note: y(t_0) = y_0
         # print("solve_ode_for_t arguments:")
         # print("y_0 =", y_0)
@@ -1113,40 +2674,8 @@ class timescale:
         # The following is more validation code -- this is very similar to the validation code in the dIntegral function.
         #----------------------------------------------------------------------------#
         
-        t_in_ts = False
-        t_0_in_ts = False
-        discretePoint = False
-        
-        for x in self.ts:
-            if not isinstance(x, list) and t_target == x:
-                t_in_ts = True
-                
-            if not isinstance(x, list) and t_0 == x: 
-                discretePoint = True
-                t_0_in_ts = True
-            
-            if isinstance(x, list) and t_target <= x[1] and t_target >= x[0]:
-                t_in_ts = True
-            
-            if isinstance(x, list) and t_0 < x[1] and t_0 >= x[0]:
-                discretePoint = False
-                t_0_in_ts = True
-                
-            if isinstance(x, list) and t_0 == x[1]:
-                discretePoint = True
-                t_0_in_ts = True
-            
-            if t_in_ts and t_0_in_ts:                
-                break
-        
-        if t_in_ts and not t_0_in_ts:
-            raise Exception("solve_ode_for_t_with_odeint: t_0 is not a value in the timescale.")
-        
-        if not t_in_ts and t_0_in_ts:
-            raise Exception("solve_ode_for_t_with_odeint: t_target is not a value in the timescale.")
-        
-        if not t_in_ts and not t_0_in_ts:
-            raise Exception("solve_ode_for_t_with_odeint: t_0 and t_target are not values in the timescale.")
+        cursor = self._solver_cursor(t_0, t_target, "solve_ode_for_t_with_odeint")
+        discretePoint = cursor.kind == "point" or cursor.kind == "end"
         
         if t_0 == t_target:
             return y_0
@@ -1161,19 +2690,22 @@ class timescale:
                
         while self.isInTimescale(t_current):
             if discretePoint:                
+                if self._instrumentation is not None:
+                    self._instrumentation.count("solve_ode_for_t_with_odeint.steps.point")
+
                 # print("Solving right scattered point where:")
                 # print("t_current =", t_current)
                 # print("y_current =", y_current)
                 # print("t_target =", t_target)
                 # print("y_prime(y_current, t_current) =", y_prime(y_current, t_current))
-                # print("self.mu(t_current) =", self.mu(t_current))
+                # print("cursor.mu =", cursor.mu)
                 # print()            
   
-                y_sigma_of_t_current = y_current + y_prime(y_current, t_current) * self.mu(t_current)
+                y_sigma_of_t_current = y_current + y_prime(y_current, t_current) * cursor.mu
                 
-                t_next = self.sigma(t_current)
+                t_next = cursor.forward()
                 
-                # print("t_next = self.sigma(t_current) =", t_next)
+                # print("t_next = cursor.forward() =", t_next)
                 # print()                
                 # print("Result:")
                 # print("y_sigma_of_t_current =", y_sigma_of_t_current)
@@ -1183,7 +2715,7 @@ class timescale:
                     # print("t_target == t_next -> returning y_sigma_of_t_current\n")
                     return y_sigma_of_t_current
                 
-                if self.isDiscretePoint(t_next):
+                if cursor.kind == "point":
                     discretePoint = True
                     # print("[NEXT IS DISCRETE POINT]")
                     
@@ -1195,17 +2727,20 @@ class timescale:
                 y_current = y_sigma_of_t_current                
                                 
             else:
+                if self._instrumentation is not None:
+                    self._instrumentation.count("solve_ode_for_t_with_odeint.steps.interval")
+
                 # print("Solving right dense point where:")                    
                 # print("t_current =", t_current)
                 # print("y_current =", y_current)
                 # print("t_target =", t_target)
                 # print()
                 
-                if self.isDiscretePoint(t_current):
+                if cursor.kind == "point":
                     raise Exception("t_current is NOT in a list/interval! Something went wrong!")
                 
                 else:
-                    interval_of_t_current = self.getCorrespondingInterval(t_current)
+                    interval_of_t_current = cursor.interval
                     
                     # print("Integration conditions:")
                     # print("t_current =", t_current)
@@ -1245,7 +2780,7 @@ class timescale:
                         # print("ODE_integration_result =", ODE_integration_result)
                         # print()
                         
-                        t_current = interval_of_t_current[1]
+                        t_current = cursor.forward()
                         y_current = ODE_integration_result
                         
                         # print("[NEXT IS DISCRETE POINT]")
@@ -1277,6 +2812,7 @@ class timescale:
     # NOTE: If the number of items in y_0 is not the same as the number of equations in y_prime, then this solver will fail.
     #
     #
+    @_instrumented("solve_ode_system_for_t")
     def solve_ode_system_for_t(self, y_0, t_0, t_target, y_prime, stepSize = 0.0001): # Note: y(t_0) = y_0
         # print("solve_ode_for_t arguments:")
         # print("y_0 =", y_0)
@@ -1287,40 +2823,8 @@ class timescale:
         # The following is more validation code -- this is very similar to the validation code in the dIntegral function.
         #----------------------------------------------------------------------------#
         
-        t_in_ts = False
-        t_0_in_ts = False
-        discretePoint = False
-        
-        for x in self.ts:
-            if not isinstance(x, list) and t_target == x:
-                t_in_ts = True
-                
-            if not isinstance(x, list) and t_0 == x: 
-                discretePoint = True
-                t_0_in_ts = True
-            
-            if isinstance(x, list) and t_target <= x[1] and t_target >= x[0]:
-                t_in_ts = True
-            
-            if isinstance(x, list) and t_0 < x[1] and t_0 >= x[0]:
-                discretePoint = False
-                t_0_in_ts = True
-                
-            if isinstance(x, list) and t_0 == x[1]:
-                discretePoint = True
-                t_0_in_ts = True
-            
-            if t_in_ts and t_0_in_ts:                
-                break
-        
-        if t_in_ts and not t_0_in_ts:
-            raise Exception("solve_ode_system_for_t: t_0 is not a value in the timescale.")
-        
-        if not t_in_ts and t_0_in_ts:
-            raise Exception("solve_ode_system_for_t: t_target is not a value in the timescale.")
-        
-        if not t_in_ts and not t_0_in_ts:
-            raise Exception("solve_ode_system_for_t: t_0 and t_target are not values in the timescale.")
+        cursor = self._solver_cursor(t_0, t_target, "solve_ode_system_for_t")
+        discretePoint = cursor.kind == "point" or cursor.kind == "end"
         
         if t_0 == t_target:
             return y_0
@@ -1332,22 +2836,38 @@ class timescale:
                 
         t_current = t_0
         y_current = y_0
+
+        # The intervals are integrated with the Python version of a right-hand side that is compiled with numba (see njit()).
+        interval_prime = y_prime.py_func if _is_jitted(y_prime) else y_prime
                
         while self.isInTimescale(t_current):
             if discretePoint:                
+                if self._instrumentation is not None:
+                    self._instrumentation.count("solve_ode_system_for_t.steps.point")
+
+                if _is_jitted(y_prime):
+                    y_current = self._discrete_run(cursor, t_target, y_prime, np.array(y_current, dtype=float), _euler_system_kernel, "solve_ode_system_for_t").tolist()
+                    t_current = cursor.t
+
+                    if t_target == t_current:
+                        return y_current
+
+                    discretePoint = False
+                    continue
+
                 # print("Solving right scattered point where:")
                 # print("t_current =", t_current)
                 # print("y_current =", y_current)
                 # print("t_target =", t_target)
                 # print("y_prime(y_current, t_current) =", y_prime(y_current, t_current))
-                # print("self.mu(t_current) =", self.mu(t_current))
+                # print("cursor.mu =", cursor.mu)
                 # print()            
                                 
                 #------------------------------#
                 
-                # print("y_prime(y_current, t_current) =", y_prime(y_current, t_current), "self.mu(t_current) =", self.mu(t_current))
+                # print("y_prime(y_current, t_current) =", y_prime(y_current, t_current), "cursor.mu =", cursor.mu)
                 
-                temp1 = list(map(lambda x: x * self.mu(t_current), y_prime(y_current, t_current)))
+                temp1 = list(map(lambda x: x * cursor.mu, y_prime(y_current, t_current)))
                      
                 # print("y_current:", y_current, "temp1:", temp1)
                 
@@ -1359,9 +2879,9 @@ class timescale:
                 
                 #------------------------------#
                     
-                t_next = self.sigma(t_current)
+                t_next = cursor.forward()
                 
-                # print("t_next = self.sigma(t_current) =", t_next)
+                # print("t_next = cursor.forward() =", t_next)
                 # print()                
                 # print("Result:")
                 # print("y_sigma_of_t_current =", y_sigma_of_t_current)
@@ -1371,7 +2891,7 @@ class timescale:
                     # print("t_target == t_next -> returning y_sigma_of_t_current\n")
                     return y_sigma_of_t_current
                 
-                if self.isDiscretePoint(t_next):
+                if cursor.kind == "point":
                     discretePoint = True
                     # print("[NEXT IS DISCRETE POINT]")
                     
@@ -1383,17 +2903,20 @@ class timescale:
                 y_current = y_sigma_of_t_current                
                                 
             else:
+                if self._instrumentation is not None:
+                    self._instrumentation.count("solve_ode_system_for_t.steps.interval")
+
                 # print("Solving right dense point where:")                    
                 # print("t_current =", t_current)
                 # print("y_current =", y_current)
                 # print("t_target =", t_target)
                 # print()
                 
-                if self.isDiscretePoint(t_current):
+                if cursor.kind == "point":
                     raise Exception("t_current is NOT in a list/interval! Something went wrong!")
                 
                 else:
-                    interval_of_t_current = self.getCorrespondingInterval(t_current)
+                    interval_of_t_current = cursor.interval
                     
                     # print("Integration conditions:")
                     # print("t_current =", t_current)
@@ -1413,7 +2936,7 @@ class timescale:
                         # print(current_interval)
                         # print()
                         
-                        ODE_integration_result = integrate.odeint(y_prime, y_current, current_interval)
+                        ODE_integration_result = integrate.odeint(interval_prime, y_current, current_interval)
                         
                         # print("Result:")
                         # print("ODE_integration_result =", ODE_integration_result)
@@ -1432,7 +2955,7 @@ class timescale:
                         # print(current_interval)
                         # print()
                         
-                        ODE_integration_result = integrate.odeint(y_prime, y_current, current_interval)                        
+                        ODE_integration_result = integrate.odeint(interval_prime, y_current, current_interval)                        
                         
                         # print("Result:")
                         # print("ODE_integration_result =", ODE_integration_result)
@@ -1440,7 +2963,7 @@ class timescale:
                         
                         ODE_integration_result = ODE_integration_result[len(ODE_integration_result) - 1]
                         
-                        t_current = interval_of_t_current[1]
+                        t_current = cursor.forward()
                         y_current = ODE_integration_result
                         
                         # print("[NEXT IS DISCRETE POINT]")
@@ -1448,65 +2971,414 @@ class timescale:
     
     #
     #
-    # Delay Differential Equation Solver
+    # Boundary Value Problem solver for two-point problems of the form
     #
+    #   y^Delta(t) = y_prime(y(t), t)   where   boundary_conditions(y(t_a), y(t_b)) = 0
     #
-    def solve_dde_for_t(self, y_values, t_0, t_target, y_prime, JiTCDDE=None, stepSize=0.01, return_all_results=False):
-        print("solve_dde_for_t arguments:")
-        print("y_0 = y_values[t_0] =", y_values[t_0])
-        print("t_0 =", t_0)  
-        print("y_values =", y_values)
-        print("t_target =", t_target)
-        print("")
-        
-        # The following is validation code for the argument "y_values".
-        #----------------------------------------------------------------------------#
-        
-        for y_value_key in y_values:
-            if not self.isInTimescale(y_value_key):
-                raise Exception("The initial y value, t =", y_value_key, " is not in the timescale")
-        
-        y_0 = y_values[t_0]
-        
-        #----------------------------------------------------------------------------#
-        
-        # The following is more validation code -- this is very similar to the validation code in the dIntegral function.
-        #----------------------------------------------------------------------------#
+    # The problem is solved by (multiple) shooting: the unknown states at the shooting nodes are found with Newton's method applied to the
+    # continuity residuals between shooting segments and to the boundary residuals.
+    # The Jacobian needed by Newton's method is obtained from the sensitivity (variational) equations, which are propagated alongside the trajectory:
+    #   - on a right scattered point t:  Phi(sigma(t)) = (I + mu(t)*J(t)) * Phi(t)
+    #   - on an interval:                Phi'(t) = J(t) * Phi(t)  (integrated together with y by scipy.integrate.odeint)
+    # where J is the Jacobian of y_prime with respect to y.
+    #
+    # Arguments:
+    #   "y_prime" is the system of equations, defined exactly as for solve_ode_system_for_t(): y_prime(vector, t).
+    #
+    #   "boundary_conditions" is a function bc(y_a, y_b) that returns len(y_a) residuals which vanish at the solution.
+    #   As an example, the conditions x(0) = 250 and x(4) = 250 for the system [x, x^Delta] are expressed as:
+    #
+    #       lambda y_a, y_b: [y_a[0] - 250, y_b[0] - 250]
+    #
+    #   "t_a" and "t_b" are the timescale values at which the boundary conditions are imposed (t_a < t_b).
+    #
+    #   "guess" is an initial guess for y(t_a), or a list that holds a guess for the state at every shooting node except t_b.
+    #
+    #   "nodes" selects the shooting nodes. None means single shooting from t_a to t_b.
+    #   An integer m splits the timescale between t_a and t_b into m shooting segments that contain roughly the same number of steps.
+    #   A list of timescale values that starts with t_a and ends with t_b is used as given.
+    #
+    #   "jacobian" is an optional function jacobian(vector, t) that returns the matrix of partial derivatives of y_prime with respect to vector.
+    #   If it is not provided, the Jacobian is approximated with forward differences.
+    #
+    #   "warm_start" is a bvp_solution returned by a previous call, for instance for a slightly different value of alpha.
+    #   Its states at the shooting nodes are used as the initial guess (and "guess" is ignored), which usually lets Newton's method converge in one or two iterations.
+    #
+    #   "tol" is the largest residual that is accepted and "max_iterations" limits the number of Newton iterations.
+    #
+    # Returns a bvp_solution object. Calling that object with a value t in [t_a, t_b] returns y(t).
+    #
+    #
+    def solve_bvp(self, y_prime, boundary_conditions, t_a, t_b, guess=None, nodes=None, jacobian=None, warm_start=None, tol=1e-10, max_iterations=50):
+        if t_a >= t_b:
+            raise Exception("solve_bvp: t_a must be smaller than t_b.")
+
+        all_segments = self._segments(t_a, t_b, "solve_bvp")
+
+        if nodes is None:
+            nodes = [t_a, t_b]
+
+        elif isinstance(nodes, int):
+            count = max(1, min(nodes, len(all_segments)))
+            boundaries = [t_a] + [segment[2] for segment in all_segments]
+            nodes = [boundaries[(i * len(all_segments)) // count] for i in range(count + 1)]
+
+        else:
+            nodes = list(nodes)
+
+            if nodes[0] != t_a or nodes[-1] != t_b:
+                raise Exception("solve_bvp: the list of shooting nodes must start with t_a and end with t_b.")
+
+        shooting_segments = [self._segments(nodes[i], nodes[i + 1], "solve_bvp") for i in range(len(nodes) - 1)]
+        m = len(shooting_segments)
+
+        if warm_start is not None:
+            S = np.array([warm_start(x) for x in nodes[:-1]], dtype=float)
+
+        elif guess is None:
+            raise Exception("solve_bvp: either guess or warm_start must be provided.")
+
+        else:
+            S = np.array(guess, dtype=float)
+
+            # A guess for y(t_a) only is turned into a guess for every node by propagating it forward.
+            if S.ndim == 1:
+                states = [S]
+
+                for i in range(m - 1):
+                    states.append(self._propagate(y_prime, shooting_segments[i], states[-1])[0])
+
+                S = np.array(states)
+
+        if S.shape[0] != m:
+            raise Exception("solve_bvp: the guess must contain one state for every shooting node except t_b.")
+
+        d = S.shape[1]
+
+        def evaluate(S):
+            results = [self._propagate(y_prime, shooting_segments[i], S[i], jacobian=jacobian, sensitivity=True) for i in range(m)]
+
+            residual = np.empty(m * d)
+
+            for i in range(m - 1):
+                residual[i * d:(i + 1) * d] = results[i][0] - S[i + 1]
+
+            residual[(m - 1) * d:] = np.asarray(boundary_conditions(S[0], results[-1][0]), dtype=float)
+
+            return residual, results
+
+        residual, results = evaluate(S)
+        norm = np.max(np.abs(residual))
+        iteration = 0
+
+        while norm > tol and iteration < max_iterations:
+            M = np.zeros((m * d, m * d))
+
+            for i in range(m - 1):
+                M[i * d:(i + 1) * d, i * d:(i + 1) * d] = results[i][1]
+                M[i * d:(i + 1) * d, (i + 1) * d:(i + 2) * d] = -np.eye(d)
+
+            B_a = _jacobian(lambda y_a: boundary_conditions(y_a, results[-1][0]), S[0])
+            B_b = _jacobian(lambda y_b: boundary_conditions(S[0], y_b), results[-1][0])
+
+            M[(m - 1) * d:, 0:d] += B_a
+            M[(m - 1) * d:, (m - 1) * d:] += B_b @ results[-1][1]
+
+            try:
+                step = np.linalg.solve(M, -residual).reshape(m, d)
+
+            except np.linalg.LinAlgError:
+                step = np.linalg.lstsq(M, -residual, rcond=None)[0].reshape(m, d)
+
+            # Damped Newton step: halve the step until the residual decreases.
+            damping = 1.0
+
+            while True:
+                S_new = S + damping * step
+                residual_new, results_new = evaluate(S_new)
+                norm_new = np.max(np.abs(residual_new))
+
+                if norm_new < norm or damping < 1.0 / 64:
+                    break
+
+                damping = damping / 2
+
+            S, residual, results, norm = S_new, residual_new, results_new, norm_new
+            iteration = iteration + 1
+
+        return bvp_solution(self, y_prime, nodes, S, norm <= tol, iteration, norm)
+
+    #
+    #
+    # Direct solver for linear second order boundary value problems of the form
+    #
+    #   x^DeltaDelta(t) + A(t)*x^Delta(t) + B(t)*x(t) = F(t),   t_a <= t <= t_b
+    #
+    # together with one boundary condition at each end:
+    #
+    #   left[0]*x(t_a) + left[1]*x^Delta(t_a) = left[2]
+    #   right[0]*x(t_b) + right[1]*x^Delta(t_b) = right[2]
+    #
+    # so that [1, 0, value] is a Dirichlet condition, [0, 1, value] a Neumann condition and any other combination a Robin condition.
+    # At t_b the delta derivative is taken from the left, i.e. (x(t_b) - x(rho(t_b)))/nu(t_b) when t_b is left scattered.
+    #
+    # The unknowns are the values of x at the points of the timescale. Intervals are collocated on a uniform grid whose spacing is at most "stepSize".
+    # On right scattered points the dynamic equation is discretized exactly with the graininess:
+    #
+    #   x^Delta(t) = (x(sigma(t)) - x(t))/mu(t),   x^DeltaDelta(t) = (x^Delta(sigma(t)) - x^Delta(t))/mu(t)
+    #
+    # At the grid points inside of intervals the derivatives are replaced by (second order) central differences, and at the right end of an
+    # interval the one sided derivative from the left is matched with the delta derivative of the following jump.
+    # Every equation only couples neighbouring unknowns, so the whole problem is a banded linear system (two sub- and two superdiagonals)
+    # that is assembled with numpy and solved in O(n) by scipy.linalg.solve_banded -- there is no iteration.
+    #
+    # Arguments:
+    #   "A", "B" and "F" are the coefficients. Each of them can be a number, a function of t or an array with one value per grid point.
+    #   Functions are called point by point. With "vectorized" set to True they are called once with the whole array of grid points instead
+    #   and must return an array with one value per grid point.
+    #
+    #   "t_a" and "t_b" default to the smallest and largest value of the timescale.
+    #
+    #   "left" and "right" are the boundary conditions described above.
+    #
+    #   "stepSize" is the largest spacing of the collocation grid on intervals.
+    #
+    # Returns [t, x], where t is the array of grid points and x the array of solution values at those points.
+    #
+    #
+    def solve_linear_bvp(self, A, B, F, left, right, t_a=None, t_b=None, stepSize=0.01, vectorized=False):
+        if t_a is None:
+            t_a = self._first()
+
+        if t_b is None:
+            t_b = self._last()
+
+        if not self.isInTimescale(t_a) or not self.isInTimescale(t_b):
+            raise Exception("solve_linear_bvp: t_a and t_b must be values in the timescale.")
+
+        t, dense = self._grid(t_a, t_b, stepSize)
+        n = len(t) - 1
+
+        if n < 2:
+            raise Exception("solve_linear_bvp: the timescale must contain at least three points between t_a and t_b.")
+
+        h = np.diff(t)
+
+        A_values = _evaluate_on_grid(A, t, vectorized)
+        B_values = _evaluate_on_grid(B, t, vectorized)
+        F_values = _evaluate_on_grid(F, t, vectorized)
+
+        # Equation number j (j = 0, ..., n-2) is row j+1 of the system and is one of:
+        #   - central:  the dynamic equation at t[j+1] when t[j+1] lies inside of an interval (couples x[j], x[j+1], x[j+2]).
+        #   - matching: when t[j+1] is the right end of an interval, x^Delta has to be continuous there, i.e. the one sided derivative
+        #               from the left equals (x(sigma(t[j+1])) - x(t[j+1]))/mu(t[j+1]) (couples x[j-1], ..., x[j+2]).
+        #   - forward:  the delta equation at the right scattered point t[j] (couples x[j], x[j+1], x[j+2], and x[j+3] when
+        #               sigma(t[j]) is the left end of an interval, where x^Delta(sigma(t[j])) is a one sided derivative).
+        central = dense[:-1] & dense[1:]
+        matching = dense[:-1] & ~dense[1:]
+        entering = ~dense[:-1] & dense[1:]
+
+        # Step sizes around every equation. Steps that do not exist are padded with 1.0 and never used.
+        # Intervals are split into at least two grid steps, so the steps that are used always exist.
+        h_previous = np.concatenate(([1.0], h[:-2]))
+        h_0 = h[:-1]
+        h_1 = h[1:]
+        h_2 = np.concatenate((h[2:], [1.0]))
+
+        A_j = A_values[:-2]
+        B_j = B_values[:-2]
+        A_i = A_values[1:-1]
+        B_i = B_values[1:-1]
+
+        # Coefficients of x[j-1], x[j], x[j+1], x[j+2], x[j+3] for every equation.
+        c = np.zeros((5, n - 1))
+
+        # forward
+        c[1] = 1 / (h_0 * h_0) - A_j / h_0 + B_j
+        c[2] = -1 / (h_0 * h_1) - 1 / (h_0 * h_0) + A_j / h_0
+        c[3] = 1 / (h_0 * h_1)
+
+        # forward into an interval: x^Delta(t[j+1]) = d_0*x[j+1] + d_1*x[j+2] + d_2*x[j+3]
+        d_0 = -(2 * h_1 + h_2) / (h_1 * (h_1 + h_2))
+        d_1 = (h_1 + h_2) / (h_1 * h_2)
+        d_2 = -h_1 / (h_2 * (h_1 + h_2))
+
+        c[2] = np.where(entering, d_0 / h_0 - 1 / (h_0 * h_0) + A_j / h_0, c[2])
+        c[3] = np.where(entering, d_1 / h_0, c[3])
+        c[4] = np.where(entering, d_2 / h_0, 0.0)
+
+        # central
+        c[1] = np.where(central, 2 / (h_0 * (h_0 + h_1)) - A_i * h_1 / (h_0 * (h_0 + h_1)), c[1])
+        c[2] = np.where(central, -2 / (h_0 * h_1) + A_i * (h_1 - h_0) / (h_0 * h_1) + B_i, c[2])
+        c[3] = np.where(central, 2 / (h_1 * (h_0 + h_1)) + A_i * h_0 / (h_1 * (h_0 + h_1)), c[3])
+
+        # matching
+        c[0] = np.where(matching, h_0 / (h_previous * (h_previous + h_0)), 0.0)
+        c[1] = np.where(matching, -(h_previous + h_0) / (h_previous * h_0), c[1])
+        c[2] = np.where(matching, (2 * h_0 + h_previous) / (h_0 * (h_previous + h_0)) + 1 / h_1, c[2])
+        c[3] = np.where(matching, -1 / h_1, c[3])
+
+        # Banded storage for scipy.linalg.solve_banded with two sub- and two superdiagonals: entry (row, column) goes to ab[2 + row - column, column].
+        ab = np.zeros((5, n + 1))
+        rhs = np.empty(n + 1)
+
+        rows = np.arange(1, n)
+
+        ab[4, rows[matching] - 2] = c[0][matching]
+        ab[3, rows - 1] = c[1]
+        ab[2, rows] = c[2]
+        ab[1, rows + 1] = c[3]
+        ab[0, rows[entering] + 2] = c[4][entering]
+        rhs[rows] = np.where(central, F_values[1:-1], np.where(matching, 0.0, F_values[:-2]))
+
+        # Left boundary condition (row 0). On an interval x^Delta(t_a) uses a second order one sided difference.
+        if dense[0] and dense[1]:
+            derivative_coefficients = [-(2 * h[0] + h[1]) / (h[0] * (h[0] + h[1])), (h[0] + h[1]) / (h[0] * h[1]), -h[0] / (h[1] * (h[0] + h[1]))]
+
+        else:
+            derivative_coefficients = [-1 / h[0], 1 / h[0], 0.0]
+
+        ab[2, 0] = left[0] + left[1] * derivative_coefficients[0]
+        ab[1, 1] = left[1] * derivative_coefficients[1]
+        ab[0, 2] = left[1] * derivative_coefficients[2]
+        rhs[0] = left[2]
+
+        # Right boundary condition (row n).
+        if dense[-1] and dense[-2]:
+            derivative_coefficients = [h[-1] / (h[-2] * (h[-2] + h[-1])), -(h[-2] + h[-1]) / (h[-2] * h[-1]), (2 * h[-1] + h[-2]) / (h[-1] * (h[-2] + h[-1]))]
+
+        else:
+            derivative_coefficients = [0.0, -1 / h[-1], 1 / h[-1]]
+
+        ab[4, n - 2] = right[1] * derivative_coefficients[0]
+        ab[3, n - 1] = right[1] * derivative_coefficients[1]
+        ab[2, n] = right[0] + right[1] * derivative_coefficients[2]
+        rhs[n] = right[2]
+
+        x = linalg.solve_banded((2, 2), ab, rhs)
+
+        return [t, x]
+
+    #
+    #
+    # Solver for linear systems of the form
+    #
+    #   y^Delta(t) = A(t)*y(t),   y(t_0) = y_0
+    #
+    # A run of consecutive right scattered points t_1, ..., t_k is a single matrix product:
+    #
+    #   y(sigma(t_k)) = (I + mu(t_k)*A(t_k)) * ... * (I + mu(t_1)*A(t_1)) * y(t_1)
+    #
+    # so A is evaluated on the whole run at once (as a (k, d, d) array) and the k matrices are multiplied pairwise with batched numpy matmul,
+    # which takes log2(k) vectorized steps. Intervals are handled by scipy.linalg.expm when A is a constant matrix and by integrating
+    # Phi'(t) = A(t)*Phi(t) with scipy.integrate.odeint otherwise.
+    #
+    # Arguments:
+    #   "A" is either a constant d x d matrix or a function A(t) that returns a d x d matrix.
+    #   A function is called point by point. With "vectorized" set to True it is called once with the array of the k values of a run instead
+    #   and must return a (k, d, d) array (see _evaluate_matrices()).
+    #
+    #   "y_0" is the initial value y(t_0). It can also be a d x m matrix whose columns are m different initial values, which are all propagated at once.
+    #
+    #   "t_0" and "t_target" are timescale values with t_0 <= t_target.
+    #
+    #   "return_transition" makes the function return [y(t_target), Phi], where Phi is the transition (fundamental) matrix from t_0 to t_target.
+    #   Any other initial value y_0' can then be propagated for free via Phi @ y_0'.
+    #
+    #
+    def solve_linear_system_for_t(self, A, y_0, t_0, t_target, return_transition=False, vectorized=False):
+        y_0 = np.asarray(y_0)
+
+        Phi = self._transition(A, self._segments(t_0, t_target, "solve_linear_system_for_t"), y_0.shape[0], vectorized)
+
+        if return_transition:
+            return [Phi @ y_0, Phi]
+
+        return Phi @ y_0
+
+    #
+    #
+    # Utility function for the linear system solvers.
+    # Returns the transition matrix of y^Delta = A(t)*y across the given segments (see _segments()).
+    # Consecutive right scattered points are collected into runs that are multiplied out by _run_transition().
+    #
+    #
+    def _transition(self, A, segments, d, vectorized=False):
+        Phi = np.eye(d)
+        run = []
+
+        for kind, a, b in segments + [("end", None, None)]:
+            if kind == "point":
+                run.append((a, b))
+                continue
+
+            if run:
+                times = np.array([x[0] for x in run], dtype=float)
+                mus = np.array([x[1] for x in run], dtype=float) - times
+                Phi = self._run_transition(A, times, mus, d, vectorized) @ Phi
+                run = []
+
+            if kind == "interval":
+                Phi = self._interval_transition(A, a, b, d) @ Phi
+
+        return Phi
+
+    #
+    #
+    # Utility function for the linear system solvers.
+    # Returns the product (I + mus[k-1]*A(times[k-1])) * ... * (I + mus[0]*A(times[0])) for a run of right scattered points.
+    #
+    #
+    def _run_transition(self, A, times, mus, d, vectorized=False):
+        M = np.eye(d) + mus[:, None, None] * _evaluate_matrices(A, times, d, vectorized)
+
+        return _ordered_product(M)
+
+    #
+    #
+    # Utility function for the linear system solvers.
+    # Returns the transition matrix of y' = A(t)*y from a to b for an interval [a, b] of the timescale.
+    #
+    #
+    def _interval_transition(self, A, a, b, d):
+        if not callable(A):
+            return linalg.expm(np.asarray(A, dtype=float) * (b - a))
+
+        def Phi_prime(z, t):
+            return (np.asarray(A(t), dtype=float) @ z.reshape(d, d)).ravel()
+
+        return integrate.odeint(Phi_prime, np.eye(d).ravel(), [a, b], rtol=1e-12, atol=1e-12)[-1].reshape(d, d)
+
+    #
+    #
+    # Delay Differential Equation Solver
+    #
+    #
+    @_instrumented("solve_dde_for_t")
+    def solve_dde_for_t(self, y_values, t_0, t_target, y_prime, JiTCDDE=None, stepSize=0.01, return_all_results=False):
+        print("solve_dde_for_t arguments:")
+        print("y_0 = y_values[t_0] =", y_values[t_0])
+        print("t_0 =", t_0)  
+        print("y_values =", y_values)
+        print("t_target =", t_target)
+        print("")
         
-        t_in_ts = False
-        t_0_in_ts = False
-        discretePoint = False
+        # The following is validation code for the argument "y_values".
+        #----------------------------------------------------------------------------#
         
-        for x in self.ts:
-            if not isinstance(x, list) and t_target == x:
-                t_in_ts = True
-                
-            if not isinstance(x, list) and t_0 == x: 
-                discretePoint = True
-                t_0_in_ts = True
-            
-            if isinstance(x, list) and t_target <= x[1] and t_target >= x[0]:
-                t_in_ts = True
-            
-            if isinstance(x, list) and t_0 < x[1] and t_0 >= x[0]:
-                discretePoint = False
-                t_0_in_ts = True
-                
-            if isinstance(x, list) and t_0 == x[1]:
-                discretePoint = True
-                t_0_in_ts = True
-            
-            if t_in_ts and t_0_in_ts:                
-                break
+        for y_value_key in y_values:
+            if not self.isInTimescale(y_value_key):
+                raise Exception("The initial y value, t =", y_value_key, " is not in the timescale")
         
-        if t_in_ts and not t_0_in_ts:
-            raise Exception("solve_dde_for_t: t_0 is not a value in the timescale.")
+        y_0 = y_values[t_0]
         
-        if not t_in_ts and t_0_in_ts:
-            raise Exception("solve_dde_for_t: t_target is not a value in the timescale.")
+        #----------------------------------------------------------------------------#
         
-        if not t_in_ts and not t_0_in_ts:
-            raise Exception("solve_dde_for_t: t_0 and t_target are not values in the timescale.")
+        # The following is more validation code -- this is very similar to the validation code in the dIntegral function.
+        #----------------------------------------------------------------------------#
+        
+        cursor = self._solver_cursor(t_0, t_target, "solve_dde_for_t")
+        discretePoint = cursor.kind == "point" or cursor.kind == "end"
         
         if t_0 == t_target:
             print("t_0 == t_target -> returning y_0\n")
@@ -1526,19 +3398,22 @@ class timescale:
         
         while self.isInTimescale(t_current):
             if discretePoint:               
+                if self._instrumentation is not None:
+                    self._instrumentation.count("solve_dde_for_t.steps.point")
+
                 print("Solving right scattered point where:")
                 print("t_current =", t_current)
                 print("y_current = y_values[t_current] =", y_values[t_current])
                 print("t_target =", t_target)
                 print("y_prime(t_current, y_values) =", y_prime(t_current, y_values))
-                print("self.mu(t_current) =", self.mu(t_current))
+                print("cursor.mu =", cursor.mu)
                 print()            
                 
-                y_sigma_of_t_current = y_values[t_current] + y_prime(t_current, y_values) * self.mu(t_current)
+                y_sigma_of_t_current = y_values[t_current] + y_prime(t_current, y_values) * cursor.mu
                 
-                t_next = self.sigma(t_current) 
+                t_next = cursor.forward() 
                 
-                print("t_next = self.sigma(t_current) =", t_next)
+                print("t_next = cursor.forward() =", t_next)
                 print()                
                 print("Result:")
                 print("y_sigma_of_t_current =", y_sigma_of_t_current)
@@ -1555,7 +3430,7 @@ class timescale:
                     else:
                         return y_sigma_of_t_current
                 
-                if self.isDiscretePoint(t_next):
+                if cursor.kind == "point":
                     discretePoint = True
                     print("[NEXT IS DISCRETE POINT]")
                     print()
@@ -1573,17 +3448,20 @@ class timescale:
                 t_current = t_next
                 
             else:
+                if self._instrumentation is not None:
+                    self._instrumentation.count("solve_dde_for_t.steps.interval")
+
                 print("Solving right dense point where:")                    
                 print("t_current =", t_current)
                 print("y_current = y_values[t_current] =", y_values[t_current])
                 print("t_target =", t_target)
                 print()
                 
-                if self.isDiscretePoint(t_current):
+                if cursor.kind == "point":
                     raise Exception("t_current is NOT in a list/interval! Something went wrong!")
                 
                 else:
-                    interval_of_t_current = self.getCorrespondingInterval(t_current)
+                    interval_of_t_current = cursor.interval
                     
                     print("Integration conditions:")
                     print("t_current =", t_current)
@@ -1649,7 +3527,7 @@ class timescale:
                                 all_results.append(DDE_integration_result[0])
                                 print("time =", time, " |  integration_result =", DDE_integration_result)
                                                 
-                        t_current = interval_of_t_current[1] # The following should hold barring accuracy limitations: interval_of_t_current[1] == JiTCDDE.t
+                        t_current = cursor.forward() # The following should hold barring accuracy limitations: interval_of_t_current[1] == JiTCDDE.t
                         y_values[t_current] = DDE_integration_result[0]
                         
                         print("t_current =", t_current)
@@ -1665,6 +3543,87 @@ class timescale:
                         print()                        
                         discretePoint = True
     
+    #
+    #
+    # Delay Differential Equation Solver that does not depend on the jitcdde module (and therefore needs no C compiler).
+    #
+    # Arguments:
+    #   "y_values" is the initial history. It can be a dictionary {t: y(t)} (as for solve_dde_for_t()), a function past(t) that returns y(t)
+    #   for every t <= t_0, or a dde_history object. y(t_0) must be available from it.
+    #
+    #   "t_0" and "t_target" are timescale values with t_0 <= t_target.
+    #
+    #   "y_prime" is the right-hand side, defined exactly as for solve_dde_for_t(): y_prime(t, y_values).
+    #   The second argument is a dde_history object, so y_values[s] (or y_values(s)) returns the solution at any earlier time s.
+    #   Constant as well as time dependent delays are simply written as y_values[self.delay(t - tau(t))].
+    #
+    #   "stepSize" is the largest step of the classical Runge-Kutta method that is used on intervals.
+    #
+    #   "return_all_results" makes the function return [t, y], the arrays of all computed times and values from t_0 to t_target.
+    #   Otherwise y(t_target) is returned.
+    #
+    # Right scattered points are solved exactly via y(sigma(t)) = y(t) + mu(t)*y_prime(t, y_values).
+    # The history is stored in growable numpy arrays and looked up by binary search. Between two values computed on an interval the history
+    # is interpolated with cubic Hermite polynomials, which keeps the method of steps fourth order accurate for delays longer than stepSize.
+    #
+    #
+    @_instrumented("solve_dde_for_t_native")
+    def solve_dde_for_t_native(self, y_values, t_0, t_target, y_prime, stepSize=0.01, return_all_results=False):
+        segments = self._segments(t_0, t_target, "solve_dde_for_t_native")
+
+        if isinstance(y_values, dde_history):
+            history = y_values
+
+        elif callable(y_values):
+            history = dde_history(past=y_values)
+            history.append(t_0, y_values(t_0))
+
+        else:
+            history = dde_history()
+
+            for t in sorted(y_values):
+                if t <= t_0:
+                    if not self.isInTimescale(t):
+                        raise Exception("solve_dde_for_t_native: the initial value at t = " + str(t) + " is not in the timescale.")
+
+                    history.append(t, y_values[t])
+
+        if history.size == 0 or history.t[history.size - 1] != t_0:
+            raise Exception("solve_dde_for_t_native: the initial history does not end with a value for t_0 = " + str(t_0) + ".")
+
+        first = history.size - 1
+
+        for kind, a, b in segments:
+            if self._instrumentation is not None:
+                self._instrumentation.count("solve_dde_for_t_native.steps." + ("point" if kind == "point" else "interval"))
+
+            if kind == "point":
+                derivative = history.set_derivative(y_prime(a, history))
+
+                history.append(b, history.y[history.size - 1] + (b - a) * derivative)
+
+            else:
+                steps = max(1, int(np.ceil((b - a) / stepSize - 1e-9)))
+                h = (b - a) / steps
+
+                for step in range(steps):
+                    t = a + step * h
+                    y = history.y[history.size - 1]
+
+                    k_1 = history.set_derivative(y_prime(t, history))
+                    k_2 = history.stage(t + h / 2, y + h / 2 * k_1, y_prime)
+                    k_3 = history.stage(t + h / 2, y + h / 2 * k_2, y_prime)
+                    k_4 = history.stage(t + h, y + h * k_3, y_prime)
+
+                    history.append(b if step == steps - 1 else t + h, y + h / 6 * (k_1 + 2 * k_2 + 2 * k_3 + k_4), dense=True)
+
+        if return_all_results:
+            t, y = history.arrays()
+
+            return [t[first:], y[first:]]
+
+        return history.value(history.size - 1)
+
     #
     #
     # Validation function that checks whether the value of a delay function (which is passed to this function as an argument) is in the timescale.
@@ -1686,251 +3645,1567 @@ class timescale:
     
     #
     #
-    # Utility function to avoid repeated code.
-    # Sets up the "jitcdde" class to integrate over intervals.
-    # For more information see: https://jitcdde.readthedocs.io/en/stable/#the-main-class
-    # This function is used by the solve_dde_for_t() function.
+    # Utility function to avoid repeated code.
+    # Sets up the "jitcdde" class to integrate over intervals.
+    # For more information see: https://jitcdde.readthedocs.io/en/stable/#the-main-class
+    # This function is used by the solve_dde_for_t() function.
+    #
+    # When the C backend is used and "cache" is True, the compiled module is stored in a local cache directory (see _cache_directory())
+    # under a hash of the symbolic right-hand side, the max_delay and the compile options. Later runs, and parallel workers, load the
+    # shared object from there instead of generating and compiling the C code again.
+    # "compile_options" is a dictionary of keyword arguments for jitcdde's compile_C function (for instance {"omp": True}).
+    #
+    #    
+    def initializeJiTCDDE(self, y_prime_jitcdde, past_function, arg_max_delay, arg_times_of_interest, c_backend, cache=True, compile_options=None):    
+        import jitcdde
+
+        if c_backend and cache:
+            DDE = self._cached_JiTCDDE(jitcdde, y_prime_jitcdde, arg_max_delay, compile_options or {})
+
+        else:
+            DDE = jitcdde.jitcdde(y_prime_jitcdde, max_delay=arg_max_delay)                  
+
+        DDE.past_from_function(past_function, times_of_interest=arg_times_of_interest)
+
+        if c_backend == False:
+            DDE.generate_lambdas()  
+
+        print()
+        
+        # print("state:")
+        # x = DDE.get_state()
+        
+        # for y in x:
+            # print(y)
+        
+        # print()
+
+        return DDE
+
+    #
+    #
+    # Utility function used by initializeJiTCDDE().
+    # Returns a jitcdde object whose compiled module is taken from the cache directory, compiling (and caching) it only if it is not there yet.
+    # The module is compiled in a private temporary directory and then moved into place with os.replace(), so parallel workers that compile
+    # the same equations at the same time never see a partially written file.
+    #
+    #
+    def _cached_JiTCDDE(self, jitcdde, y_prime_jitcdde, max_delay, compile_options):
+        if callable(y_prime_jitcdde):
+            y_prime_jitcdde = list(y_prime_jitcdde())
+
+        else:
+            y_prime_jitcdde = list(y_prime_jitcdde)
+
+        description = [str(expression) for expression in y_prime_jitcdde]
+        description.append("max_delay=" + repr(max_delay))
+        description.append("compile_options=" + repr(sorted(compile_options.items())))
+        description.append("jitcdde=" + str(getattr(jitcdde, "__version__", "")))
+        description.append("python=" + sysconfig.get_config_var("EXT_SUFFIX"))
+
+        modulename = "jitcdde_" + hashlib.sha256("\n".join(description).encode("utf-8")).hexdigest()[:32]
+        directory = _cache_directory("jitcdde")
+        module_location = os.path.join(directory, modulename + sysconfig.get_config_var("EXT_SUFFIX"))
+
+        if not os.path.isfile(module_location):
+            DDE = jitcdde.jitcdde(y_prime_jitcdde, max_delay=max_delay)
+            DDE.compile_C(modulename=modulename, **compile_options)
+
+            # compile_C() builds and loads the module (DDE.jitced), whose file is copied into the cache. save_compiled() is not used because
+            # it compiles the module again, without compile_options.
+            temporary_directory = tempfile.mkdtemp(dir=directory)
+
+            try:
+                temporary_location = os.path.join(temporary_directory, os.path.basename(module_location))
+                shutil.copyfile(DDE.jitced.__file__, temporary_location)
+                os.replace(temporary_location, module_location)
+
+            finally:
+                shutil.rmtree(temporary_directory, ignore_errors=True)
+
+            return DDE
+
+        return jitcdde.jitcdde(y_prime_jitcdde, max_delay=max_delay, module_location=module_location)
+
+    #
+    #
+    # Utility function to avoid repeated code.
+    # Updates the past points of the "jitcdde" class.
+    # For more information see: https://jitcdde.readthedocs.io/en/stable/#_jitcdde.jitcdde.add_past_point
+    # This function is used by the solve_dde_for_t() function.
+    #
+    #    
+    def updateJiTCDDE(self, DDE, past_points):
+        # print("state:")
+        # x = DDE.get_state()
+        
+        # for y in x:
+            # print(y)
+        # print()
+    
+        print("past points:")
+        for past_point in past_points:
+            time = past_point[0]
+            state = past_point[1]
+            derivative = past_point[2]            
+            
+            print("time:", time, "| state:", state, "| derivative:", derivative)            
+            
+            DDE.add_past_point(time, state, derivative)
+        
+        print()
+        
+        return DDE 
+    
+    #
+    #
+    # Utility function to avoid repeated code.
+    # Simply checks whether the argument, t, is close to a value in the timescale.
+    # What "close" means is defined by the argument "error".
+    # If t is close to a value in the timescale, it will return True. Otherwise, it will return False.
+    #
+    #
+    def isInTimescaleWithError(self, t, error=0.000000000000001):
+        nodes, kinds = self._scalar_index()
+        i = _search(nodes, t - error, "left")
+
+        if i < len(nodes) and nodes[i] <= t + error:
+            return True
+
+        return i > 0 and kinds[i - 1] == _INTERVAL_START
+    
+    #
+    #
+    # Utility function to avoid repeated code.
+    # Simply checks whether the argument, t, is a value in the timescale.
+    # If t is in the timescale, it will return True. Otherwise, it will return False.
+    #
+    #
+    def isInTimescale(self, t):
+        if self._instrumentation is not None:
+            self._instrumentation.count("index.isInTimescale")
+
+        nodes, kinds = self._lookup or self._scalar_index()
+        i = bisect.bisect_right(nodes, t) - 1
+
+        return i >= 0 and (nodes[i] == t or kinds[i] == _INTERVAL_START)
+                
+    #
+    #
+    # Utility function to avoid repeated code.
+    # Simply checks whether the argument, t, is a discrete point or in an interval of the timescale.
+    #
+    #
+    def isDiscretePoint(self, t):
+        nodes, kinds = self._scalar_index()
+        i = _search(nodes, t, "right") - 1
+
+        if i >= 0 and nodes[i] == t and kinds[i] == _POINT:
+            return True
+
+        if i >= 0 and (nodes[i] == t or kinds[i] == _INTERVAL_START):
+            return False
+        
+        raise Exception("isDiscretePoint(): t was neither a discrete point nor in an interval!")
+    
+    #
+    #
+    # Utility function to avoid repeated code.
+    # Returns the interval in which t is located for the current timescale.
+    # Will raise an exception if t is not in an interval.
+    #
+    #
+    def getCorrespondingInterval(self, t):
+        nodes, kinds = self._scalar_index()
+        i = _search(nodes, t, "left")
+
+        if i < len(nodes) and kinds[i] != _POINT and (nodes[i] == t or kinds[i] == _INTERVAL_END):
+            if kinds[i] == _INTERVAL_END:
+                i = i - 1
+
+            return [float(nodes[i]), float(nodes[i + 1])]
+        
+        raise Exception("getCorrespondingInterval(): t not in an interval!")
+    
+    #
+    #
+    # Utility function to avoid repeated code.
+    # Walks the timescale from t_0 to t_target and returns, in order, the steps that a solver has to take to get from t_0 to t_target.
+    # Every step is a tuple of one of the following forms:
+    #   ("point", t, sigma(t))  -- a right scattered point t, whose graininess is sigma(t) - t
+    #   ("interval", a, b)      -- the part [a, b] of an interval that has to be integrated over
+    # The argument "caller" is the name of the calling function and is only used in exception messages.
+    #
+    #
+    def _segments(self, t_0, t_target, caller):
+        cursor = self._solver_cursor(t_0, t_target, caller)
+
+        if t_0 > t_target:
+            raise Exception(caller + ": t_0 cannot be greater than t_target.")
+
+        segments = []
+
+        while cursor.t < t_target:
+            if cursor.kind == "start" or cursor.kind == "inside":
+                end = cursor.interval[1]
+
+                segments.append(("interval", cursor.t, min(end, t_target)))
+
+                if end >= t_target:
+                    break
+
+                cursor.forward()
+
+            else:
+                t = cursor.t
+
+                segments.append(("point", t, cursor.forward()))
+
+        return segments
+
+    #
+    #
+    # Utility function for the solvers: runs the kernel (see _euler_kernel()) over the right scattered points from the position of
+    # the cursor up to the next interval or t_target, moves the cursor to the end of the run and returns the value of y there.
+    #
+    #
+    def _discrete_run(self, cursor, t_target, y_prime, y, kernel, caller):
+        nodes, kinds = self._index()
+
+        i = cursor.index
+        end = min(_search(nodes, t_target, "left"), len(nodes) - 1)
+
+        # The run ends at the first interval after i (found by doubling the window) or at t_target.
+        window = 64
+
+        while True:
+            starts = np.flatnonzero(kinds[i + 1:min(i + 1 + window, end)] == _INTERVAL_START)
+
+            if len(starts) > 0:
+                end = i + 1 + int(starts[0])
+                break
+
+            if i + 1 + window >= end:
+                break
+
+            window = 2 * window
+
+        t = nodes[i:end].astype(float)
+        mu = (nodes[i + 1:end + 1] - nodes[i:end]).astype(float)
+
+        if self._instrumentation is not None:
+            self._instrumentation.count(caller + ".steps.point", end - i - 1)
+
+        # Short runs are not worth the call of the compiled kernel.
+        y = (kernel if end - i < 16 else _jit_kernel(kernel))(y_prime, t, mu, y)
+
+        cursor.seek(float(nodes[end]))
+
+        return y
+
+    #
+    #
+    # Utility function to avoid repeated code.
+    # Validates the arguments t_0 and t_target of a solver and returns a timescale_cursor positioned at t_0.
+    # The argument "caller" is the name of the calling function and is only used in exception messages.
+    #
+    #
+    def _solver_cursor(self, t_0, t_target, caller):
+        t_in_ts = self.isInTimescale(t_target)
+        t_0_in_ts = self.isInTimescale(t_0)
+
+        if t_in_ts and not t_0_in_ts:
+            raise Exception(caller + ": t_0 is not a value in the timescale.")
+
+        if not t_in_ts and t_0_in_ts:
+            raise Exception(caller + ": t_target is not a value in the timescale.")
+
+        if not t_in_ts and not t_0_in_ts:
+            raise Exception(caller + ": t_0 and t_target are not values in the timescale.")
+
+        return self.cursor(t_0)
+
+    #
+    #
+    # Utility function to avoid repeated code.
+    # Returns the smallest and the largest value of the timescale.
+    #
+    #
+    def _first(self):
+        return float(self._index()[0][0])
+
+    def _last(self):
+        return float(self._index()[0][-1])
+
+    #
+    #
+    # Utility function that discretizes the timescale between t_a and t_b.
+    # Points are kept as they are and every interval is replaced by a uniform grid of at least two steps whose spacing is at most "stepSize".
+    # Returns [t, dense] where t is the sorted array of grid points and dense[k] is True if t[k] and t[k+1] belong to the same interval
+    # (and False if t[k+1] = sigma(t[k]) is reached by a jump).
+    #
+    #
+    def _grid(self, t_a, t_b, stepSize):
+        nodes, kinds = self._index()
+
+        # Every item of the timescale starts at a node that is not the end of an interval.
+        items = np.flatnonzero(kinds != _INTERVAL_END)
+        intervals = kinds[items] == _INTERVAL_START
+
+        lower = nodes[items].astype(float)
+        upper = np.where(intervals, nodes[np.minimum(items + 1, len(nodes) - 1)], lower)
+
+        lower = np.where(intervals, np.maximum(lower, t_a), lower)
+        upper = np.where(intervals, np.minimum(upper, t_b), upper)
+
+        keep = (lower >= t_a) & (upper <= t_b) & (lower <= upper)
+
+        starts = lower[keep]
+        ends = upper[keep]
+
+        steps = np.where(ends > starts, np.maximum(2, np.ceil((ends - starts) / stepSize - 1e-9)), 0).astype(np.int64)
+        sizes = steps + 1
+        offsets = np.cumsum(sizes) - sizes
+
+        item = np.repeat(np.arange(len(starts)), sizes)
+        k = np.arange(len(item)) - offsets[item]
+
+        t = starts[item] + (ends - starts)[item] * (k / np.maximum(steps[item], 1))
+        t[offsets + steps] = ends
+
+        return [t, item[1:] == item[:-1]]
+
+    #
+    #
+    # Utility function used by the boundary value problem solver.
+    # Propagates the state y_start of the system y_prime(vector, t) across the given segments (see _segments()) and returns [y_end, Phi].
+    # If "sensitivity" is True, Phi is the matrix of partial derivatives of y_end with respect to y_start. Otherwise Phi is None.
+    # The Jacobian of y_prime is taken from the function "jacobian(vector, t)" when it is provided and approximated with forward differences otherwise.
+    #
+    #
+    def _propagate(self, y_prime, segments, y_start, jacobian=None, sensitivity=False):
+        y = np.array(y_start, dtype=float)
+        d = len(y)
+
+        def J(vector, t):
+            if jacobian is not None:
+                return np.asarray(jacobian(vector, t), dtype=float)
+
+            return _jacobian(lambda v: y_prime(v, t), vector)
+
+        Phi = np.eye(d) if sensitivity else None
+
+        for kind, a, b in segments:
+            if kind == "point":
+                mu = b - a
+
+                if sensitivity:
+                    Phi = Phi + mu * (J(y, a) @ Phi)
+
+                y = y + mu * np.asarray(y_prime(y, a), dtype=float)
+
+            else:
+                if sensitivity:
+                    def augmented_y_prime(z, t):
+                        vector = z[:d]
+                        P = z[d:].reshape(d, d)
+
+                        return np.concatenate((np.asarray(y_prime(vector, t), dtype=float), (J(vector, t) @ P).ravel()))
+
+                    # The sensitivities only steer Newton's method, so they are integrated with the default tolerances.
+                    # The state itself determines the residuals and is integrated separately with tight tolerances.
+                    Phi = integrate.odeint(augmented_y_prime, np.concatenate((y, Phi.ravel())), [a, b])[-1][d:].reshape(d, d)
+
+                y = integrate.odeint(lambda vector, t: np.asarray(y_prime(vector, t), dtype=float), y, [a, b], rtol=1e-12, atol=1e-12)[-1]
+
+        return [y, Phi]
+
+    #
+    #
+    # Plotting functionality.
+    #
+    # Required argument:
+    #   f:
+    #   The function that will determine the y values of the graph - the x values are determined by the current timescale values.
+    #
+    # Optional arguments:
+    #   stepSize:
+    #   The accuracy to which the intervals are drawn in the graph - the smaller the value, the higher the accuracy and overhead.
+    #  
+    #   discreteStyle, intervalStyle:
+    #   These arguments determine the color, marker, and line styles of the graph.
+    #   They accept string arguments of 3-part character combinations that represent a color, marker style, and line style.
+    #   For instance the string "-r." indicates that the current (x, y) points should be plotted with a connected line
+    #   (represented by the "-"), in a red color (represented by the "r"), and with a point marker (represented by the ".").
+    #   These character combinations can be in any order UNLESS the reordering changes the interpretation of the character combination.
+    #   For instance, the string "r-." does not produce the same result as the string "-r.".
+    #   This is because "-." indicates a "dash-dot line style" and is therefore no longer interpreted as a "point marker" with a "solid line style".
+    #   See the notes section of this resource for more information: https://matplotlib.org/api/_as_gen/matplotlib.pyplot.plot.html
+    #
+    #   decimate:
+    #   If True (the default), samples that would be drawn onto the same pixels of the current figure are dropped before plotting:
+    #   for the intervals the first, last, smallest and largest sample of every pixel column are kept, for the points one point per pixel.
+    #   The picture is the same but large timescales are drawn interactively. Use decimate=False to pass every sample to matplotlib.
+    #
+    #   vectorized:
+    #   f is called point by point. With vectorized=True it is called once with the array of all x values instead, which is much faster
+    #   for numpy-aware functions, and must return an array with one value per x value.
+    #
+    #   **kwargs:
+    #   This argument gives the user access to all the arguments of the matplotlib.pyplot.plot function (this includes markersize, linewidth, color, label, and dashes).
+    #   For a list of all available parameters, see: https://matplotlib.org/api/_as_gen/matplotlib.pyplot.plot.html
+    #
+    # All points are drawn with one call to plt.plot and all intervals with another one (a single line that is broken by NaN values between the intervals),
+    # so the label appears at most twice in the legend (once if discreteStyle == intervalStyle).
+    #
+    # NOTE: To display plots that are created with this function, call the show() function of the plt data member of this class.
+    #
+    #
+    def plot(self, f, stepSize=0.01, discreteStyle='b.', intervalStyle='r-', decimate=True, vectorized=False, **kwargs):
+        xDiscretePoints, yDiscretePoints, xIntervalPoints, yIntervalPoints, intervals = self._plot_samples(f, stepSize, vectorized)
+
+        if decimate:
+            columns, rows = _plot_resolution()
+
+            keep = _marker_decimation(xDiscretePoints, yDiscretePoints, columns, rows)
+            xDiscretePoints, yDiscretePoints = xDiscretePoints[keep], yDiscretePoints[keep]
+
+            keep = _line_decimation(xIntervalPoints, yIntervalPoints, columns)
+            xIntervalPoints, yIntervalPoints, intervals = xIntervalPoints[keep], yIntervalPoints[keep], intervals[keep]
+
+        plt.plot(xDiscretePoints, yDiscretePoints, discreteStyle, **kwargs)
+
+        if len(xIntervalPoints) == 0:
+            return
+
+        if "label" in kwargs and discreteStyle == intervalStyle:
+            kwargs.pop("label")
+
+        # A NaN between two intervals breaks the line.
+        breaks = np.flatnonzero(intervals[1:] != intervals[:-1]) + 1
+
+        plt.plot(np.insert(xIntervalPoints, breaks, np.nan), np.insert(yIntervalPoints, breaks, np.nan), intervalStyle, **kwargs)
+
+    #
+    #
+    # Scatter plotting functionality.
+    #
+    # Required argument:
+    #   f:
+    #   The function that will determine the y values of the graph - the x values are determined by the current timescale values.
+    #
+    # Optional arguments:
+    #   stepSize:
+    #   The accuracy to which the intervals are drawn in the graph - the smaller the value, the higher the accuracy and overhead.
+    #
+    #   decimate:
+    #   If True (the default), only one marker is drawn per pixel of the current figure (see plot()). Use decimate=False to pass every sample to matplotlib.
+    #
+    #   vectorized:
+    #   If True, f is called once with the array of all x values instead of point by point (see plot()).
+    #
+    #   **kwargs:
+    #   This argument gives the user access to all the arguments of the matplotlib.pyplot.scatter function (this includes marker, color, and label).
+    #   For a list of all available parameters, see: https://matplotlib.org/api/_as_gen/matplotlib.pyplot.scatter.html
+    #
+    # All points are drawn with one call to plt.scatter and all samples of the intervals with another one.
+    #
+    # NOTE: To display plots that are created with this function, call the show() function of the plt data member of this class.
+    #
+    #
+    def scatter(self, f, stepSize=0.01, decimate=True, vectorized=False, **kwargs):
+        xDiscretePoints, yDiscretePoints, xIntervalPoints, yIntervalPoints, intervals = self._plot_samples(f, stepSize, vectorized)
+
+        if decimate:
+            columns, rows = _plot_resolution()
+
+            keep = _marker_decimation(xDiscretePoints, yDiscretePoints, columns, rows)
+            xDiscretePoints, yDiscretePoints = xDiscretePoints[keep], yDiscretePoints[keep]
+
+            keep = _marker_decimation(xIntervalPoints, yIntervalPoints, columns, rows)
+            xIntervalPoints, yIntervalPoints = xIntervalPoints[keep], yIntervalPoints[keep]
+
+        plt.scatter(xDiscretePoints, yDiscretePoints, **kwargs)
+
+        if len(xIntervalPoints) == 0:
+            return
+
+        if "label" in kwargs:
+            if "color" in kwargs:
+                kwargs.pop("label")
+
+        plt.scatter(xIntervalPoints, yIntervalPoints, **kwargs)
+
+    #
+    #
+    # Samples f for plot() and scatter() and returns [xDiscretePoints, yDiscretePoints, xIntervalPoints, yIntervalPoints, intervals]:
+    # the isolated points of the timescale, and np.arange(a, b, stepSize) for every interval [a, b] together with the number of the interval of every sample.
+    # f is called once per value, or once with the array of all x values if "vectorized" is True.
+    #
+    #
+    def _plot_samples(self, f, stepSize, vectorized=False):
+        nodes, kinds = self._index()
+
+        xDiscretePoints = nodes[kinds == _POINT].astype(float)
+
+        starts = np.flatnonzero(kinds == _INTERVAL_START)
+        a = nodes[starts].astype(float)
+        b = nodes[starts + 1].astype(float)
+
+        # The length of np.arange(a, b, stepSize).
+        sizes = np.maximum(np.ceil((b - a) / stepSize), 0).astype(np.int64)
+        offsets = np.cumsum(sizes) - sizes
+
+        intervals = np.repeat(np.arange(len(starts)), sizes)
+        xIntervalPoints = a[intervals] + (np.arange(len(intervals)) - offsets[intervals]) * stepSize
+
+        y = _evaluate_on_grid(f, np.concatenate([xDiscretePoints, xIntervalPoints]), vectorized)
+
+        return [xDiscretePoints, y[:len(xDiscretePoints)], xIntervalPoints, y[len(xDiscretePoints):], intervals]
+
+    #
+    #
+    # Export functionality.
+    #
+    # Samples f in the same layout as plot() and scatter() -- the isolated points of the timescale and np.arange(a, b, stepSize) for every interval [a, b] --
+    # and writes the samples in increasing order of t to the file "path", without using matplotlib. Returns the number of rows written.
+    #
+    # Required arguments:
+    #   f:
+    #   The function to sample. It is called once per value.
+    #
+    #   path:
+    #   The file to write.
+    #
+    # Optional arguments:
+    #   stepSize:
+    #   The distance between the samples on the intervals.
+    #
+    #   format:
+    #   "csv", "npy", "npz", "parquet" or "arrow" (the last two need pyarrow). By default the format is taken from the extension of path.
+    #
+    #   chunk_size:
+    #   The number of rows that are sampled and written at a time. Apart from the index of the timescale, the memory used does not depend on the number of rows.
+    #
+    #   vectorized:
+    #   If True, f is called once per chunk with the array of the t values instead and must return an array with one value per t value.
+    #
+    # The columns are "t", "value" and "interval", the number of the interval of the sample (counting from 0) or -1 if t is an isolated point.
+    # .npy and .npz files contain a structured array with these fields (named "samples" in a .npz file).
+    #
+    #
+    def export(self, f, path, stepSize=0.01, format=None, chunk_size=100000, vectorized=False):
+        nodes, kinds = self._index()
+
+        items = np.flatnonzero(kinds != _INTERVAL_END)
+        intervals = kinds[items] == _INTERVAL_START
+
+        starts = nodes[items].astype(float)
+        ends = np.where(intervals, nodes[np.minimum(items + 1, len(nodes) - 1)], starts).astype(float)
+
+        # A point is one row, an interval [a, b] is len(np.arange(a, b, stepSize)) rows.
+        sizes = np.where(intervals, np.maximum(np.ceil((ends - starts) / stepSize), 0), 1).astype(np.int64)
+        offsets = np.cumsum(sizes) - sizes
+        numbers = np.where(intervals, np.cumsum(intervals) - 1, -1)
+
+        rows = int(sizes.sum())
+
+        def chunks():
+            for first in range(0, rows, chunk_size):
+                row = np.arange(first, min(first + chunk_size, rows))
+                item = np.searchsorted(offsets, row, side="right") - 1
+
+                t = starts[item] + (row - offsets[item]) * stepSize
+
+                yield [t, _evaluate_on_grid(f, t, vectorized), numbers[item]]
+
+        return _export_rows(path, format, ["t", "value", "interval"], [np.float64, np.float64, np.int64], rows, chunks(), "export")
+
+    #
+    #
+    # Writes a solver trajectory [t, y] -- for instance the result of solve_dde_for_t_native() or solve_linear_bvp(), or the sample
+    # arrays of dintegral_array() -- to the file "path" in chunks of chunk_size rows (see export()). Returns the number of rows written.
+    #
+    # The columns are "t", "y" (or "y0", "y1", ... if the values are vectors) and "interval", the number of the interval of the timescale
+    # that contains t or -1 if t is an isolated point.
+    #
+    #
+    def export_trajectory(self, trajectory, path, format=None, chunk_size=100000):
+        t = np.asarray(trajectory[0], dtype=float)
+        y = np.asarray(trajectory[1], dtype=float)
+
+        if y.ndim == 1:
+            y = y[:, None]
+            names = ["y"]
+
+        else:
+            y = y.reshape(len(y), -1)
+            names = ["y" + str(i) for i in range(y.shape[1])]
+
+        if len(y) != len(t):
+            raise Exception("export_trajectory(): The trajectory must contain one value for every time (" + str(len(t)) + " values).")
+
+        nodes, kinds = self._index()
+        numbers = np.cumsum(kinds == _INTERVAL_START) - 1
+
+        def chunks():
+            for first in range(0, len(t), chunk_size):
+                times = t[first:first + chunk_size]
+
+                node = np.maximum(np.searchsorted(nodes, times, side="right") - 1, 0)
+                inside = (kinds[node] == _INTERVAL_START) | ((kinds[node] == _INTERVAL_END) & (nodes[node] == times))
+
+                yield [times] + [column for column in y[first:first + chunk_size].T] + [np.where(inside, numbers[node], -1)]
+
+        return _export_rows(path, format, ["t"] + names + ["interval"], [np.float64] * (len(names) + 1) + [np.int64], len(t), chunks(), "export_trajectory")
+
+#
+#
+# Instrumentation of a timescale (see timescale.instrument()).
+#
+# It is active between start() and stop(), or inside a with statement, and collects:
+#   counters  -- a collections.Counter with the number of
+#                "<method>.calls"                           calls of dintegral, integrate_complex, g_k, h_k, dexp_p, laplace_transform and the solvers
+#                "integrand.evaluations"                    evaluations of the integrands of dintegral, including those made by the quadrature
+#                "quadrature.calls", "quadrature.nodes"     mpmath.quad calls of integrate_complex and the points at which they evaluated the integrand
+#                                                           (each point once, although a complex integrand takes two calls)
+#                "index.sigma", "index.rho", "index.mu",    lookups in the index of the timescale
+#                "index.isInTimescale"
+#                "memo_g_k.hits", "memo_g_k.misses",        lookups in the memo tables
+#                "memo_h_k.hits", "memo_h_k.misses"
+#                "persistent_cache.hits",                   lookups in the persistent cache (see timescale.persist())
+#                "persistent_cache.misses"
+#                "<solver>.steps.point",                    steps of the solvers over right scattered points and over (parts of) intervals
+#                "<solver>.steps.interval"
+#   timings   -- {method: [calls, seconds]} for the methods above if timing is True. The times include the nested calls, so for instance
+#                the time of g_k is part of the time of the dintegral that calls it.
+#
+# "hooks" is a list of functions hook(event, name) that are called with event "enter" and "exit" around every call of these methods,
+# for instance to open and close ranges in an external tracer. "profiler" is an object with enable() and disable() methods,
+# for instance a cProfile.Profile(), that is enabled while the instrumentation is active.
+#
+# Starting an instrumentation replaces the one that is active on the timescale until it is stopped.
+# The counters and timings are updated under a lock, so threads that use the timescale at the same time are counted exactly.
+#
+#
+class instrumentation:
+    def __init__(self, timescale, timing=False, hooks=None, profiler=None):
+        self.timescale = timescale
+        self.timing = timing
+        self.hooks = list(hooks) if hooks else []
+        self.profiler = profiler
+        self.counters = collections.Counter()
+        self.timings = {}
+        self._previous = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._previous = self.timescale._instrumentation
+        self.timescale._instrumentation = self
+
+        if self.profiler is not None:
+            self.profiler.enable()
+
+        return self
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+
+        self.timescale._instrumentation = self._previous
+        self._previous = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exception):
+        self.stop()
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    #
+    # Returns f with every call counted under "name".
+    # A function that is compiled with numba is returned unchanged, since wrapping it would turn off the compiled loops that are used for it
+    # (see _is_jitted()); the callers count its evaluations in those loops themselves.
+    #
+    def counted(self, f, name):
+        if _is_jitted(f):
+            return f
+
+        def counted_f(*args, **kwargs):
+            self.count(name)
+
+            return f(*args, **kwargs)
+
+        return counted_f
+
+    def enter(self, name):
+        self.count(name + ".calls")
+
+        for hook in self.hooks:
+            hook("enter", name)
+
+        return time.perf_counter() if self.timing else None
+
+    def exit(self, name, start):
+        if start is not None:
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                timing = self.timings.setdefault(name, [0, 0.0])
+                timing[0] += 1
+                timing[1] += elapsed
+
+        for hook in self.hooks:
+            hook("exit", name)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+
+    def __str__(self):
+        lines = ["%-45s %12d" % (name, count) for name, count in sorted(self.counters.items())]
+
+        if self.timings:
+            lines.append("")
+            lines.extend("%-45s %12d calls %12.6f s" % (name, calls, seconds) for name, (calls, seconds) in sorted(self.timings.items(), key=lambda item: -item[1][1]))
+
+        return "\n".join(lines)
+
+#
+#
+# Cursor over the points and interval endpoints of a timescale (see timescale.cursor()).
+#
+# The cursor is positioned at a value t of the timescale, which is either a node (a point or an interval endpoint) or a value inside an interval.
+# forward() and backward() move it to the next or previous node in O(1); seek(t) moves it to any value of the timescale by binary search.
+# At every position the following are available:
+#   t         -- the current value
+#   index     -- the index of the current node (see timescale.index_of()); inside an interval this is the index of the interval's start
+#   kind      -- "point", "start" (start of an interval), "inside" (inside an interval) or "end" (end of an interval)
+#   mu, nu    -- the forward and backward graininess at t
+#   sigma     -- the forward jump of t
+#   interval  -- the interval [a, b] that contains t, or None if t is an isolated point
+#
+# Iterating over a cursor yields the cursor itself at its current position and then at every following node of the timescale.
+#
+#
+class timescale_cursor:
+    def __init__(self, timescale, t=None):
+        self.timescale = timescale
+        self._nodes, self._kinds = timescale._index()
+
+        if t is None:
+            self.index = 0
+            self.t = float(self._nodes[0])
+
+        else:
+            self.seek(t)
+
+    def seek(self, t):
+        i = _search(self._nodes, t, "right") - 1
+
+        if i < 0 or (self._nodes[i] != t and self._kinds[i] != _INTERVAL_START):
+            raise Exception("seek(): t = " + str(t) + " is not a value in the timescale.")
+
+        self.index = i
+        self.t = t
+
+        return self
+
+    def has_next(self):
+        return self._kinds[self.index] == _INTERVAL_START or self.index + 1 < len(self._nodes)
+
+    def has_previous(self):
+        return self.index > 0 or self.t != self._nodes[self.index]
+
+    def forward(self):
+        if not self.has_next():
+            raise Exception("forward(): the cursor is already at the end of the timescale.")
+
+        self.index = self.index + 1
+        self.t = float(self._nodes[self.index])
+
+        return self.t
+
+    def backward(self):
+        if not self.has_previous():
+            raise Exception("backward(): the cursor is already at the start of the timescale.")
+
+        if self.t == self._nodes[self.index]:
+            self.index = self.index - 1
+
+        self.t = float(self._nodes[self.index])
+
+        return self.t
+
+    @property
+    def kind(self):
+        kind = self._kinds[self.index]
+
+        if kind == _POINT:
+            return "point"
+
+        if kind == _INTERVAL_END:
+            return "end"
+
+        return "start" if self.t == self._nodes[self.index] else "inside"
+
+    @property
+    def mu(self):
+        if self._kinds[self.index] == _INTERVAL_START or self.index + 1 == len(self._nodes):
+            return 0
+
+        return float(self._nodes[self.index + 1] - self._nodes[self.index])
+
+    @property
+    def nu(self):
+        if self._kinds[self.index] == _INTERVAL_END or self.index == 0 or self.t != self._nodes[self.index]:
+            return 0
+
+        return float(self._nodes[self.index] - self._nodes[self.index - 1])
+
+    @property
+    def sigma(self):
+        if self._kinds[self.index] == _INTERVAL_START or self.index + 1 == len(self._nodes):
+            return self.t
+
+        return float(self._nodes[self.index + 1])
+
+    @property
+    def interval(self):
+        kind = self._kinds[self.index]
+
+        if kind == _INTERVAL_START:
+            return [float(self._nodes[self.index]), float(self._nodes[self.index + 1])]
+
+        if kind == _INTERVAL_END:
+            return [float(self._nodes[self.index - 1]), float(self._nodes[self.index])]
+
+        return None
+
+    def __iter__(self):
+        yield self
+
+        while self.has_next():
+            self.forward()
+
+            yield self
+
+#
+#
+# Online delta integral over a sliding window, for samples of a function f that arrive one at a time.
+#
+# update(t, f_t) adds the sample f(t) at the next value t of the timescale and returns the delta integral of f from t - window to t.
+# The samples have to visit the timescale in increasing order: after a right scattered value the next sample must be at sigma of it,
+# and inside an interval samples can be taken at any spacing (f is integrated with the trapezoidal rule between them).
+# The timescale may be extended while samples arrive (see timescale.append_point()).
+#
+# Every step between two samples contributes mu*f on right scattered values and the trapezoidal integral on intervals. The contributions
+# are kept in a queue and the running sum is updated by adding the newest contribution and subtracting the ones that have left the window,
+# so an update is O(1) amortized. A step on a right scattered value s is part of the window if s >= t - window (like the delta integral,
+# which puts the whole contribution mu(s)*f(s) at s). Of a step inside an interval that starts before t - window and ends after it,
+# only the part from t - window on is added, integrating the linear interpolant of the two samples.
+#
+#
+class sliding_dintegral:
+    def __init__(self, timescale, window):
+        if window <= 0:
+            raise Exception("sliding_dintegral: the window must be positive.")
+
+        self.timescale = timescale
+        self.window = window
+        self.value = 0
+
+        # The steps in the window as tuples (start, end, f(start), f(end), contribution), their sum, and the step that left the window last.
+        self._steps = collections.deque()
+        self._sum = 0
+        self._boundary = None
+        self._t = None
+        self._f = None
+
+    def update(self, t, f_t):
+        if self._t is not None:
+            self._steps.append((self._t, t, self._f, f_t, _online_step(self.timescale, self._t, self._f, t, f_t, "sliding_dintegral")))
+            self._sum = self._sum + self._steps[-1][4]
+
+        elif not self.timescale.isInTimescale(t):
+            raise Exception("sliding_dintegral: t = " + str(t) + " is not a value in the timescale.")
+
+        self._t = t
+        self._f = f_t
+
+        start = t - self.window
+
+        while self._steps and self._steps[0][0] < start:
+            self._boundary = self._steps.popleft()
+            self._sum = self._sum - self._boundary[4]
+
+        if not self._steps:
+            # Start again from an exact zero once the window is empty, so that rounding errors do not accumulate.
+            self._sum = 0
+
+        self.value = self._sum
+
+        # The step that left the window last can still end inside of it. If it lies in an interval, its part after t - window is added.
+        if self._boundary is not None and self._boundary[1] > start and self.timescale.mu(self._boundary[0]) == 0:
+            a, b, f_a, f_b, contribution = self._boundary
+            f_start = f_a + (f_b - f_a) * (start - a) / (b - a)
+
+            self.value = self.value + (b - start) * (f_start + f_b) / 2
+
+        return self.value
+
+#
+#
+# Online exponentially weighted delta integral, for samples of a function f that arrive one at a time.
+#
+# update(t, f_t) adds the sample f(t) and returns y(t) = the delta integral of e_p(t, sigma(s))*f(s) from the first sample to t,
+# where e_p is the delta exponential with the constant p (see timescale.dexp_p()). For p < 0 older samples are weighted down exponentially.
+# y is the solution of y^Delta = p*y + f, which is updated in O(1) per sample:
+#   y(sigma(t)) = (1 + mu(t)*p)*y(t) + mu(t)*f(t)   on right scattered values,
+#   exactly for the linear interpolant of f           between two samples inside an interval.
+# The samples have to visit the timescale in the same way as for sliding_dintegral.
+#
+#
+class exponential_dintegral:
+    def __init__(self, timescale, p):
+        self.timescale = timescale
+        self.p = p
+        self.value = 0
+
+        self._t = None
+        self._f = None
+
+    def update(self, t, f_t):
+        if self._t is not None:
+            mu = self.timescale.mu(self._t)
+
+            if mu == 0:
+                _online_step(self.timescale, self._t, self._f, t, f_t, "exponential_dintegral")
+
+                h = t - self._t
+                ph = self.p * h
+
+                if ph == 0:
+                    self.value = self.value + h * (self._f + f_t) / 2
+
+                else:
+                    growth = np.expm1(ph)
+                    self.value = (growth + 1) * self.value + self._f * growth / self.p + (f_t - self._f) / h * (growth - ph) / self.p**2
+
+            else:
+                self.value = (1 + mu * self.p) * self.value + _online_step(self.timescale, self._t, self._f, t, f_t, "exponential_dintegral")
+
+        elif not self.timescale.isInTimescale(t):
+            raise Exception("exponential_dintegral: t = " + str(t) + " is not a value in the timescale.")
+
+        self._t = t
+        self._f = f_t
+
+        return self.value
+
+#
+#
+# Handle to the index of a timescale (and optionally further arrays) in shared memory, as returned by timescale.share().
+#
+# The process that creates the handle copies the arrays into multiprocessing.shared_memory segments. Pickling the handle only transfers the
+# names of the segments, so sending it to another process is cheap. There
+#   attach()      returns a timescale whose index consists of read-only views of the shared segments,
+#   table(key)    returns a read-only view of the shared array that was published under "key",
+# both in O(1) time. Extending an attached timescale (see timescale.insert()) copies its index into private memory first.
+#
+# add_table(key, array) publishes another array. The creating process removes the segments with unlink() (or by using the handle in a
+# "with" statement) once they are no longer needed; processes that are still attached keep their mappings until they exit.
+#
+#
+class shared_timescale:
+    def __init__(self, timescale, tables=None):
+        nodes, kinds = timescale._index()
+
+        self.name = timescale.name
+        self.metadata = dict(timescale.metadata)
+        self.tables = {}
+
+        self._segments = {}
+        self._owner = True
+
+        self.nodes = self._publish(nodes)
+        self.kinds = self._publish(kinds)
+
+        for key, array in (tables or {}).items():
+            self.add_table(key, array)
+
+    def add_table(self, key, array):
+        if not self._owner:
+            raise Exception("add_table(): tables can only be added by the process that shared the timescale.")
+
+        self.tables[key] = self._publish(np.asarray(array))
+
+    def attach(self):
+        result = timescale.__new__(timescale)
+        result._initialize(None, self.name)
+        result.metadata = dict(self.metadata)
+        result._nodes = self._view(self.nodes)
+        result._kinds = self._view(self.kinds)
+        result._shared = self
+
+        return result
+
+    def table(self, key):
+        if key not in self.tables:
+            raise Exception("table(): there is no shared table " + str(key) + ".")
+
+        return self._view(self.tables[key])
+
+    def unlink(self):
+        if self._owner:
+            for segment in self._segments.values():
+                segment.unlink()
+
+            self._owner = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.unlink()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_segments"] = {}
+        state["_owner"] = False
+
+        return state
+
+    #
+    # Copies an array into a new shared memory segment and returns its description (segment name, dtype, shape).
+    #
+    def _publish(self, array):
+        array = np.ascontiguousarray(array)
+        segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+
+        np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+        self._segments[segment.name] = segment
+
+        return (segment.name, array.dtype.str, array.shape)
+
+    #
+    # Returns a read-only array on the shared memory segment with the given description, attaching to the segment if needed.
+    #
+    def _view(self, description):
+        name, dtype, shape = description
+
+        if name not in self._segments:
+            try:
+                # Python 3.13 and later: an attached segment is not cleaned up when this process exits, only its creator removes it.
+                self._segments[name] = shared_memory.SharedMemory(name=name, track=False)
+
+            except TypeError:
+                self._segments[name] = shared_memory.SharedMemory(name=name)
+
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=self._segments[name].buf)
+        view.flags.writeable = False
+
+        return view
+
+#
+#
+# Persistent cache of the expensive tables of timescales (see timescale.persist()).
+#
+# The values of g_k and h_k and the transition tables of dexp_A are stored in a SQLite database, by default tables.sqlite in the "tables"
+# subdirectory of the cache directory (see _cache_directory()), so that later runs and other processes reuse them instead of computing them again.
+# An entry is keyed by the content hash of the timescale (see timescale.content_hash()), the operator and its parameters, and holds the pickled value.
+# Only databases that the user controls should be used, since their values are unpickled.
+#
+# The values take at most max_bytes bytes. When a new entry exceeds that, the entries that were used least recently are removed until the values
+# take at most 3/4 of max_bytes; a value that is larger than max_bytes on its own is not stored. The database keeps the total size of the values
+# up to date with triggers, so checking the limit takes O(1) time.
+# The time at which an entry was used last is only written by get() when the stored time is more than _USED_RESOLUTION seconds old, so
+# reading an entry again and again does not take the write lock of the database every time. Entries are therefore removed in the order
+# of their use to within that resolution.
+#
+# Every thread (and process) has its own connection, and SQLite serializes the writes, so a cache can be shared by threads and processes.
+# Pickling the cache only transfers the path and the limit.
+#
+#   get(key)        returns the value for key, or _MISSING
+#   put(key, value) stores a value
+#   entries()       returns the number of entries, size() the number of bytes of their values
+#   clear(ts)       removes all entries, or those of the timescale ts
+#
+#
+class persistent_cache:
+    _SCHEMA_VERSION = 1
+    _USED_RESOLUTION = 60
+
+    def __init__(self, path=None, max_bytes=2**30):
+        self.path = os.path.join(_cache_directory("tables"), "tables.sqlite") if path is None else str(path)
+        self.max_bytes = max_bytes
+
+        self._local = threading.local()
+
+        # Creates the database (or checks its version) right away, so a path that cannot be used fails here and not in the middle of a computation.
+        self._connection()
+
+    def get(self, key):
+        connection = self._connection()
+        row = connection.execute("SELECT value, used FROM entries WHERE key = ?", (key,)).fetchone()
+
+        if row is None:
+            return _MISSING
+
+        now = time.time()
+
+        if row[1] < now - self._USED_RESOLUTION:
+            # The condition is checked again, so that only one of several processes that read the entry at the same time writes.
+            connection.execute("UPDATE entries SET used = ? WHERE key = ? AND used < ?", (now, key, now - self._USED_RESOLUTION))
+
+        return pickle.loads(row[0])
+
+    def put(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        if len(data) > self.max_bytes:
+            return
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            connection.execute("INSERT INTO entries (key, value, size, used) VALUES (?, ?, ?, ?) "
+                               "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, used = excluded.used",
+                               (key, data, len(data), time.time()))
+
+            self._evict(connection)
+            connection.execute("COMMIT")
+
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def entries(self):
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def size(self):
+        return self._connection().execute("SELECT bytes FROM usage").fetchone()[0]
+
+    def clear(self, ts=None):
+        connection = self._connection()
+
+        if ts is None:
+            connection.execute("DELETE FROM entries")
+
+        else:
+            # The keys of a timescale start with its hash, so they form one range of the primary key.
+            prefix = ts.content_hash() + ":"
+            connection.execute("DELETE FROM entries WHERE key >= ? AND key < ?", (prefix, prefix[:-1] + ";"))
+
+    def __reduce__(self):
+        return (persistent_cache, (self.path, self.max_bytes))
+
+    #
+    # Removes the least recently used entries if the values take more than max_bytes. Called by put() inside of its transaction.
     #
-    #    
-    def initializeJiTCDDE(self, y_prime_jitcdde, past_function, arg_max_delay, arg_times_of_interest, c_backend):    
-        DDE = jitcdde.jitcdde(y_prime_jitcdde, max_delay=arg_max_delay)                  
-        DDE.past_from_function(past_function, times_of_interest=arg_times_of_interest)
+    def _evict(self, connection):
+        total = connection.execute("SELECT bytes FROM usage").fetchone()[0]
 
-        if c_backend == False:
-            DDE.generate_lambdas()  
+        if total <= self.max_bytes:
+            return
 
-        print()
-        
-        # print("state:")
-        # x = DDE.get_state()
-        
-        # for y in x:
-            # print(y)
-        
-        # print()
+        excess = total - self.max_bytes * 3 // 4
+        keys = []
 
-        return DDE
+        for key, size in connection.execute("SELECT key, size FROM entries ORDER BY used"):
+            if excess <= 0:
+                break
+
+            keys.append((key,))
+            excess = excess - size
+
+        connection.executemany("DELETE FROM entries WHERE key = ?", keys)
 
     #
+    # Returns the connection of the calling thread, opening it (and creating the tables) if needed.
+    # A process that was forked from the one that opened a connection opens its own.
     #
-    # Utility function to avoid repeated code.
-    # Updates the past points of the "jitcdde" class.
-    # For more information see: https://jitcdde.readthedocs.io/en/stable/#_jitcdde.jitcdde.add_past_point
-    # This function is used by the solve_dde_for_t() function.
-    #
-    #    
-    def updateJiTCDDE(self, DDE, past_points):
-        # print("state:")
-        # x = DDE.get_state()
-        
-        # for y in x:
-            # print(y)
-        # print()
-    
-        print("past points:")
-        for past_point in past_points:
-            time = past_point[0]
-            state = past_point[1]
-            derivative = past_point[2]            
-            
-            print("time:", time, "| state:", state, "| derivative:", derivative)            
-            
-            DDE.add_past_point(time, state, derivative)
-        
-        print()
-        
-        return DDE 
-    
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+
+        if version > self._SCHEMA_VERSION:
+            connection.close()
+            raise Exception("persistent_cache(): " + self.path + " was written by a newer version (schema version " + str(version) + ").")
+
+        if version < self._SCHEMA_VERSION:
+            connection.executescript("""
+                BEGIN IMMEDIATE;
+                CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL);
+                CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+                CREATE TABLE IF NOT EXISTS usage (bytes INTEGER NOT NULL);
+                INSERT INTO usage SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM usage);
+                CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN UPDATE usage SET bytes = bytes + new.size; END;
+                CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN UPDATE usage SET bytes = bytes - old.size + new.size; END;
+                CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN UPDATE usage SET bytes = bytes - old.size; END;
+                PRAGMA user_version = %d;
+                COMMIT;
+            """ % self._SCHEMA_VERSION)
+
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+
+        return connection
+
+#
+#
+# History of a delay differential equation, as used by the solve_dde_for_t_native() function of the timescale class.
+#
+# The times, values and derivatives are stored in numpy arrays that grow by doubling, so appending is O(1) amortized and a lookup
+# is a binary search. Calling the object (or indexing it like the y_values dictionary of solve_dde_for_t()) with a time s returns y(s):
+#   - exactly, if s is one of the stored times,
+#   - by cubic Hermite interpolation, if s lies between two times that were connected by integration over an interval,
+#   - from the function "past", if s lies before the first stored time and such a function was given.
+# Any other s is not in the timescale and raises an exception.
+#
+#
+class dde_history:
+    def __init__(self, past=None, capacity=64):
+        self.past = past
+        self.size = 0
+        self.t = np.empty(capacity)
+        self.y = None
+        self.dy = None
+        self.dense = np.zeros(capacity, dtype=bool)
+        self.scalar = False
+
+        # Value of the Runge-Kutta stage that is currently being evaluated: [t, y] or None.
+        self.current_stage = None
+
     #
     #
-    # Utility function to avoid repeated code.
-    # Simply checks whether the argument, t, is close to a value in the timescale.
-    # What "close" means is defined by the argument "error".
-    # If t is close to a value in the timescale, it will return True. Otherwise, it will return False.
+    # Appends y(t) to the history. "dense" marks that t was reached from the previous time by integrating over an interval.
     #
     #
-    def isInTimescaleWithError(self, t, error=0.000000000000001):
-        for ts_item in self.ts:
-            if not isinstance(ts_item, list):
-                if ts_item >= (t - error) and ts_item <= (t + error):
-                    return True
+    def append(self, t, y, dense=False):
+        y = np.asarray(y, dtype=float)
+
+        if self.y is None:
+            self.scalar = y.ndim == 0
+            self.y = np.empty((len(self.t), y.size))
+            self.dy = np.empty((len(self.t), y.size))
+
+        if self.size == len(self.t):
+            capacity = 2 * len(self.t)
+
+            self.t = np.resize(self.t, capacity)
+            self.y = np.resize(self.y, (capacity, self.y.shape[1]))
+            self.dy = np.resize(self.dy, (capacity, self.dy.shape[1]))
+            self.dense = np.resize(self.dense, capacity)
+
+        self.t[self.size] = t
+        self.y[self.size] = y.ravel()
+        self.dense[self.size] = dense
+
+        # Until set_derivative() is called, the derivative at t is estimated by the secant to the previous value.
+        if dense and self.size > 0:
+            self.dy[self.size] = (self.y[self.size] - self.y[self.size - 1]) / (t - self.t[self.size - 1])
+
+        else:
+            self.dy[self.size] = 0.0
+
+        self.size = self.size + 1
 
-            elif isinstance(ts_item, list):
-                if (t >= (ts_item[0] - error) and t <= (ts_item[1] + error)):
-                    return True
-        
-        return False
-    
     #
     #
-    # Utility function to avoid repeated code.
-    # Simply checks whether the argument, t, is a value in the timescale.
-    # If t is in the timescale, it will return True. Otherwise, it will return False.
+    # Stores the derivative at the last time of the history and returns it as an array.
     #
     #
-    def isInTimescale(self, t):
-        for ts_item in self.ts:
-            if not isinstance(ts_item, list) and ts_item == t:
-                return True
+    def set_derivative(self, derivative):
+        self.dy[self.size - 1] = np.asarray(derivative, dtype=float).ravel()
+
+        return self.dy[self.size - 1].copy()
 
-            elif isinstance(ts_item, list) and  (t >= ts_item[0] and t <= ts_item[1]):
-                return True
-        
-        return False
-                
     #
     #
-    # Utility function to avoid repeated code.
-    # Simply checks whether the argument, t, is a discrete point or in an interval of the timescale.
+    # Evaluates y_prime(t, self) at a Runge-Kutta stage whose (not yet stored) value is y.
+    # Lookups between the last stored time and t are interpolated linearly towards the stage value.
     #
     #
-    def isDiscretePoint(self, t):
-        for x in self.ts:
-            if not isinstance(x, list) and t == x:
-                return True           
-            
-            if isinstance(x, list) and t <= x[1] and t >= x[0]:
-                return False
-        
-        raise Exception("isDiscretePoint(): t was neither a discrete point nor in an interval!")
-    
+    def stage(self, t, y, y_prime):
+        self.current_stage = [t, y]
+
+        try:
+            return np.asarray(y_prime(t, self), dtype=float).ravel()
+
+        finally:
+            self.current_stage = None
+
+    def value(self, k):
+        return self.y[k, 0] if self.scalar else self.y[k].copy()
+
+    def arrays(self):
+        t = self.t[:self.size]
+        y = self.y[:self.size]
+
+        return [t, y[:, 0] if self.scalar else y]
+
+    def __call__(self, s, error=1e-12):
+        k = np.searchsorted(self.t[:self.size], s, side="right") - 1
+        tolerance = error * max(1.0, abs(s))
+
+        if k + 1 < self.size and abs(self.t[k + 1] - s) <= tolerance:
+            return self.value(k + 1)
+
+        if k >= 0 and abs(self.t[k] - s) <= tolerance:
+            return self.value(k)
+
+        if k < 0:
+            if self.past is not None:
+                return self.past(s)
+
+            raise Exception("dde_history: no value is known for t = " + str(s) + ".")
+
+        if k == self.size - 1:
+            if self.current_stage is not None and s <= self.current_stage[0] + tolerance:
+                t_stage, y_stage = self.current_stage
+                y = self.y[k] + (s - self.t[k]) / (t_stage - self.t[k]) * (np.asarray(y_stage).ravel() - self.y[k])
+
+                return y[0] if self.scalar else y
+
+            raise Exception("dde_history: t = " + str(s) + " lies after the last computed value.")
+
+        if not self.dense[k + 1]:
+            raise Exception("dde_history: t = " + str(s) + " is not in the timescale.")
+
+        # Cubic Hermite interpolation between the times k and k+1.
+        h = self.t[k + 1] - self.t[k]
+        x = (s - self.t[k]) / h
+
+        y = (2 * x**3 - 3 * x**2 + 1) * self.y[k] + (x**3 - 2 * x**2 + x) * h * self.dy[k] + (-2 * x**3 + 3 * x**2) * self.y[k + 1] + (x**3 - x**2) * h * self.dy[k + 1]
+
+        return y[0] if self.scalar else y
+
+    def __getitem__(self, s):
+        return self(s)
+
+#
+#
+# Solution of a boundary value problem, as returned by the solve_bvp() function of the timescale class.
+#
+# Data members:
+#   nodes: the shooting nodes t_a = nodes[0] < nodes[1] < ... < nodes[-1] = t_b.
+#   node_states: node_states[i] is the state y(nodes[i]) for every node except t_b.
+#   success: True if the residual dropped below the requested tolerance.
+#   iterations: the number of Newton iterations that were used.
+#   residual: the largest absolute residual of the continuity and boundary conditions.
+#
+# Calling a bvp_solution object with a timescale value t returns y(t).
+# It can also be passed as the "warm_start" argument of solve_bvp() to solve a slightly different problem.
+#
+#
+class bvp_solution:
+    def __init__(self, timescale, y_prime, nodes, node_states, success, iterations, residual):
+        self.timescale = timescale
+        self.y_prime = y_prime
+        self.nodes = nodes
+        self.node_states = node_states
+        self.success = success
+        self.iterations = iterations
+        self.residual = residual
+
+    def __call__(self, t):
+        if t < self.nodes[0] or t > self.nodes[-1]:
+            raise Exception("bvp_solution: t = " + str(t) + " is outside of [" + str(self.nodes[0]) + ", " + str(self.nodes[-1]) + "].")
+
+        i = min(bisect.bisect_right(self.nodes, t) - 1, len(self.node_states) - 1)
+
+        segments = self.timescale._segments(self.nodes[i], t, "bvp_solution")
+
+        return self.timescale._propagate(self.y_prime, segments, self.node_states[i])[0]
+
+#
+#
+# Periodic time scale class.
+#
+# A periodic time scale is defined by the points and intervals of one period (the "pattern") and is repeated forever in both directions:
+#
+#   { shift + k*period + x : k an integer, x in pattern }
+#
+# As examples, the union of intervals P_{a,b} is periodic_timescale([[0, a]], a + b) and hZ is periodic_timescale([0], h).
+# The pattern is given like the ts argument of the timescale class (in any order), and all of its values must lie in [0, period).
+#
+# The full time scale is never materialized: only one period (plus the first value of the next period) is stored as a regular timescale
+# in the data member period_timescale, and every other value is mapped onto it.
+#
+# For linear systems y^Delta = A(t)*y whose coefficient matrix has the same period (A(t + period) = A(t)), the transition matrix over one
+# period (the monodromy matrix) is computed once, and the transition over N periods is obtained by repeated squaring of it in O(log N) matrix products.
+#
+#
+class periodic_timescale:
+    def __init__(self, pattern, period, shift=0, name='none'):
+        pattern = sorted(pattern, key=_item_start)
+
+        self.pattern = pattern
+        self.period = period
+        self.shift = shift
+        self.name = name
+
+        if len(pattern) == 0:
+            raise Exception("Invalid periodic timescale declaration: the pattern must contain at least one point or interval.")
+
+        first = pattern[0][0] if isinstance(pattern[0], list) else pattern[0]
+        last = pattern[-1][1] if isinstance(pattern[-1], list) else pattern[-1]
+
+        if first < 0 or last >= period:
+            raise Exception("Invalid periodic timescale declaration: all values of the pattern must lie in [0, period).")
+
+        # base is the first value of period number 0.
+        self.base = shift + first
+
+        shifted_pattern = [[x[0] + shift, x[1] + shift] if isinstance(x, list) else x + shift for x in pattern]
+
+        self.period_timescale = timescale(shifted_pattern + [self.base + period], name + ' (one period)')
+
+        # The following dictionary caches the monodromy matrix of every coefficient matrix A that has been used so far.
+        self.memo_monodromy = {}
+
     #
     #
-    # Utility function to avoid repeated code.
-    # Returns the interval in which t is located for the current timescale.
-    # Will raise an exception if t is not in an interval.
+    # Utility function that splits t into [k, r] such that t = r + k*period and r lies in period number 0.
+    # r is snapped onto a value of the pattern if it differs from it by no more than the rounding of the subtraction t - k*period
+    # (a few units in the last place of t) plus "error" relative to the size of one period. The tolerance does not grow with k,
+    # so a value far away from 0 that is not in the timescale is not snapped onto the pattern.
     #
     #
-    def getCorrespondingInterval(self, t):
-        for x in self.ts:
-            if isinstance(x, list) and t <= x[1] and t >= x[0]:
-                return x
-        
-        raise Exception("getCorrespondingInterval(): t not in an interval!")
-    
+    def _reduce(self, t, error=1e-9):
+        k = int(np.floor((t - self.base) / self.period))
+        r = t - k * self.period
+
+        tolerance = error * max(1.0, abs(r), self.period) + 4 * np.spacing(max(abs(t), abs(k * self.period)))
+
+        for x in self.period_timescale.ts:
+            for value in (x if isinstance(x, list) else [x]):
+                if abs(r - value) <= tolerance:
+                    # The last value of period_timescale is the first value of the next period.
+                    if value == self.base + self.period:
+                        return [k + 1, self.base]
+
+                    return [k, value]
+
+        return [k, r]
+
+    def isInTimescale(self, t):
+        k, r = self._reduce(t)
+
+        return self.period_timescale.isInTimescale(r)
+
     #
     #
-    # Plotting functionality.
+    # forward jump
     #
-    # Required argument:
-    #   f:
-    #   The function that will determine the y values of the graph - the x values are determined by the current timescale values.
     #
-    # Optional arguments:
-    #   stepSize:
-    #   The accuracy to which the intervals are drawn in the graph - the smaller the value, the higher the accuracy and overhead.
-    #  
-    #   discreteStyle, intervalStyle:
-    #   These arguments determine the color, marker, and line styles of the graph.
-    #   They accept string arguments of 3-part character combinations that represent a color, marker style, and line style.
-    #   For instance the string "-r." indicates that the current (x, y) points should be plotted with a connected line
-    #   (represented by the "-"), in a red color (represented by the "r"), and with a point marker (represented by the ".").
-    #   These character combinations can be in any order UNLESS the reordering changes the interpretation of the character combination.
-    #   For instance, the string "r-." does not produce the same result as the string "-r.".
-    #   This is because "-." indicates a "dash-dot line style" and is therefore no longer interpreted as a "point marker" with a "solid line style".
-    #   See the notes section of this resource for more information: https://matplotlib.org/api/_as_gen/matplotlib.pyplot.plot.html
+    def sigma(self, t):
+        k, r = self._reduce(t)
+
+        return self.period_timescale.sigma(r) + k * self.period
+
     #
-    #   **kwargs:
-    #   This argument gives the user access to all the arguments of the matplotlib.pyplot.plot function (this includes markersize, linewidth, color, label, and dashes).
-    #   For a list of all available parameters, see: https://matplotlib.org/api/_as_gen/matplotlib.pyplot.plot.html
     #
-    # NOTE: To display plots that are created with this function, call the show() function of the plt data member of this class.
+    # graininess
     #
     #
-    def plot(self, f, stepSize=0.01, discreteStyle='b.', intervalStyle='r-', **kwargs):
-        xDiscretePoints = []
-        yDiscretePoints = []
-
-        intervals = []
-
-        for tsItem in self.ts:
-            if isinstance(tsItem, list):
-                xIntervalPoints = []
-                yIntervalPoints = []
+    def mu(self, t):
+        k, r = self._reduce(t)
 
-                for intervalValue in np.arange(tsItem[0], tsItem[1], stepSize):
-                    xIntervalPoints.append(intervalValue)
-                    yIntervalPoints.append(f(intervalValue))
+        return self.period_timescale.mu(r)
 
-                xyIntervalPointsPair = [xIntervalPoints, yIntervalPoints]
+    #
+    #
+    # Returns a regular timescale object that contains the periods first_period, ..., last_period.
+    # This makes all other methods of the timescale class available on a finite part of the periodic time scale.
+    #
+    #
+    def materialize(self, first_period, last_period):
+        ts = []
 
-                intervals.append(xyIntervalPointsPair)
+        for k in range(first_period, last_period + 1):
+            for x in self.period_timescale.ts[:-1]:
+                if isinstance(x, list):
+                    ts.append([x[0] + k * self.period, x[1] + k * self.period])
 
-            else:
-                xDiscretePoints.append(tsItem)
-                yDiscretePoints.append(f(tsItem))
+                else:
+                    ts.append(x + k * self.period)
 
-        plt.plot(xDiscretePoints, yDiscretePoints, discreteStyle, **kwargs)    
-        
-        labeled = False
-        removedLabel = False
-        
-        if "label" in kwargs:
-            if discreteStyle == intervalStyle:            
-                kwargs.pop("label")
-                removedLabel = True       
+        return timescale(ts, self.name + ' (periods ' + str(first_period) + ' to ' + str(last_period) + ')')
 
-        for xyIntervalPointsPair in intervals:
-            if "label" in kwargs:
-                if labeled == True and removedLabel == False:                
-                    kwargs.pop("label")    
-                    removedLabel = True                  
-                
-            plt.plot(xyIntervalPointsPair[0], xyIntervalPointsPair[1], intervalStyle, **kwargs)
-            
-            labeled = True
-    
     #
     #
-    # Scatter plotting functionality.
+    # Monodromy matrix of the periodic linear system y^Delta = A(t)*y, i.e. the transition matrix from the start of a period to the start of the next one.
+    # "A" is a constant matrix or a function A(t) with A(t + period) = A(t). See timescale.dexp_A() for "vectorized" and "key":
+    # the result is cached for constant matrices and for functions that are given with a key.
     #
-    # Required argument:
-    #   f:
-    #   The function that will determine the y values of the graph - the x values are determined by the current timescale values.
     #
-    # Optional arguments:
-    #   stepSize:
-    #   The accuracy to which the intervals are drawn in the graph - the smaller the value, the higher the accuracy and overhead.
+    def monodromy(self, A, vectorized=False, key=None):
+        if callable(A):
+            if key is None:
+                return self.period_timescale.dexp_A(A, self.base + self.period, self.base, vectorized)
+
+            memo_key = ("function", key)
+
+        else:
+            memo_key = ("constant", np.shape(A), np.asarray(A, dtype=float).tobytes())
+
+        if memo_key not in self.memo_monodromy:
+            self.memo_monodromy[memo_key] = self.period_timescale.dexp_A(A, self.base + self.period, self.base, vectorized, key)
+
+        return self.memo_monodromy[memo_key]
+
     #
-    #   **kwargs:
-    #   This argument gives the user access to all the arguments of the matplotlib.pyplot.scatter function (this includes marker, color, and label).
-    #   For a list of all available parameters, see: https://matplotlib.org/api/_as_gen/matplotlib.pyplot.scatter.html
     #
-    # NOTE: To display plots that are created with this function, call the show() function of the plt data member of this class.
+    # Matrix valued delta exponential e_A(t, s) for t >= s, where A(t + period) = A(t).
+    # The whole periods between s and t are covered by a power of the monodromy matrix, computed by repeated squaring.
     #
     #
-    def scatter(self, f, stepSize=0.01, **kwargs):
-        xDiscretePoints = []
-        yDiscretePoints = []
+    def dexp_A(self, A, t, s, vectorized=False, key=None):
+        if not self.isInTimescale(t) or not self.isInTimescale(s):
+            raise Exception("dexp_A: t = " + str(t) + " and s = " + str(s) + " must be values in the timescale.")
 
-        intervals = []
+        if t < s:
+            raise Exception("dexp_A: t cannot be smaller than s for a periodic timescale.")
 
-        for tsItem in self.ts:
-            if isinstance(tsItem, list):
-                xIntervalPoints = []
-                yIntervalPoints = []
+        k_s, r_s = self._reduce(s)
+        k_t, r_t = self._reduce(t)
 
-                for intervalValue in np.arange(tsItem[0], tsItem[1], stepSize):
-                    xIntervalPoints.append(intervalValue)
-                    yIntervalPoints.append(f(intervalValue))
+        if k_s == k_t:
+            return self.period_timescale.dexp_A(A, r_t, r_s, vectorized, key)
 
-                xyIntervalPointsPair = [xIntervalPoints, yIntervalPoints]
+        head = self.period_timescale.dexp_A(A, self.base + self.period, r_s, vectorized, key)
+        tail = self.period_timescale.dexp_A(A, r_t, self.base, vectorized, key)
 
-                intervals.append(xyIntervalPointsPair)
+        return tail @ np.linalg.matrix_power(self.monodromy(A, vectorized, key), k_t - k_s - 1) @ head
 
-            else:
-                xDiscretePoints.append(tsItem)
-                yDiscretePoints.append(f(tsItem))
-            
-        plt.scatter(xDiscretePoints, yDiscretePoints, **kwargs)    
+    #
+    #
+    # Solver for the periodic linear system y^Delta = A(t)*y with y(t_0) = y_0, see timescale.solve_linear_system_for_t(). "key" is passed to dexp_A().
+    #
+    #
+    def solve_linear_system_for_t(self, A, y_0, t_0, t_target, return_transition=False, vectorized=False, key=None):
+        Phi = self.dexp_A(A, t_target, t_0, vectorized, key)
+
+        if return_transition:
+            return [Phi @ np.asarray(y_0), Phi]
+
+        return Phi @ np.asarray(y_0)
 
-        if "label" in kwargs:
-            if "color" in kwargs:
-                kwargs.pop("label")
-                
-        for xyIntervalPointsPair in intervals:            
-            plt.scatter(xyIntervalPointsPair[0], xyIntervalPointsPair[1], **kwargs)
-    
 #
 #
 # create the time scale of integers {x : a <= x <= b}
@@ -1947,4 +5222,70 @@ def integers(a,b):
 def quantum(q,m,n):
     return timescale([q**k for k in range(m,n)], 'quantum numbers '+str(q)+'^'+str(m)+' to '+str(q)+'^'+str(n))
 
+#
+#
+# create the periodic time scale P_{a,b} = union of the intervals [k(a+b), k(a+b)+a] for all integers k
+#
+#
+def periodic_intervals(a, b, shift=0):
+    return periodic_timescale([[0, a]], a + b, shift, 'P_{'+str(a)+','+str(b)+'}')
+
+#
+#
+# create the periodic time scale hZ = {kh : k an integer}
+#
+#
+def multiples(h, shift=0):
+    return periodic_timescale([0], h, shift, str(h)+'Z')
+
+#
+#
+# create a time scale from a (possibly very large) set of event timestamps, given as an array or as a .npy, CSV or raw binary file
+# (see _timestamp_chunks() for the formats and the arguments "format", "chunk_size", "column", "delimiter", "skip_header" and "dtype")
+#
+# The timestamps must be sorted. Consecutive timestamps that are less than "gap" apart belong to the same run, every run of two or more
+# timestamps becomes the interval from its first to its last timestamp and every isolated timestamp becomes a point.
+# The file is read in chunks and clustered in a single pass with vectorized comparisons, so memory use is bounded by the chunk size
+# plus the resulting timescale, which is built directly with timescale.from_arrays() (with the precision "node_dtype").
+#
+def from_timestamps(source, gap, name='none', format=None, chunk_size=1000000, column=0, delimiter=',', skip_header=0, dtype='<f8', node_dtype=np.float64):
+    if gap <= 0:
+        raise Exception("from_timestamps(): gap must be positive.")
+
+    starts = []
+    ends = []
+
+    run_start = None
+    last = None
+
+    for values in _timestamp_chunks(source, format, chunk_size, column, delimiter, skip_header, dtype):
+        if len(values) == 0:
+            continue
+
+        if run_start is None:
+            run_start = last = values[0]
+
+        previous = np.concatenate(([last], values[:-1]))
+        differences = values - previous
+
+        if np.any(differences < 0):
+            raise Exception("from_timestamps(): the timestamps are not sorted.")
+
+        # Every large enough difference ends the current run at the previous timestamp and starts a new one.
+        breaks = np.flatnonzero(differences >= gap)
+
+        starts.append(np.concatenate(([run_start], values[breaks[:-1]])) if len(breaks) > 0 else np.empty(0))
+        ends.append(previous[breaks])
+
+        if len(breaks) > 0:
+            run_start = values[breaks[-1]]
+
+        last = values[-1]
+
+    if run_start is None:
+        raise Exception("from_timestamps(): there are no timestamps.")
+
+    starts.append(np.array([run_start]))
+    ends.append(np.array([last]))
 
+    return timescale.from_arrays(np.concatenate(starts), np.concatenate(ends), name, node_dtype)